@@ -0,0 +1,142 @@
+"""Peak memory and time of a full trend-index rebuild: pandas DataFrames vs the Arrow handoff.
+
+Each path runs in a fresh subprocess against the same DuckDB file, so its peak RSS is its own.
+
+Usage:
+    python benchmarks/bench_index_handoff.py --groups 40000 --weeks 30
+    python benchmarks/bench_index_handoff.py --db warehouse/warehouse.duckdb  # existing warehouse
+"""
+from __future__ import annotations
+
+import argparse
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+from common import make_style_panel
+
+from fashion_trends.analytics.arrow_index import compute_index_table
+from fashion_trends.analytics.backtest import compute_lead_time_weeks
+from fashion_trends.analytics.parallel import compute_trend_indices
+from fashion_trends.analytics.trend_index import mark_fatigue
+from fashion_trends.db import bootstrap_schemas
+from fashion_trends.pipelines.compute_indices import (
+    INDEX_TABLE,
+    KEY_COLS,
+    METRICS,
+    STYLE_DIM,
+    decoded_sql,
+    load_index_panel,
+    store_index_table,
+)
+
+PATHS = ("pandas", "arrow")
+
+
+def rebuild_pandas(con: duckdb.DuckDBPyConnection) -> None:
+    """The previous full rebuild: SELECT * into pandas, then copy/sort/concat/merge passes."""
+    df = con.execute("SELECT * FROM mart.mart_style_weekly").df()
+    idx = compute_trend_indices(df, metric_cols=METRICS, group_cols=KEY_COLS)
+    del df
+    idx = mark_fatigue(idx, group_cols=KEY_COLS + ["metric"])
+    lead = compute_lead_time_weeks(idx, group_cols=KEY_COLS)
+    idx = idx.merge(lead, on=KEY_COLS, how="left")
+    con.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE};")
+    con.register("idx_df", idx)
+    con.execute(f"CREATE TABLE {INDEX_TABLE} AS {decoded_sql('idx_df')};")
+    con.unregister("idx_df")
+
+
+def rebuild_arrow(con: duckdb.DuckDBPyConnection) -> None:
+    panel = load_index_panel(con)
+    idx = compute_index_table(panel, metric_cols=METRICS, group_cols=KEY_COLS)
+    del panel
+    store_index_table(con, idx)
+
+
+def measure(path: str, db: Path) -> None:
+    """Child process: runs one path and prints seconds, RSS before and peak RSS (MB)."""
+    con = duckdb.connect(str(db))
+    con.execute("SELECT COUNT(*) FROM mart.mart_style_weekly").fetchone()
+    with open("/proc/self/statm", "rb") as f:
+        before = int(f.read().split()[1]) * resource.getpagesize() / 1e6
+    t0 = time.perf_counter()
+    (rebuild_pandas if path == "pandas" else rebuild_arrow)(con)
+    seconds = time.perf_counter() - t0
+    con.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+    print(f"{seconds} {before} {peak}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--groups", type=int, default=40000)
+    ap.add_argument("--weeks", type=int, default=30)
+    ap.add_argument(
+        "--db", type=Path, help="Use mart.mart_style_weekly from this warehouse (copied first)."
+    )
+    ap.add_argument("--measure", choices=PATHS, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.measure:
+        measure(args.measure, args.db)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for path in PATHS:
+            db = Path(tmp) / f"{path}.duckdb"
+            if args.db:
+                shutil.copy(args.db, db)
+            else:
+                con = duckdb.connect(str(db))
+                bootstrap_schemas(con)
+                panel = make_style_panel(args.groups, args.weeks)
+                panel["week_start"] = panel["week_start"].dt.date
+                con.register("panel_df", panel)
+                styles = "brand, gender, category, silhouette, color"
+                con.execute(
+                    f"""
+                    CREATE TABLE {STYLE_DIM} AS
+                    SELECT CAST(row_number() OVER (ORDER BY {styles}) AS INTEGER) AS style_id, *
+                    FROM (SELECT DISTINCT {styles} FROM panel_df)
+                    """
+                )
+                con.execute(
+                    "CREATE TABLE mart.mart_style_weekly AS "
+                    f"SELECT * FROM panel_df JOIN {STYLE_DIM} USING ({styles});"
+                )
+                con.close()
+            out = subprocess.run(
+                [sys.executable, __file__, "--measure", path, "--db", str(db)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            seconds, before, peak = map(float, out[-3:])
+            results[path] = db
+            print(
+                f"{path:7s} {seconds:7.2f}s  peak RSS {peak:7.0f} MB  "
+                f"(+{peak - before:5.0f} MB over the open warehouse)"
+            )
+
+        con = duckdb.connect(str(results["arrow"]))
+        con.execute(f"ATTACH '{results['pandas']}' AS ref (READ_ONLY);")
+        rows = con.execute(f"SELECT COUNT(*) FROM {INDEX_TABLE}").fetchone()[0]
+        diff = con.execute(
+            f"""
+            SELECT COUNT(*) FROM (
+              (SELECT * FROM {INDEX_TABLE} EXCEPT ALL SELECT * FROM ref.{INDEX_TABLE})
+              UNION ALL
+              (SELECT * FROM ref.{INDEX_TABLE} EXCEPT ALL SELECT * FROM {INDEX_TABLE})
+            )
+            """
+        ).fetchone()[0]
+        con.close()
+        print(f"index rows: {rows:,}; rows that differ between the two paths: {diff}")
+
+
+if __name__ == "__main__":
+    main()
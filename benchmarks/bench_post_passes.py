@@ -0,0 +1,63 @@
+"""Timing comparison: vectorized vs loop mark_fatigue and compute_lead_time_weeks.
+
+Usage:
+    python benchmarks/bench_post_passes.py --groups 300000 --weeks 24 --skip-loop
+    python benchmarks/bench_post_passes.py --groups 20000
+"""
+from __future__ import annotations
+
+import argparse
+import warnings
+
+import pandas as pd
+from common import GROUP_COLS, make_style_panel, timed
+
+from fashion_trends.analytics.backtest import compute_lead_time_weeks
+from fashion_trends.analytics.parallel import compute_trend_indices
+from fashion_trends.analytics.trend_index import TrendIndexConfig, mark_fatigue
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--groups", type=int, default=300000)
+    ap.add_argument("--weeks", type=int, default=24)
+    ap.add_argument("--skip-loop", action="store_true", help="Only time the vectorized engines.")
+    args = ap.parse_args()
+
+    # Loose thresholds so that fatigue and lead-time triggers actually fire on random data.
+    cfg = TrendIndexConfig(emerging_threshold=1.0, fatiguing_threshold=-0.5, min_sessions=0)
+    panel = make_style_panel(args.groups, args.weeks)
+    idx = compute_trend_indices(
+        panel, metric_cols=["conversion_rate", "atc_rate"], group_cols=GROUP_COLS, cfg=cfg
+    )
+    del panel
+    print(f"index rows: {len(idx):,} across {args.groups:,} style groups x 2 metrics")
+
+    def run(engine: str) -> tuple[float, float, pd.DataFrame, pd.DataFrame]:
+        t_fat, marked = timed(
+            lambda: mark_fatigue(idx, group_cols=GROUP_COLS + ["metric"], cfg=cfg, engine=engine)
+        )
+        t_lead, lead = timed(
+            lambda: compute_lead_time_weeks(marked, group_cols=GROUP_COLS, engine=engine)
+        )
+        return t_fat, t_lead, marked, lead
+
+    v_fat, v_lead, marked, lead = run("vectorized")
+    print(f"vectorized: mark_fatigue {v_fat:8.3f}s  compute_lead_time_weeks {v_lead:8.3f}s")
+    if args.skip_loop:
+        return
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        l_fat, l_lead, ref_marked, ref_lead = run("loop")
+    print(f"loop:       mark_fatigue {l_fat:8.3f}s  compute_lead_time_weeks {l_lead:8.3f}s")
+    pd.testing.assert_frame_equal(marked, ref_marked)
+    pd.testing.assert_frame_equal(lead, ref_lead)
+    print(
+        f"speedup:    mark_fatigue {l_fat / v_fat:7.1f}x  "
+        f"compute_lead_time_weeks {l_lead / v_lead:7.1f}x  (outputs match)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Size and load-time comparison of the CSV vs Parquet raw layer.
+
+Converts a CSV raw directory to Parquet, then times a full ingest from each
+(plus Parquet external views) and a date-filtered scan of raw.web_events.
+
+Usage:
+    python benchmarks/bench_raw_formats.py --src data/raw
+    python benchmarks/bench_raw_formats.py --src data/raw --dst data/raw_parquet
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+import duckdb
+from common import timed
+
+from fashion_trends.pipelines.convert_raw import convert_raw
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+
+SCAN_SQL = "SELECT date, COUNT(DISTINCT session_id) FROM raw.web_events WHERE date >= ? GROUP BY 1"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument(
+        "--src", type=Path, default=Path("data/raw"), help="CSV raw directory (all five tables)."
+    )
+    ap.add_argument(
+        "--dst", type=Path, default=None, help="Parquet output (default: a temp directory)."
+    )
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dst = args.dst or Path(tmp) / "raw_parquet"
+        sizes = convert_raw(args.src, dst)
+        csv_mb = sum(c for c, _ in sizes.values()) / 1e6
+        pq_mb = sum(p for _, p in sizes.values()) / 1e6
+        print(
+            f"total: csv {csv_mb:.2f} MB  parquet {pq_mb:.2f} MB  ({csv_mb / pq_mb:.1f}x smaller)"
+        )
+
+        layouts = [("csv", args.src, False), ("parquet", dst, False), ("external", dst, True)]
+        for label, raw_dir, external in layouts:
+            con = duckdb.connect()
+            with contextlib.redirect_stdout(io.StringIO()):
+                t_load, _ = timed(
+                    lambda con=con, raw_dir=raw_dir, external=external: ingest_raw_csvs(
+                        con, raw_dir, external=external
+                    ),
+                    repeat=args.repeat,
+                )
+            # Scan the most recent ~quarter of days: exercises projection and partition pruning.
+            cutoff = con.execute(
+                "SELECT MAX(date) - INTERVAL 90 DAY FROM raw.web_events"
+            ).fetchone()[0]
+            t_scan, _ = timed(
+                lambda con=con, cutoff=cutoff: con.execute(SCAN_SQL, [cutoff]).fetchall(),
+                repeat=args.repeat,
+            )
+            print(f"{label:9s} ingest {t_load:7.3f}s  web_events scan {t_scan:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Timing comparison: vectorized vs loop trend index engine on a large synthetic panel.
+
+Usage:
+    python benchmarks/bench_trend_index.py --groups 20000 --weeks 30
+"""
+from __future__ import annotations
+
+import argparse
+
+import pandas as pd
+from common import GROUP_COLS, make_style_panel, timed
+
+from fashion_trends.analytics.trend_index import compute_trend_index
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--groups", type=int, default=20000)
+    ap.add_argument("--weeks", type=int, default=30)
+    ap.add_argument("--skip-loop", action="store_true", help="Only time the vectorized engine.")
+    args = ap.parse_args()
+
+    df = make_style_panel(args.groups, args.weeks)
+    print(f"panel: {len(df):,} rows, {args.groups:,} groups, {args.weeks} weeks")
+
+    def run(engine: str) -> pd.DataFrame:
+        return compute_trend_index(
+            df, metric_col="conversion_rate", group_cols=GROUP_COLS, engine=engine
+        )
+
+    t_vec, fast = timed(lambda: run("vectorized"), repeat=3)
+    print(f"vectorized: {t_vec:8.3f}s  ({len(df) / t_vec:,.0f} rows/s)")
+    if args.skip_loop:
+        return
+
+    t_loop, ref = timed(lambda: run("loop"))
+    print(f"loop:       {t_loop:8.3f}s  ({len(df) / t_loop:,.0f} rows/s)")
+    pd.testing.assert_frame_equal(fast, ref, check_dtype=False, rtol=1e-9, atol=1e-12)
+    print(f"speedup:    {t_loop / t_vec:8.1f}x  (outputs match)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Shared helpers for the standalone benchmark scripts in this folder."""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from fashion_trends.pipelines.generate_data import (
+    BRANDS,
+    CATEGORIES,
+    COLORS,
+    GENDERS,
+    REGIONS,
+    SILHOUETTES,
+)
+
+GROUP_COLS = ["brand", "region", "gender", "category", "silhouette", "color"]
+
+
+def make_style_panel(
+    n_groups: int, n_weeks: int = 30, *, seed: int = 7, missing: float = 0.1
+) -> pd.DataFrame:
+    """Synthetic mart_style_weekly-shaped panel of ``n_groups`` styles with ragged histories."""
+    rng = np.random.default_rng(seed)
+    dims = {
+        "brand": BRANDS, "region": REGIONS, "gender": GENDERS,
+        "category": CATEGORIES, "silhouette": SILHOUETTES, "color": COLORS,
+    }
+    codes = rng.choice(np.prod([len(v) for v in dims.values()]), size=n_groups, replace=False)
+    keys = {}
+    for c, values in reversed(dims.items()):
+        keys[c] = np.asarray(values, dtype=object)[codes % len(values)]
+        codes = codes // len(values)
+
+    weeks = pd.date_range("2025-01-06", periods=n_weeks, freq="W-MON")
+    g = np.repeat(np.arange(n_groups), n_weeks)
+    w = np.tile(np.arange(n_weeks), n_groups)
+    present = rng.random(len(g)) >= missing
+    g, w = g[present], w[present]
+
+    traffic = rng.poisson(60, size=len(g)).astype(float)
+    atc = rng.binomial(traffic.astype(int), 0.08).astype(float)
+    purchase = rng.binomial(atc.astype(int), 0.2).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        atc_rate = np.where(traffic > 0, atc / traffic, np.nan)
+        conversion_rate = np.where(traffic > 0, purchase / traffic, np.nan)
+
+    df = pd.DataFrame({c: v[g] for c, v in reversed(keys.items())})
+    df.insert(0, "week_start", weeks[w])
+    df["traffic_sessions"] = traffic
+    df["atc_sessions"] = atc
+    df["purchase_sessions"] = purchase
+    df["atc_rate"] = atc_rate
+    df["conversion_rate"] = conversion_rate
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def timed(fn: Callable[[], object], *, repeat: int = 1) -> tuple[float, object]:
+    """Best-of-``repeat`` wall time in seconds plus the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
@@ -0,0 +1,150 @@
+"""Local stand-in feed for ``watch``: replays a Parquet raw layer's latest days into a landing dir.
+
+``setup`` copies a raw layer (``generate-data --format parquet`` or ``convert-raw``) into the
+landing directory, holding back the last ``--hold-days`` days of web_events / orders and their
+order_items. ``feed`` then drops one held-back day every ``--interval`` seconds, each file written
+under a temporary name and renamed into place so ``watch`` never sees it half-written. ``report``
+summarises the batch latencies ``watch`` recorded in ``meta.watch_batches``.
+
+Usage:
+    python benchmarks/feed_landing.py setup --source data/raw_parquet --landing data/landing
+    DB_PATH=warehouse/landing.duckdb RAW_DIR=data/landing python -m fashion_trends run
+    DB_PATH=warehouse/landing.duckdb RAW_DIR=data/landing python -m fashion_trends watch  # term 1
+    python benchmarks/feed_landing.py feed --landing data/landing --interval 15         # term 2
+    python benchmarks/feed_landing.py report --db warehouse/landing.duckdb
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+
+import duckdb
+
+PARTITIONED = ("web_events", "orders")
+
+
+def held_dir(landing: Path) -> Path:
+    return landing.with_name(landing.name + ".held")
+
+
+def setup(source: Path, landing: Path, hold_days: int) -> list[str]:
+    """Copies ``source`` to ``landing`` minus the last ``hold_days`` days; returns those days."""
+    if not (source / "orders").is_dir() or not (source / "order_items.parquet").is_file():
+        raise SystemExit(f"{source} is not a Parquet raw layer with date-partitioned orders.")
+    held = held_dir(landing)
+    for d in (landing, held):
+        shutil.rmtree(d, ignore_errors=True)
+    shutil.copytree(source, landing, ignore=shutil.ignore_patterns("order_items.parquet"))
+    days = sorted(p.name.removeprefix("date=") for p in (landing / "orders").iterdir())[-hold_days:]
+    for table in PARTITIONED:
+        for day in days:
+            part = landing / table / f"date={day}"
+            if part.is_dir():
+                (held / table).mkdir(parents=True, exist_ok=True)
+                shutil.move(part, held / table / part.name)
+
+    con = duckdb.connect()
+    con.execute(
+        f"""
+        CREATE TEMP TABLE items AS
+        SELECT i.*, CAST(o.order_ts AS DATE) AS order_date
+        FROM read_parquet('{(source / "order_items.parquet").as_posix()}') i
+        JOIN read_parquet('{(source / "orders").as_posix()}/*/*.parquet', hive_partitioning=false) o
+          USING (order_id)
+        """
+    )
+    items = "SELECT * EXCLUDE (order_date) FROM items WHERE order_date"
+    out = (landing / "order_items.parquet").as_posix()
+    con.execute(f"COPY ({items} < ?) TO '{out}' (FORMAT parquet)", [days[0]])
+    (held / "order_items").mkdir(parents=True, exist_ok=True)
+    for day in days:
+        out = (held / "order_items" / f"items_{day}.parquet").as_posix()
+        con.execute(f"COPY ({items} = ?) TO '{out}' (FORMAT parquet)", [day])
+    return days
+
+
+def land(src: Path, dst: Path) -> None:
+    """Copies ``src`` to ``dst`` atomically (under a temporary name, then renamed)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def feed(landing: Path, interval: float, days: int | None) -> None:
+    held = held_dir(landing)
+    pending = sorted(
+        p.stem.removeprefix("items_") for p in (held / "order_items").glob("items_*.parquet")
+    )
+    for i, day in enumerate(pending[:days]):
+        if i:
+            time.sleep(interval)
+        # Orders land before their items, whose event dates are looked up in raw.orders.
+        for table in ("orders", "web_events"):
+            for f in sorted((held / table / f"date={day}").glob("*.parquet")):
+                land(f, landing / table / f"date={day}" / f.name)
+        items = Path("order_items") / f"items_{day}.parquet"
+        land(held / items, landing / items)
+        for table in PARTITIONED:
+            shutil.rmtree(held / table / f"date={day}", ignore_errors=True)
+        (held / items).unlink()
+        print(f"{time.strftime('%H:%M:%S')} landed {day}", flush=True)
+
+
+def report(db: Path) -> None:
+    con = duckdb.connect(str(db), read_only=True)
+    rows = con.execute(
+        """
+        SELECT batch_id, files, rows_in, groups, alerts, ingest_seconds, marts_seconds,
+          index_seconds, alerts_seconds, latency_seconds
+        FROM meta.watch_batches ORDER BY started_at
+        """
+    ).fetchall()
+    print(
+        f"{'batch':<14}{'files':>6}{'rows':>9}{'groups':>8}{'alerts':>7}"
+        f"{'ingest':>8}{'marts':>8}{'index':>8}{'alerts':>8}{'latency':>9}"
+    )
+    for r in rows:
+        stages = "".join(f"{v:>8.2f}" for v in r[5:9])
+        print(f"{r[0]:<14}{r[1]:>6}{r[2]:>9,}{r[3]:>8,}{r[4]:>7}{stages}{r[9]:>8.2f}s")
+    if rows:
+        lat = sorted(r[9] for r in rows)
+        print(f"{len(rows)} batches: median latency {lat[len(lat) // 2]:.2f}s, max {lat[-1]:.2f}s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser(
+        "setup", help="Copy a raw layer into the landing dir, holding back the latest days."
+    )
+    s.add_argument("--source", type=Path, required=True)
+    s.add_argument("--landing", type=Path, required=True)
+    s.add_argument("--hold-days", type=int, default=7)
+    f = sub.add_parser("feed", help="Land one held-back day every --interval seconds.")
+    f.add_argument("--landing", type=Path, required=True)
+    f.add_argument("--interval", type=float, default=15.0)
+    f.add_argument("--days", type=int, help="Stop after this many days (default: all held back).")
+    r = sub.add_parser("report", help="Batch latencies recorded by watch.")
+    r.add_argument("--db", type=Path, required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "setup":
+        days = setup(args.source, args.landing, args.hold_days)
+        print(
+            f"Landing dir {args.landing} ready; holding back {days[0]} .. {days[-1]} "
+            f"in {held_dir(args.landing)}"
+        )
+    elif args.cmd == "feed":
+        feed(args.landing, args.interval, args.days)
+    else:
+        report(args.db)
+
+
+if __name__ == "__main__":
+    main()
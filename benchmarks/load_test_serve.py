@@ -0,0 +1,94 @@
+"""Latency of the ``serve`` endpoints under concurrent load: p50/p90/p99, throughput, cache hits.
+
+Requests cycle through a mix of mart slices (per brand, per week) and style lists, so with a cache
+of at least the mix size most requests after the first pass are hits; ``--cache-size 0`` measures
+every request against DuckDB.
+
+Usage:
+    python benchmarks/load_test_serve.py --serving-dir warehouse/serving  # in-process server
+    python benchmarks/load_test_serve.py --serving-dir warehouse/serving --cache-size 0
+    python benchmarks/load_test_serve.py --url http://127.0.0.1:8765      # a running `serve`
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+
+from fashion_trends.serving import make_server
+
+
+def request_mix(base: str, brands: list[str], weeks: list[str]) -> list[str]:
+    paths = []
+    for brand in map(quote, brands):
+        paths += [
+            f"/marts/mart_brand_weekly_performance?brand={brand}",
+            f"/marts/mart_style_weekly?brand={brand}&week_start={weeks[-1]}",
+            f"/styles/emerging?brand={brand}",
+            f"/styles/fatiguing?brand={brand}",
+        ]
+    paths += [f"/marts/mart_collection_health?week_start={w}" for w in weeks]
+    return [base + p for p in paths]
+
+
+def fetch(url: str) -> tuple[float, bool]:
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(url) as r:
+        r.read()
+        hit = r.headers.get("X-Cache") == "hit"
+    return time.perf_counter() - t0, hit
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--url", help="Base URL of a running server (default: start one in-process).")
+    ap.add_argument("--serving-dir", type=Path, default=Path("warehouse/serving"))
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--pool-size", type=int, default=4)
+    ap.add_argument("--cache-size", type=int, default=256)
+    args = ap.parse_args()
+
+    server = None
+    base = args.url
+    if base is None:
+        server = make_server(
+            args.serving_dir, port=0, pool_size=args.pool_size, cache_size=args.cache_size
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + "/marts/mart_brand_weekly_performance?limit=10000") as r:
+            rows = json.loads(r.read())["rows"]
+        brands = sorted({r["brand"] for r in rows})
+        weeks = sorted({r["week_start"] for r in rows})[-8:]
+        urls = request_mix(base, brands, weeks)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(fetch, (urls[i % len(urls)] for i in range(args.requests))))
+        elapsed = time.perf_counter() - t0
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    ms = np.array([r[0] for r in results]) * 1000
+    hits = sum(r[1] for r in results)
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {len(urls)} distinct URLs")
+    print(
+        f"p50 {np.percentile(ms, 50):.2f} ms  p90 {np.percentile(ms, 90):.2f} ms  "
+        f"p99 {np.percentile(ms, 99):.2f} ms  max {ms.max():.2f} ms"
+    )
+    print(f"throughput {args.requests / elapsed:.0f} req/s  cache hits {hits / len(results):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,31 @@ CREATE OR REPLACE MACRO safe_divide(n, d) AS
     WHEN d IS NULL OR d = 0 THEN NULL
     ELSE (n * 1.0) / d
   END;
+
+-- Session counts of the marts that call approx_sessions() come from HyperLogLog sketches instead
+-- of exact distinct counts; run_sql sets the variable per mart (APPROX_SESSION_MARTS).
+CREATE OR REPLACE MACRO approx_sessions() AS COALESCE(getvariable('approx_sessions'), false);
+
+-- HyperLogLog over the 64-bit session_key hash with 4,096 registers (~1.6% standard error): the
+-- low 12 bits pick the register, the rank is 1 + the trailing zero bits of the remaining 52.
+CREATE OR REPLACE MACRO hll_register(h) AS (h & 4095)::SMALLINT;
+
+CREATE OR REPLACE MACRO hll_rank(h) AS
+  CASE
+    WHEN h >> 12 = 0 THEN 53
+    ELSE bit_count((((h >> 12)::BIGINT) & -((h >> 12)::BIGINT)) - 1) + 1
+  END::UTINYINT;
+
+-- Estimate from the merged registers: linear counting while many registers are still empty,
+-- the bias-corrected harmonic mean above 2.5 * 4096.
+CREATE OR REPLACE MACRO hll_estimate(inv_sum, filled) AS
+  CASE
+    WHEN filled = 0 THEN 0
+    WHEN filled < 4096 AND 0.7213 / (1 + 1.079 / 4096) * 4096 * 4096 / (inv_sum + 4096 - filled) <= 2.5 * 4096
+      THEN 4096 * ln(4096 / (4096 - filled))
+    ELSE 0.7213 / (1 + 1.079 / 4096) * 4096 * 4096 / (inv_sum + 4096 - filled)
+  END;
+
+-- Aggregate over one row per register (rank 0 = empty): the estimated distinct sessions.
+CREATE OR REPLACE MACRO hll_count(rank) AS
+  round(hll_estimate(COALESCE(sum(pow(2.0, -rank::INTEGER)) FILTER (WHERE rank > 0), 0), count_if(rank > 0)))::BIGINT;
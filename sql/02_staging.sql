@@ -1,14 +1,64 @@
-CREATE OR REPLACE VIEW staging.stg_products AS
+-- The product dimensions are ENUMs: every value is stored, hashed, compared and sorted as a
+-- one-byte code instead of a string. The domains are read from raw.products (a few thousand rows)
+-- on every run, sorted, so codes order like the labels. A mart whose ENUM columns change because a
+-- domain grew is rebuilt in full (run_sql.py).
+CREATE OR REPLACE TYPE staging.brand_t AS ENUM (
+  SELECT DISTINCT brand FROM raw.products WHERE brand IS NOT NULL ORDER BY 1
+);
+CREATE OR REPLACE TYPE staging.category_t AS ENUM (
+  SELECT DISTINCT category FROM raw.products WHERE category IS NOT NULL ORDER BY 1
+);
+CREATE OR REPLACE TYPE staging.gender_t AS ENUM (
+  SELECT DISTINCT gender FROM raw.products WHERE gender IS NOT NULL ORDER BY 1
+);
+CREATE OR REPLACE TYPE staging.collection_t AS ENUM (
+  SELECT DISTINCT collection FROM raw.products WHERE collection IS NOT NULL ORDER BY 1
+);
+CREATE OR REPLACE TYPE staging.silhouette_t AS ENUM (
+  SELECT DISTINCT silhouette FROM raw.products WHERE silhouette IS NOT NULL ORDER BY 1
+);
+CREATE OR REPLACE TYPE staging.color_t AS ENUM (
+  SELECT DISTINCT color FROM raw.products WHERE color IS NOT NULL ORDER BY 1
+);
+
+-- One row per style (brand x gender x category x silhouette x color, a missing label included),
+-- numbered densely in label order. The marts group by style_id and join the labels back from here;
+-- when styles are renumbered the marts reading this table are rebuilt in full (run_sql.py).
+CREATE OR REPLACE TABLE staging.dim_style AS
 SELECT
-  CAST(product_id AS BIGINT) AS product_id,
-  brand,
-  category,
-  gender,
-  collection,
-  silhouette,
-  color,
-  CAST(list_price AS DOUBLE) AS list_price
-FROM raw.products;
+  CAST(dense_rank() OVER (ORDER BY brand, gender, category, silhouette, color) AS INTEGER) AS style_id,
+  *
+FROM (
+  SELECT DISTINCT
+    CAST(brand AS staging.brand_t) AS brand,
+    CAST(gender AS staging.gender_t) AS gender,
+    CAST(category AS staging.category_t) AS category,
+    CAST(silhouette AS staging.silhouette_t) AS silhouette,
+    CAST(color AS staging.color_t) AS color
+  FROM raw.products
+);
+
+CREATE OR REPLACE VIEW staging.stg_products AS
+WITH products AS (
+  SELECT
+    CAST(product_id AS BIGINT) AS product_id,
+    CAST(brand AS staging.brand_t) AS brand,
+    CAST(category AS staging.category_t) AS category,
+    CAST(gender AS staging.gender_t) AS gender,
+    CAST(collection AS staging.collection_t) AS collection,
+    CAST(silhouette AS staging.silhouette_t) AS silhouette,
+    CAST(color AS staging.color_t) AS color,
+    CAST(list_price AS DOUBLE) AS list_price
+  FROM raw.products
+)
+SELECT p.*, s.style_id
+FROM products p
+JOIN staging.dim_style s
+  ON p.brand IS NOT DISTINCT FROM s.brand
+  AND p.gender IS NOT DISTINCT FROM s.gender
+  AND p.category IS NOT DISTINCT FROM s.category
+  AND p.silhouette IS NOT DISTINCT FROM s.silhouette
+  AND p.color IS NOT DISTINCT FROM s.color;
 
 CREATE OR REPLACE VIEW staging.stg_inventory_receipts AS
 SELECT
@@ -1,27 +1,118 @@
+-- Marts are materialized incrementally by their partition_by key (see run_sql.py):
+-- `run-sql` rebuilds only the weeks touched by new raw files, `run-sql --full-refresh` everything.
+
+-- Session x product facts (weekly): one pass over events, one row per session, product and week.
+-- session_key is a 64-bit hash of session_id: far cheaper to store and group by than the string,
+-- with a negligible chance (~1e-11 per week/region) of two sessions colliding.
+-- partition_by: week_start
+CREATE OR REPLACE TABLE mart.fct_session_product_weekly AS
+SELECT
+  week_start,
+  region,
+  hash(session_id) AS session_key,
+  product_id,
+  bool_or(event_type='page_view') AS viewed,
+  bool_or(event_type='add_to_cart') AS added_to_cart,
+  bool_or(event_type='purchase') AS purchased
+FROM staging.stg_web_events
+WHERE session_id IS NOT NULL
+GROUP BY 1,2,3,4;
+
+-- Session sketches (weekly): HyperLogLog registers (see 01_macros.sql) of the page_view,
+-- add_to_cart and purchase sessions per week, region and style, one row per non-empty register.
+-- Unlike session counts they merge: max(rank) per register over any set of cells, then hll_count,
+-- estimates the distinct sessions of a coarser grain without going back to the events.
+-- Only filled when a mart counts sessions from it (APPROX_SESSION_MARTS) or sketches are requested
+-- (SESSION_SKETCHES=1 / --sketches); otherwise run_sql creates it empty.
+-- on_demand
+-- partition_by: week_start
+CREATE OR REPLACE TABLE mart.sketch_style_sessions_weekly AS
+WITH hashed AS (
+  SELECT f.week_start, f.region, p.style_id, hll_register(f.session_key) AS register,
+    hll_rank(f.session_key) AS rank, f.viewed, f.added_to_cart, f.purchased
+  FROM mart.fct_session_product_weekly f
+  JOIN staging.stg_products p USING (product_id)
+),
+registers AS (
+  SELECT week_start, region, style_id, register,
+    max(CASE WHEN viewed THEN rank ELSE 0 END)::UTINYINT AS view_rank,
+    max(CASE WHEN added_to_cart THEN rank ELSE 0 END)::UTINYINT AS atc_rank,
+    max(CASE WHEN purchased THEN rank ELSE 0 END)::UTINYINT AS purchase_rank
+  FROM hashed
+  GROUP BY 1,2,3,4
+)
+SELECT
+  r.week_start,
+  r.region,
+  s.brand,
+  s.gender,
+  s.category,
+  s.silhouette,
+  s.color,
+  r.register,
+  r.view_rank,
+  r.atc_rank,
+  r.purchase_rank
+FROM registers r
+JOIN staging.dim_style s USING (style_id);
+
 -- Weekly funnel by brand/category/gender/region
+-- Sessions are deduplicated per (integer) group key first, so the counts equal
+-- COUNT(DISTINCT session_id) without distinct-hashing raw events. With approx_sessions() they
+-- are merged from the style sketches instead.
+-- partition_by: week_start
 CREATE OR REPLACE TABLE mart.mart_brand_weekly_funnel AS
+WITH funnel_groups AS (
+  SELECT product_id, brand, category, gender, dense_rank() OVER (ORDER BY brand, category, gender) AS group_key
+  FROM staging.stg_products
+),
+sessions AS (
+  SELECT f.week_start, f.region, g.group_key, f.session_key,
+    bool_or(f.viewed) AS viewed, bool_or(f.added_to_cart) AS added_to_cart, bool_or(f.purchased) AS purchased
+  FROM mart.fct_session_product_weekly f
+  JOIN funnel_groups g USING (product_id)
+  WHERE NOT approx_sessions()
+  GROUP BY 1,2,3,4
+),
+registers AS (
+  SELECT s.week_start, s.region, g.group_key, s.register,
+    max(s.view_rank) AS view_rank, max(s.atc_rank) AS atc_rank, max(s.purchase_rank) AS purchase_rank
+  FROM mart.sketch_style_sessions_weekly s
+  JOIN (SELECT DISTINCT group_key, brand, category, gender FROM funnel_groups) g USING (brand, category, gender)
+  WHERE approx_sessions()
+  GROUP BY 1,2,3,4
+),
+counts AS (
+  SELECT week_start, region, group_key,
+    count_if(viewed)::BIGINT AS traffic_sessions,
+    count_if(added_to_cart)::BIGINT AS atc_sessions,
+    count_if(purchased)::BIGINT AS purchase_sessions
+  FROM sessions
+  GROUP BY 1,2,3
+  UNION ALL
+  SELECT week_start, region, group_key,
+    hll_count(view_rank) AS traffic_sessions,
+    hll_count(atc_rank) AS atc_sessions,
+    hll_count(purchase_rank) AS purchase_sessions
+  FROM registers
+  GROUP BY 1,2,3
+)
 SELECT
-  w.week_start,
-  w.region,
-  p.brand,
-  p.category,
-  p.gender,
-  COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END) AS traffic_sessions,
-  COUNT(DISTINCT CASE WHEN event_type='add_to_cart' THEN session_id END) AS atc_sessions,
-  COUNT(DISTINCT CASE WHEN event_type='purchase' THEN session_id END) AS purchase_sessions,
-  safe_divide(
-    COUNT(DISTINCT CASE WHEN event_type='add_to_cart' THEN session_id END),
-    COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END)
-  ) AS atc_rate,
-  safe_divide(
-    COUNT(DISTINCT CASE WHEN event_type='purchase' THEN session_id END),
-    COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END)
-  ) AS conversion_rate
-FROM staging.stg_web_events w
-JOIN staging.stg_products p USING (product_id)
-GROUP BY 1,2,3,4,5;
+  c.week_start,
+  c.region,
+  g.brand,
+  g.category,
+  g.gender,
+  c.traffic_sessions,
+  c.atc_sessions,
+  c.purchase_sessions,
+  safe_divide(c.atc_sessions, c.traffic_sessions) AS atc_rate,
+  safe_divide(c.purchase_sessions, c.traffic_sessions) AS conversion_rate
+FROM counts c
+JOIN (SELECT DISTINCT group_key, brand, category, gender FROM funnel_groups) g USING (group_key);
 
 -- Weekly sales + returns + markdown dependency (collection grain)
+-- partition_by: week_start
 CREATE OR REPLACE TABLE mart.mart_collection_health AS
 WITH sales AS (
   SELECT
@@ -67,6 +158,7 @@ LEFT JOIN inv
  AND s.collection = inv.collection;
 
 -- Brand performance (weekly): join funnel + aggregated collection sales
+-- partition_by: week_start
 CREATE OR REPLACE TABLE mart.mart_brand_weekly_performance AS
 WITH sales AS (
   SELECT
@@ -110,27 +202,138 @@ LEFT JOIN sales s
  AND f.category = s.category
  AND f.gender = s.gender;
 
--- Weekly style signals (silhouette + color) for trend detection
+-- Weekly style signals (silhouette + color) for trend detection, keyed by style_id (dim_style)
+-- With approx_sessions() the session counts are read from the style sketches (same grain).
+-- partition_by: week_start
 CREATE OR REPLACE TABLE mart.mart_style_weekly AS
+WITH sessions AS (
+  SELECT f.week_start, f.region, p.style_id, f.session_key,
+    bool_or(f.viewed) AS viewed, bool_or(f.added_to_cart) AS added_to_cart, bool_or(f.purchased) AS purchased
+  FROM mart.fct_session_product_weekly f
+  JOIN staging.stg_products p USING (product_id)
+  WHERE NOT approx_sessions()
+  GROUP BY 1,2,3,4
+),
+counts AS (
+  SELECT week_start, region, style_id,
+    count_if(viewed)::BIGINT AS traffic_sessions,
+    count_if(added_to_cart)::BIGINT AS atc_sessions,
+    count_if(purchased)::BIGINT AS purchase_sessions
+  FROM sessions
+  GROUP BY 1,2,3
+  UNION ALL
+  SELECT k.week_start, k.region, s.style_id,
+    hll_count(k.view_rank) AS traffic_sessions,
+    hll_count(k.atc_rank) AS atc_sessions,
+    hll_count(k.purchase_rank) AS purchase_sessions
+  FROM mart.sketch_style_sessions_weekly k
+  JOIN staging.dim_style s USING (brand, gender, category, silhouette, color)
+  WHERE approx_sessions()
+  GROUP BY 1,2,3
+)
+SELECT
+  c.week_start,
+  c.region,
+  c.style_id,
+  s.brand,
+  s.gender,
+  s.category,
+  s.silhouette,
+  s.color,
+  c.traffic_sessions,
+  c.atc_sessions,
+  c.purchase_sessions,
+  safe_divide(c.atc_sessions, c.traffic_sessions) AS atc_rate,
+  safe_divide(c.purchase_sessions, c.traffic_sessions) AS conversion_rate
+FROM counts c
+JOIN staging.dim_style s USING (style_id);
+
+-- Rollup cube for dashboard slices: every combination of brand, region, gender, category and
+-- collection per week, totals included (NULL = all). grouping_id has one bit per dimension, set
+-- when it is rolled up: brand 16, region 8, gender 4, category 2, collection 1 (0 = finest grain).
+-- Rates are re-derived from the summed numerators and denominators, never averaged.
+-- Funnel counts have no collection grain, so they are only filled where collection is rolled up;
+-- above the mart grain they are sums of per-group session counts, or with approx_sessions()
+-- distinct-session estimates merged from the style sketches.
+-- Inventory is not regional (mart_collection_health repeats it on every region row), so slices
+-- with region rolled up count it once per week, brand, category, gender and collection.
+-- partition_by: week_start
+CREATE OR REPLACE TABLE mart.mart_performance_cube AS
+WITH health AS (
+  SELECT *,
+    CASE WHEN row_number() OVER (PARTITION BY week_start, brand, category, gender, collection ORDER BY region) = 1
+      THEN units_received END AS units_received_once
+  FROM mart.mart_collection_health
+),
+sales AS (
+  SELECT
+    week_start,
+    GROUPING(brand, region, gender, category, collection) AS grouping_id,
+    brand, region, gender, category, collection,
+    SUM(units_sold) AS units_sold,
+    SUM(revenue_gross) AS revenue_gross,
+    SUM(revenue_discounted) AS revenue_discounted,
+    SUM(units_returned) AS units_returned,
+    CASE WHEN GROUPING(region) = 1 THEN SUM(units_received_once) ELSE SUM(units_received) END AS units_received
+  FROM health
+  GROUP BY week_start, CUBE (brand, region, gender, category, collection)
+),
+funnel AS (
+  SELECT
+    week_start,
+    GROUPING(brand, region, gender, category) * 2 + 1 AS grouping_id,
+    brand, region, gender, category,
+    SUM(traffic_sessions) AS traffic_sessions,
+    SUM(atc_sessions) AS atc_sessions,
+    SUM(purchase_sessions) AS purchase_sessions
+  FROM mart.mart_brand_weekly_funnel
+  WHERE NOT approx_sessions()
+  GROUP BY week_start, CUBE (brand, region, gender, category)
+  UNION ALL
+  SELECT
+    week_start, grouping_id, brand, region, gender, category,
+    hll_count(view_rank) AS traffic_sessions,
+    hll_count(atc_rank) AS atc_sessions,
+    hll_count(purchase_rank) AS purchase_sessions
+  FROM (
+    SELECT
+      week_start,
+      GROUPING(brand, region, gender, category) * 2 + 1 AS grouping_id,
+      brand, region, gender, category, register,
+      max(view_rank) AS view_rank, max(atc_rank) AS atc_rank, max(purchase_rank) AS purchase_rank
+    FROM mart.sketch_style_sessions_weekly
+    WHERE approx_sessions()
+    GROUP BY week_start, register, CUBE (brand, region, gender, category)
+  )
+  GROUP BY 1,2,3,4,5,6
+)
 SELECT
-  e.week_start,
-  e.region,
-  p.brand,
-  p.gender,
-  p.category,
-  p.silhouette,
-  p.color,
-  COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END) AS traffic_sessions,
-  COUNT(DISTINCT CASE WHEN event_type='add_to_cart' THEN session_id END) AS atc_sessions,
-  COUNT(DISTINCT CASE WHEN event_type='purchase' THEN session_id END) AS purchase_sessions,
-  safe_divide(
-    COUNT(DISTINCT CASE WHEN event_type='add_to_cart' THEN session_id END),
-    COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END)
-  ) AS atc_rate,
-  safe_divide(
-    COUNT(DISTINCT CASE WHEN event_type='purchase' THEN session_id END),
-    COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END)
-  ) AS conversion_rate
-FROM staging.stg_web_events e
-JOIN staging.stg_products p USING (product_id)
-GROUP BY 1,2,3,4,5,6,7;
+  COALESCE(s.week_start, f.week_start) AS week_start,
+  COALESCE(s.grouping_id, f.grouping_id)::INTEGER AS grouping_id,
+  COALESCE(s.brand, f.brand) AS brand,
+  COALESCE(s.region, f.region) AS region,
+  COALESCE(s.gender, f.gender) AS gender,
+  COALESCE(s.category, f.category) AS category,
+  s.collection,
+  f.traffic_sessions::BIGINT AS traffic_sessions,
+  f.atc_sessions::BIGINT AS atc_sessions,
+  f.purchase_sessions::BIGINT AS purchase_sessions,
+  safe_divide(f.atc_sessions, f.traffic_sessions) AS atc_rate,
+  safe_divide(f.purchase_sessions, f.traffic_sessions) AS conversion_rate,
+  s.units_sold::BIGINT AS units_sold,
+  s.revenue_gross,
+  s.revenue_discounted,
+  s.units_returned::BIGINT AS units_returned,
+  s.units_received::BIGINT AS units_received,
+  safe_divide(s.units_sold, s.units_received) AS sell_through,
+  safe_divide(s.revenue_discounted, s.revenue_gross) AS discount_dependency,
+  safe_divide(s.units_returned, s.units_sold) AS return_rate,
+  safe_divide(s.revenue_gross, NULLIF(f.purchase_sessions, 0)) AS revenue_per_purchase_session
+FROM sales s
+FULL OUTER JOIN funnel f
+  ON s.week_start = f.week_start
+ AND s.grouping_id = f.grouping_id
+ AND s.brand IS NOT DISTINCT FROM f.brand
+ AND s.region IS NOT DISTINCT FROM f.region
+ AND s.gender IS NOT DISTINCT FROM f.gender
+ AND s.category IS NOT DISTINCT FROM f.category;
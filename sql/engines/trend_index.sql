@@ -0,0 +1,139 @@
+-- Trend index engine evaluated in DuckDB (compute-indices --engine sql).
+-- Mirrors analytics/trend_index.py (compute_trend_index + mark_fatigue) and
+-- analytics/backtest.py (compute_lead_time_weeks) with window frames.
+-- Groups are keyed by (style_id, region) like the python engine; the labels ride along as VARCHAR.
+-- Brace placeholders are filled from TrendIndexConfig by pipelines/compute_indices.py.
+CREATE OR REPLACE TABLE mart.mart_brand_trend_index AS
+WITH panel AS (
+  SELECT
+    s.brand::VARCHAR AS brand, s.region::VARCHAR AS region, s.gender::VARCHAR AS gender,
+    s.category::VARCHAR AS category, s.silhouette::VARCHAR AS silhouette, s.color::VARCHAR AS color,
+    s.style_id,
+    CAST(s.week_start AS TIMESTAMP) AS week_start,
+    m.metric,
+    CASE WHEN isnan(m.y) THEN NULL ELSE m.y END AS y,
+    CAST(s.traffic_sessions AS DOUBLE) AS traffic_sessions
+  FROM mart.mart_style_weekly s
+  CROSS JOIN LATERAL (
+    VALUES ('conversion_rate', CAST(s.conversion_rate AS DOUBLE)),
+           ('atc_rate', CAST(s.atc_rate AS DOUBLE))
+  ) AS m(metric, y)
+  WHERE s.brand IS NOT NULL AND s.region IS NOT NULL AND s.gender IS NOT NULL
+    AND s.category IS NOT NULL AND s.silhouette IS NOT NULL AND s.color IS NOT NULL
+),
+positioned AS (
+  SELECT
+    *,
+    CAST(row_number() OVER (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+    ) - 1 AS DOUBLE) AS pos
+  FROM panel
+),
+windowed AS (
+  SELECT
+    *,
+    COUNT(*) OVER baseline AS baseline_len,
+    AVG(y) OVER baseline AS baseline_mean,
+    STDDEV_SAMP(y) OVER baseline AS baseline_std_samp,
+    STDDEV_POP(y) OVER baseline AS baseline_std_pop,
+    AVG(y) OVER recent AS recent_mean,
+    COUNT(*) OVER slope AS slope_len,
+    COUNT(y) OVER slope AS slope_n,
+    REGR_SLOPE(y, pos) OVER slope AS slope_raw
+  FROM positioned
+  WINDOW
+    baseline AS (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+      ROWS BETWEEN {baseline_far} PRECEDING AND {baseline_near} PRECEDING
+    ),
+    recent AS (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+      ROWS BETWEEN {recent_far} PRECEDING AND CURRENT ROW
+    ),
+    slope AS (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+      ROWS BETWEEN {slope_far} PRECEDING AND CURRENT ROW
+    )
+),
+scored AS (
+  SELECT
+    *,
+    CASE
+      WHEN baseline_std <= 1e-9 THEN 0.0
+      ELSE (recent_mean - baseline_mean) / baseline_std
+    END AS momentum_z,
+    CASE
+      WHEN baseline_std <= 1e-9 THEN 0.0
+      ELSE slope / baseline_std
+    END AS accel_z
+  FROM (
+    SELECT
+      *,
+      CASE WHEN baseline_len >= 3 THEN baseline_std_samp ELSE baseline_std_pop END AS baseline_std,
+      CASE
+        WHEN slope_len < 2 THEN 0.0
+        WHEN slope_n < slope_len THEN NULL
+        ELSE slope_raw
+      END AS slope
+    FROM windowed
+    WHERE baseline_len > 0 AND pos - {exclude_recent_weeks} > 1
+  )
+),
+indexed AS (
+  SELECT
+    *,
+    {momentum_weight} * momentum_z + {accel_weight} * accel_z AS trend_index
+  FROM scored
+),
+fatigue AS (
+  SELECT
+    *,
+    MAX(trend_index) OVER (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+      ROWS BETWEEN {fatigue_far} PRECEDING AND CURRENT ROW
+    ) AS peak_recent,
+    row_number() OVER (
+      PARTITION BY style_id, region, metric ORDER BY week_start
+    ) - 1 AS index_pos
+  FROM indexed
+),
+lead_signals AS (
+  SELECT
+    style_id, region, index_pos, trend_index,
+    MEDIAN(baseline_mean) OVER (PARTITION BY style_id, region) + 0.005
+      AS baseline_threshold,
+    CASE
+      WHEN COUNT(recent_mean) OVER lead_ma = 8 THEN AVG(recent_mean) OVER lead_ma
+    END AS recent_ma
+  FROM fatigue
+  WHERE metric = 'conversion_rate'
+  WINDOW lead_ma AS (
+    PARTITION BY style_id, region ORDER BY week_start
+    ROWS BETWEEN 7 PRECEDING AND CURRENT ROW
+  )
+),
+lead_times AS (
+  SELECT
+    style_id, region,
+    MIN(index_pos) FILTER (WHERE recent_ma >= baseline_threshold)
+      - MIN(index_pos) FILTER (WHERE trend_index >= 1.5) AS lead_time_weeks
+  FROM lead_signals
+  GROUP BY ALL
+)
+SELECT
+  f.brand, f.region, f.gender, f.category, f.silhouette, f.color, f.style_id,
+  f.week_start,
+  f.metric,
+  f.baseline_mean,
+  f.baseline_std,
+  f.recent_mean,
+  f.momentum_z,
+  f.accel_z,
+  f.trend_index,
+  f.traffic_sessions,
+  COALESCE(f.trend_index >= {emerging_threshold} AND f.traffic_sessions >= {min_sessions}, FALSE) AS is_emerging,
+  COALESCE(f.trend_index <= {fatiguing_threshold} AND f.peak_recent >= {emerging_threshold}, FALSE) AS is_fatiguing,
+  CAST(l.lead_time_weeks AS DOUBLE) AS lead_time_weeks
+FROM fatigue f
+LEFT JOIN lead_times l USING (style_id, region)
+ORDER BY f.style_id, f.region, f.metric, f.week_start;
@@ -0,0 +1,114 @@
+"""Trend index over Arrow columns, for full rebuilds straight from (and back to) DuckDB.
+
+``compute_index_table`` takes the style panel as an Arrow table that DuckDB already projected,
+filtered and sorted, and returns the finished index table (trend statistics, fatigue flag and
+lead time) as Arrow. The group keys are never converted to Python objects: group boundaries are
+found with Arrow compute kernels and the key columns are only gathered for the rows that are
+kept. The numeric columns are scored as NumPy arrays (zero-copy views where Arrow allows it).
+"""
+from __future__ import annotations
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from fashion_trends.analytics.backtest import group_lead_times
+from fashion_trends.analytics.parallel import BOOL_COLS, STAT_COLS, score_panel
+from fashion_trends.analytics.trend_index import (
+    FATIGUE_WINDOW,
+    TrendIndexConfig,
+    grouped_rolling_max,
+    run_positions,
+)
+
+
+def compute_index_table(
+    panel: pa.Table,
+    *,
+    metric_cols: list[str],
+    volume_col: str = "traffic_sessions",
+    group_cols: list[str],
+    week_col: str = "week_start",
+    lead_metric: str = "conversion_rate",
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    workers: int = 1,
+) -> pa.Table:
+    """Scores a panel sorted by ``group_cols`` + ``week_col`` whose group keys are never null.
+
+    The result has the rows and columns of ``compute_trend_indices`` followed by ``mark_fatigue``
+    and the per-group ``lead_time_weeks`` of ``lead_metric``, laid out metric by metric. As when
+    DuckDB scans those pandas frames, NaN statistics become nulls.
+    """
+    n = panel.num_rows
+    starts = np.zeros(n, dtype=bool)
+    partition_starts = starts
+    if n:
+        starts[0] = True
+    for c in group_cols:
+        col = panel.column(c)
+        if n > 1:
+            changed = pc.not_equal(col.slice(1), col.slice(0, n - 1))
+            starts[1:] |= changed.to_numpy(zero_copy_only=False)
+        if c == group_cols[0]:
+            partition_starts = starts.copy()
+
+    outputs = score_panel(
+        [_float_column(panel, m) for m in metric_cols],
+        _float_column(panel, volume_col),
+        run_positions(starts),
+        partition_starts=partition_starts,
+        cfg=cfg,
+        workers=workers,
+    )
+
+    # Whether a row has enough history does not depend on the metric.
+    rows = np.flatnonzero(outputs[0, STAT_COLS.index("keep")])
+    gid = (np.cumsum(starts) - 1)[rows]
+    kept_starts = np.r_[True, gid[1:] != gid[:-1]] if len(rows) else np.zeros(0, dtype=bool)
+    pos = run_positions(kept_starts)
+    gid = np.cumsum(kept_starts) - 1
+
+    stat = {c: j for j, c in enumerate(STAT_COLS)}
+    lead = np.full(len(rows), np.nan)
+    if lead_metric in metric_cols and len(rows):
+        m = outputs[metric_cols.index(lead_metric)]
+        lead = group_lead_times(
+            gid,
+            pos,
+            baseline_mean=m[stat["baseline_mean"], rows],
+            recent_mean=m[stat["recent_mean"], rows],
+            index=m[stat["trend_index"], rows],
+        )[gid]
+
+    keys = panel.select(group_cols + [week_col]).take(pa.array(rows))
+    blocks = []
+    for i, metric in enumerate(metric_cols):
+        cols = {c: keys.column(c) for c in keys.column_names}
+        cols["metric"] = pa.repeat(metric, len(rows))
+        for c in STAT_COLS[1:]:
+            values = outputs[i, stat[c], rows]
+            cols[c] = pa.array(values.astype(bool) if c in BOOL_COLS else values, from_pandas=True)
+        trend = outputs[i, stat["trend_index"], rows]
+        peak_recent = grouped_rolling_max(trend, pos, window=FATIGUE_WINDOW)
+        cols["is_fatiguing"] = pa.array(
+            (trend <= cfg.fatiguing_threshold) & (peak_recent >= cfg.emerging_threshold)
+        )
+        cols["lead_time_weeks"] = pa.array(lead, from_pandas=True)
+        blocks.append(pa.table(cols))
+    return pa.concat_tables(blocks)
+
+
+def copied_columns(panel: pa.Table, names: list[str]) -> list[str]:
+    """The columns of ``names`` that scoring has to copy out of ``panel`` instead of viewing."""
+    copied = []
+    for name in names:
+        col, values = panel.column(name), _float_column(panel, name)
+        data = col.chunk(0).buffers()[1] if col.num_chunks == 1 else None
+        if data is None or not data.address <= values.ctypes.data < data.address + data.size:
+            copied.append(name)
+    return copied
+
+
+def _float_column(panel: pa.Table, name: str) -> np.ndarray:
+    """A numeric column as float64 NumPy; a view when it is one null-free float64 chunk."""
+    return np.asarray(panel.column(name).to_numpy(), dtype=np.float64)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from fashion_trends.analytics.trend_index import ENGINES, group_positions, grouped_rolling_mean
+
 
 def baseline_trigger_week(series: pd.Series, *, window: int = 8, threshold: float = 0.02) -> int | None:
     """Naive baseline: 8-week moving average crosses a threshold."""
@@ -23,6 +25,130 @@ def compute_lead_time_weeks(
     metric: str = "conversion_rate",
     index_col: str = "trend_index",
     week_col: str = "week_start",
+    engine: str = "vectorized",
+    baseline_window: int = 8,
+    index_threshold: float = 1.5,
+) -> pd.DataFrame:
+    """Weeks by which the trend index fires before the naive moving-average baseline, per group.
+
+    The baseline fires when the ``baseline_window``-week moving average of ``recent_mean`` crosses
+    the group's median ``baseline_mean`` + 0.005, the index when it reaches ``index_threshold``.
+    The ``vectorized`` engine finds both first crossings for all groups at once; ``loop`` is the
+    original per-group implementation built on the two ``*_trigger_week`` helpers.
+    """
+    if engine == "loop":
+        return _compute_lead_time_weeks_loop(
+            index_df,
+            group_cols=group_cols,
+            metric=metric,
+            index_col=index_col,
+            week_col=week_col,
+            baseline_window=baseline_window,
+            index_threshold=index_threshold,
+        )
+    if engine != "vectorized":
+        raise ValueError(f"Unknown trend index engine {engine!r}; expected one of {ENGINES}.")
+
+    df = index_df[index_df["metric"] == metric].dropna(subset=group_cols)
+    if df.empty:
+        return pd.DataFrame()
+
+    df = df.sort_values(group_cols + [week_col]).reset_index(drop=True)
+    pos = group_positions(df, group_cols)
+    gid = np.cumsum(pos == 0) - 1
+
+    lead = group_lead_times(
+        gid,
+        pos,
+        baseline_mean=df["baseline_mean"].astype(float).to_numpy(),
+        recent_mean=df["recent_mean"].astype(float).to_numpy(),
+        index=df[index_col].astype(float).to_numpy(),
+        baseline_window=baseline_window,
+        index_threshold=index_threshold,
+    )
+    hit = ~np.isnan(lead)
+    if not hit.any():
+        return pd.DataFrame()
+    out = df.loc[np.flatnonzero(pos == 0)[hit], group_cols].reset_index(drop=True)
+    out["lead_time_weeks"] = lead[hit].astype(int)
+    return out
+
+
+def group_lead_times(
+    gid: np.ndarray,
+    pos: np.ndarray,
+    *,
+    baseline_mean: np.ndarray,
+    recent_mean: np.ndarray,
+    index: np.ndarray,
+    baseline_window: int = 8,
+    index_threshold: float = 1.5,
+) -> np.ndarray:
+    """Lead time in weeks per group of a group + week sorted index (NaN if a trigger never fires).
+
+    ``gid`` numbers the groups 0, 1, ... in row order and ``pos`` is each row's position within
+    its group; the other arrays are the index columns of the same rows.
+    """
+    baseline_w = baseline_crossings(
+        gid,
+        pos,
+        baseline_mean=baseline_mean,
+        recent_mean=recent_mean,
+        baseline_window=baseline_window,
+    )
+    index_w = first_crossing(gid, index >= index_threshold, pos)
+    hit = (baseline_w >= 0) & (index_w >= 0)
+    return np.where(hit, baseline_w - index_w, np.nan)
+
+
+def baseline_crossings(
+    gid: np.ndarray,
+    pos: np.ndarray,
+    *,
+    baseline_mean: np.ndarray,
+    recent_mean: np.ndarray,
+    baseline_window: int = 8,
+) -> np.ndarray:
+    """In-group position where the naive moving-average baseline first fires (-1 if never)."""
+    n_groups = int(gid[-1]) + 1 if len(gid) else 0
+    thresh = _grouped_nanmedian(baseline_mean, gid, n_groups) + 0.005
+    recent_ma = grouped_rolling_mean(recent_mean, pos, window=baseline_window)
+    return first_crossing(gid, recent_ma >= thresh[gid], pos)
+
+
+def _grouped_nanmedian(values: np.ndarray, gid: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of the non-NaN ``values`` of every group (NaN for groups without any)."""
+    ok = ~np.isnan(values)
+    g, v = gid[ok], values[ok]
+    order = np.lexsort((v, g))
+    v = v[order]
+    counts = np.bincount(g, minlength=n_groups)
+    first = np.cumsum(counts) - counts
+    out = np.full(n_groups, np.nan)
+    has = counts > 0
+    lo, hi = (first + (counts - 1) // 2)[has], (first + counts // 2)[has]
+    out[has] = (v[lo] + v[hi]) / 2
+    return out
+
+
+def first_crossing(gid: np.ndarray, cond: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """In-group position of the first row where ``cond`` holds, per group (-1 if never)."""
+    first = np.full(int(gid[-1]) + 1 if len(gid) else 0, -1, dtype=np.int64)
+    hits = np.flatnonzero(cond)
+    groups, idx = np.unique(gid[hits], return_index=True)
+    first[groups] = pos[hits[idx]]
+    return first
+
+
+def _compute_lead_time_weeks_loop(
+    index_df: pd.DataFrame,
+    *,
+    group_cols: list[str],
+    metric: str = "conversion_rate",
+    index_col: str = "trend_index",
+    week_col: str = "week_start",
+    baseline_window: int = 8,
+    index_threshold: float = 1.5,
 ) -> pd.DataFrame:
     df = index_df[index_df["metric"] == metric].copy()
     if df.empty:
@@ -33,8 +159,10 @@ def compute_lead_time_weeks(
     for keys, g in df.groupby(group_cols, sort=False):
         g = g.sort_values(week_col)
         thresh = float(g["baseline_mean"].median() + 0.005)
-        baseline_w = baseline_trigger_week(g["recent_mean"], threshold=thresh)
-        index_w = trend_index_trigger_week(g[index_col], threshold=1.5)
+        baseline_w = baseline_trigger_week(
+            g["recent_mean"], window=baseline_window, threshold=thresh
+        )
+        index_w = trend_index_trigger_week(g[index_col], threshold=index_threshold)
         if baseline_w is None or index_w is None:
             continue
         out.append(
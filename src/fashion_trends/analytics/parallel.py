@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from fashion_trends.analytics.trend_index import (
+    TrendIndexConfig,
+    group_positions,
+    scored_frame,
+    sorted_panel,
+    trend_stats,
+)
+
+# Per-row outputs of trend_stats, in the order they are laid out in the shared output block.
+STAT_COLS = [
+    "keep", "baseline_mean", "baseline_std", "recent_mean",
+    "momentum_z", "accel_z", "trend_index", "traffic_sessions", "is_emerging",
+]
+BOOL_COLS = {"keep", "is_emerging"}
+# Partitions per worker, so one large partition does not leave the other workers idle.
+PARTITIONS_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class _Partition:
+    """One contiguous, group-aligned row range of the shared panel."""
+    in_name: str
+    out_name: str
+    n_rows: int
+    n_metrics: int
+    start: int
+    stop: int
+    cfg: TrendIndexConfig
+
+
+def compute_trend_indices(
+    df: pd.DataFrame,
+    *,
+    metric_cols: list[str],
+    volume_col: str = "traffic_sessions",
+    group_cols: list[str],
+    week_col: str = "week_start",
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    workers: int = 1,
+) -> pd.DataFrame:
+    """Trend indices for several metrics in one pass, optionally spread over a process pool.
+
+    The panel is sorted once and cut into contiguous row ranges on ``group_cols[0]`` (style_id)
+    boundaries. Workers read the numeric columns from, and write their scores to, shared memory
+    blocks, so no DataFrame is pickled. The result equals concatenating ``compute_trend_index``
+    over ``metric_cols`` and does not depend on ``workers``.
+    """
+    work = sorted_panel(
+        df, group_cols=group_cols, week_col=week_col, value_cols=metric_cols + [volume_col]
+    )
+    outputs = score_panel(
+        [work[m].astype(float).to_numpy() for m in metric_cols],
+        work[volume_col].astype(float).to_numpy(),
+        group_positions(work, group_cols),
+        partition_starts=_run_starts(work[group_cols[0]].to_numpy()),
+        cfg=cfg,
+        workers=workers,
+    )
+
+    frames = []
+    for i, m in enumerate(metric_cols):
+        stats = {
+            c: outputs[i, j].astype(bool) if c in BOOL_COLS else outputs[i, j]
+            for j, c in enumerate(STAT_COLS)
+        }
+        frames.append(scored_frame(work, stats, metric=m, group_cols=group_cols, week_col=week_col))
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_panel(
+    metrics: list[np.ndarray],
+    volume: np.ndarray,
+    pos: np.ndarray,
+    *,
+    partition_starts: np.ndarray,
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    workers: int = 1,
+) -> np.ndarray:
+    """``trend_stats`` of each metric of a group-sorted panel, as a (metric, STAT_COLS, row) block.
+
+    ``partition_starts`` flags the rows where a new partition key (style_id) begins; with
+    ``workers`` > 1 the rows are scored in contiguous ranges that never split a partition.
+    """
+    n, k = len(pos), len(metrics)
+    bounds = _partition_bounds(partition_starts, max(1, workers or os.cpu_count() or 1))
+    workers = min(max(1, workers or os.cpu_count() or 1), len(bounds))
+    if workers > 1:
+        return _score_shared(metrics, volume, pos, bounds, cfg, workers)
+    outputs = np.empty((k, len(STAT_COLS), n))
+    for i, y in enumerate(metrics):
+        stats = trend_stats(y, volume, pos, cfg)
+        for j, c in enumerate(STAT_COLS):
+            outputs[i, j] = stats[c]
+    return outputs
+
+
+def _run_starts(key: np.ndarray) -> np.ndarray:
+    return np.r_[True, key[1:] != key[:-1]] if len(key) else np.zeros(0, dtype=bool)
+
+
+def _partition_bounds(starts: np.ndarray, workers: int) -> list[tuple[int, int]]:
+    """Contiguous row ranges that never split a partition key, balanced by row count."""
+    n = len(starts)
+    first_rows = np.flatnonzero(starts) if n else np.array([0])
+    target = max(1, n // (workers * PARTITIONS_PER_WORKER))
+    bounds, lo = [], 0
+    for s in first_rows[1:]:
+        if s - lo >= target:
+            bounds.append((lo, int(s)))
+            lo = int(s)
+    bounds.append((lo, n))
+    return bounds
+
+
+def _score_rows(
+    inputs: np.ndarray, outputs: np.ndarray, start: int, stop: int, cfg: TrendIndexConfig
+) -> None:
+    k = outputs.shape[0]
+    vol, pos = inputs[k, start:stop], inputs[k + 1, start:stop]
+    for i in range(k):
+        stats = trend_stats(inputs[i, start:stop], vol, pos, cfg)
+        for j, c in enumerate(STAT_COLS):
+            outputs[i, j, start:stop] = stats[c]
+
+
+def _score_partition(part: _Partition) -> None:
+    shm_in, shm_out = SharedMemory(name=part.in_name), SharedMemory(name=part.out_name)
+    try:
+        inputs = np.ndarray(
+            (part.n_metrics + 2, part.n_rows), dtype=np.float64, buffer=shm_in.buf
+        )
+        outputs = np.ndarray(
+            (part.n_metrics, len(STAT_COLS), part.n_rows), dtype=np.float64, buffer=shm_out.buf
+        )
+        _score_rows(inputs, outputs, part.start, part.stop, part.cfg)
+        del inputs, outputs
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+
+def _score_shared(
+    metrics: list[np.ndarray],
+    volume: np.ndarray,
+    pos: np.ndarray,
+    bounds: list[tuple[int, int]],
+    cfg: TrendIndexConfig,
+    workers: int,
+) -> np.ndarray:
+    n, k = len(pos), len(metrics)
+    in_shape, out_shape = (k + 2, n), (k, len(STAT_COLS), n)
+    shm_in = SharedMemory(create=True, size=max(1, int(np.prod(in_shape)) * 8))
+    shm_out = SharedMemory(create=True, size=max(1, int(np.prod(out_shape)) * 8))
+    try:
+        # Rows of the input block: one per metric, then volume, then in-group position.
+        inputs = np.ndarray(in_shape, dtype=np.float64, buffer=shm_in.buf)
+        for i, y in enumerate(metrics):
+            inputs[i] = y
+        inputs[k] = volume
+        inputs[k + 1] = pos
+        del inputs
+        parts = [_Partition(shm_in.name, shm_out.name, n, k, lo, hi, cfg) for lo, hi in bounds]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            list(pool.map(_score_partition, parts))
+        return np.ndarray(out_shape, dtype=np.float64, buffer=shm_out.buf).copy()
+    finally:
+        shm_in.close()
+        shm_in.unlink()
+        shm_out.close()
+        shm_out.unlink()
@@ -0,0 +1,290 @@
+"""Parameter sweeps of the trend index and its backtest over one style panel.
+
+``trend_stats`` loops over every lag of its windows, once per configuration. A sweep prepares the
+group + week sorted series once instead (``SweepPanel``): per-group prefix sums of the metric, its
+square, its in-group position times the metric and its NaN count. Any baseline, recent or slope
+window is then a few O(rows) gathers, and configurations that share their windows (the grid is
+evaluated in window order) only re-blend the z-scores. With ``workers`` > 1 the configurations are
+scored on a process pool whose workers map the prepared block from shared memory, so it is built
+and copied once regardless of the grid size.
+
+Each configuration is scored against the style groups flagged as ``positive`` (the buckets
+``generate_data`` injects as emerging): hit rate, false-positive rate and the lead time of the
+index over the moving-average baseline (see ``backtest.group_lead_times``).
+"""
+from __future__ import annotations
+
+import itertools
+import os
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from fashion_trends.analytics.backtest import baseline_crossings, first_crossing
+from fashion_trends.analytics.trend_index import TrendIndexConfig, run_positions
+
+# Rows of a prepared panel block, each one value per panel row.
+PANEL_ROWS = (
+    "group_mean", "volume", "pos", "positive", "count", "sum", "sum_sq", "sum_pos", "nan_count",
+)
+RESULT_COLS = [
+    "flagged_groups", "hit_rate", "false_positive_rate", "score",
+    "mean_lead_time_weeks", "median_lead_time_weeks", "lead_time_groups",
+]
+# Configurations per pool task, per worker (smaller tasks balance the load, larger ones reuse more
+# window statistics).
+TASKS_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class SweepParams:
+    """One point of the grid: an index configuration plus the backtest's moving-average window."""
+
+    cfg: TrendIndexConfig
+    lead_window: int = 8
+
+    def as_row(self) -> dict[str, object]:
+        return {**asdict(self.cfg), "lead_window": self.lead_window}
+
+
+def parameter_grid(*, lead_window: Sequence[int] = (8,), **values: Sequence) -> list[SweepParams]:
+    """Every combination of the given ``TrendIndexConfig`` field values and ``lead_window``s.
+
+    Fields that are not given keep their defaults, e.g.
+    ``parameter_grid(baseline_weeks=[8, 12], emerging_threshold=[1.25, 1.5])`` has 4 points.
+    """
+    names = {f.name for f in fields(TrendIndexConfig)}
+    unknown = sorted(set(values) - names)
+    if unknown:
+        raise ValueError(
+            f"Unknown TrendIndexConfig field(s) {unknown}; expected some of {sorted(names)}."
+        )
+    keys = list(values)
+    return [
+        SweepParams(TrendIndexConfig(**dict(zip(keys, combo, strict=True))), lead_window=w)
+        for combo in itertools.product(*(values[k] for k in keys))
+        for w in lead_window
+    ]
+
+
+class SweepPanel:
+    """A group + week sorted metric series prepared once for every configuration of a sweep."""
+
+    def __init__(self, block: np.ndarray):
+        self.block = block
+        self.n = block.shape[1]
+        for i, name in enumerate(PANEL_ROWS):
+            setattr(self, name, block[i])
+        self.pos = self.pos.astype(np.int64)
+        self.group_start = np.arange(self.n) - self.pos
+        self.gid = np.cumsum(self.pos == 0) - 1
+        self.n_groups = int(self.gid[-1]) + 1 if self.n else 0
+        self.group_positive = self.positive[self.pos == 0] > 0
+        self._cache: dict = {}
+
+    @classmethod
+    def prepare(
+        cls, y: np.ndarray, volume: np.ndarray, pos: np.ndarray, positive: np.ndarray
+    ) -> SweepPanel:
+        """``y`` and ``volume`` per row of a group + week sorted panel, ``pos`` each row's position
+        within its group and ``positive`` whether its group is a known emerging bucket."""
+        n = len(y)
+        y = np.asarray(y, dtype=np.float64)
+        pos = np.asarray(pos, dtype=np.int64)
+        gid = np.cumsum(pos == 0) - 1
+        ok = ~np.isnan(y)
+        n_groups = int(gid[-1]) + 1 if n else 0
+        # Sums are taken around each group's mean and restart at every group, so their magnitudes
+        # (and rounding errors) stay those of one group's values.
+        counts = np.bincount(gid[ok], minlength=n_groups)
+        totals = np.bincount(gid[ok], weights=y[ok], minlength=n_groups)
+        group_mean = (totals / np.maximum(counts, 1))[gid]
+        centered = np.where(ok, y - group_mean, 0.0)
+
+        block = np.zeros((len(PANEL_ROWS), n))
+        block[0] = group_mean
+        block[1] = volume
+        block[2] = pos
+        block[3] = positive
+        grid = np.zeros((n_groups, int(pos.max()) + 1 if n else 0))
+        sums = (ok, centered, centered * centered, pos * centered, ~ok)
+        for i, values in enumerate(sums, start=4):
+            grid[gid, pos] = values
+            block[i] = np.cumsum(grid, axis=1)[gid, pos]
+            grid[gid, pos] = 0.0
+        return cls(block)
+
+    def window(self, lo: int, hi: int) -> tuple[np.ndarray, ...]:
+        """(count, sum, sum of squares, position-weighted sum, NaN count, rows) over lags ``lo..hi``
+        of each row's own group; sums are of the group-centered metric."""
+        i = np.arange(self.n)
+        a = np.maximum(i - hi, self.group_start)
+        b = i - lo
+        valid = b >= a
+        before = np.where(valid & (a > self.group_start), a - 1, -1)
+        b = np.where(valid, b, -1)
+        out = []
+        for p in (self.count, self.sum, self.sum_sq, self.sum_pos, self.nan_count):
+            out.append(np.where(b >= 0, p[b], 0.0) - np.where(before >= 0, p[before], 0.0))
+        return (*out, np.where(valid, b - a + 1, 0).astype(float))
+
+    def stats(self, cfg: TrendIndexConfig) -> dict[str, np.ndarray]:
+        """``trend_stats`` of the prepared series (the subset of its columns a backtest reads)."""
+        z = self._zscores(cfg)
+        index = cfg.momentum_weight * z["momentum_z"] + cfg.accel_weight * z["accel_z"]
+        return {
+            "keep": z["keep"],
+            "baseline_mean": z["baseline_mean"],
+            "baseline_std": z["baseline_std"],
+            "recent_mean": z["recent_mean"],
+            "trend_index": index,
+            "is_emerging": (index >= cfg.emerging_threshold) & (self.volume >= cfg.min_sessions),
+        }
+
+    def _zscores(self, cfg: TrendIndexConfig) -> dict[str, np.ndarray]:
+        """Window statistics of ``cfg``, reused while consecutive configurations share them."""
+        key = _window_key(cfg)
+        if self._cache.get("key") == key:
+            return self._cache["z"]
+        b, e = cfg.baseline_weeks, cfg.exclude_recent_weeks
+        baseline_end = self.pos - e
+        baseline_len = baseline_end - np.maximum(0, self.pos - (b + e) + 1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cnt, s1, s2, _, _, _ = self.window(e + 1, b + e - 1)
+            baseline_c = np.where(cnt > 0, s1 / cnt, np.nan)
+            ssd = np.maximum(s2 - s1 * baseline_c, 0.0)
+            dof = cnt - np.where(baseline_len >= 3, 1, 0)
+            baseline_std = np.where(dof > 0, np.sqrt(ssd / dof), np.nan)
+
+            cnt, s1, _, _, _, _ = self.window(0, cfg.recent_weeks - 1)
+            recent_c = np.where(cnt > 0, s1 / cnt, np.nan)
+
+            _, s1, _, sp, nans, m = self.window(0, cfg.slope_weeks - 1)
+            xbar = self.pos - (m - 1.0) / 2.0
+            slope = np.where(nans > 0, np.nan, (sp - xbar * s1) / (m * (m * m - 1.0) / 12.0))
+            slope = np.where(m < 2, 0.0, slope)
+
+            z = {
+                "keep": (baseline_len > 0) & (baseline_end > 1),
+                "baseline_mean": baseline_c + self.group_mean,
+                "baseline_std": baseline_std,
+                "recent_mean": recent_c + self.group_mean,
+                "momentum_z": np.where(
+                    baseline_std <= 1e-9, 0.0, (recent_c - baseline_c) / baseline_std
+                ),
+                "accel_z": np.where(baseline_std <= 1e-9, 0.0, slope / baseline_std),
+            }
+        self._cache = {"key": key, "z": z, "baseline": {}}
+        return z
+
+    def evaluate(self, params: SweepParams) -> dict[str, float]:
+        """Hit rate, false-positive rate and lead times of one configuration."""
+        cfg = params.cfg
+        stats = self.stats(cfg)
+        keep = stats["keep"]
+        flagged = np.zeros(self.n_groups, dtype=bool)
+        flagged[self.gid[keep & stats["is_emerging"]]] = True
+        positive = self.group_positive
+        n_pos, n_neg = int(positive.sum()), int((~positive).sum())
+
+        # Lead times are measured over the scored rows of each group, as in the index table.
+        rows = np.flatnonzero(keep)
+        lead = np.zeros(0)
+        if len(rows):
+            gid = self.gid[rows]
+            starts = np.r_[True, gid[1:] != gid[:-1]]
+            kept_gid = np.cumsum(starts) - 1
+            pos = run_positions(starts)
+            baseline = self._cache["baseline"]
+            if params.lead_window not in baseline:
+                baseline[params.lead_window] = baseline_crossings(
+                    kept_gid,
+                    pos,
+                    baseline_mean=stats["baseline_mean"][rows],
+                    recent_mean=stats["recent_mean"][rows],
+                    baseline_window=params.lead_window,
+                )
+            baseline_w = baseline[params.lead_window]
+            emerging = stats["trend_index"][rows] >= cfg.emerging_threshold
+            index_w = first_crossing(kept_gid, emerging, pos)
+            fired = (baseline_w >= 0) & (index_w >= 0) & positive[gid[starts]]
+            lead = (baseline_w - index_w)[fired].astype(float)
+
+        hit_rate = (flagged & positive).sum() / n_pos if n_pos else np.nan
+        fp_rate = (flagged & ~positive).sum() / n_neg if n_neg else np.nan
+        return {
+            "flagged_groups": int(flagged.sum()),
+            "hit_rate": float(hit_rate),
+            "false_positive_rate": float(fp_rate),
+            "score": float(hit_rate - fp_rate),
+            "mean_lead_time_weeks": float(lead.mean()) if len(lead) else np.nan,
+            "median_lead_time_weeks": float(np.median(lead)) if len(lead) else np.nan,
+            "lead_time_groups": len(lead),
+        }
+
+
+def _window_key(cfg: TrendIndexConfig) -> tuple[int, int, int, int]:
+    return cfg.baseline_weeks, cfg.exclude_recent_weeks, cfg.recent_weeks, cfg.slope_weeks
+
+
+def run_sweep(panel: SweepPanel, grid: Sequence[SweepParams], *, workers: int = 1) -> pd.DataFrame:
+    """One row per configuration of ``grid`` (its parameters and ``RESULT_COLS``), in grid order.
+
+    ``workers`` > 1 evaluates the configurations on a process pool (0 = one per CPU core); the
+    result does not depend on it.
+    """
+    workers = min(max(1, workers or os.cpu_count() or 1), max(1, len(grid)))
+    # Configurations sharing their windows are evaluated back to back, reusing their statistics.
+    order = sorted(range(len(grid)), key=lambda i: _window_key(grid[i].cfg))
+    ordered = [grid[i] for i in order]
+    if workers == 1:
+        evaluated = [panel.evaluate(p) for p in ordered]
+    else:
+        evaluated = _run_shared(panel, ordered, workers)
+    results: list[dict[str, float]] = [{}] * len(grid)
+    for i, r in zip(order, evaluated, strict=True):
+        results[i] = r
+    rows = [{**p.as_row(), **r} for p, r in zip(grid, results, strict=True)]
+    return pd.DataFrame(rows, columns=_columns())
+
+
+def _columns() -> list[str]:
+    return [f.name for f in fields(TrendIndexConfig)] + ["lead_window"] + RESULT_COLS
+
+
+@dataclass(frozen=True)
+class _Task:
+    shm_name: str
+    shape: tuple[int, int]
+    params: list[SweepParams]
+
+
+def _evaluate_task(task: _Task) -> list[dict[str, float]]:
+    shm = SharedMemory(name=task.shm_name)
+    try:
+        panel = SweepPanel(np.ndarray(task.shape, dtype=np.float64, buffer=shm.buf))
+        out = [panel.evaluate(p) for p in task.params]
+        del panel
+        return out
+    finally:
+        shm.close()
+
+
+def _run_shared(panel: SweepPanel, grid: list[SweepParams], workers: int) -> list[dict[str, float]]:
+    shape = panel.block.shape
+    shm = SharedMemory(create=True, size=max(1, panel.block.nbytes))
+    try:
+        np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[:] = panel.block
+        chunks = np.array_split(np.arange(len(grid)), min(len(grid), workers * TASKS_PER_WORKER))
+        tasks = [_Task(shm.name, shape, [grid[i] for i in chunk]) for chunk in chunks]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            return [r for results in pool.map(_evaluate_task, tasks) for r in results]
+    finally:
+        shm.close()
+        shm.unlink()
@@ -14,6 +14,12 @@ class TrendIndexConfig:
     min_sessions: int = 250
     emerging_threshold: float = 1.5
     fatiguing_threshold: float = -1.0
+    # Weight of the momentum z-score in the index; the acceleration z-score gets the rest.
+    momentum_weight: float = 0.65
+
+    @property
+    def accel_weight(self) -> float:
+        return 1.0 - self.momentum_weight
 
 
 def _zscore(delta: float, baseline_std: float) -> float:
@@ -34,6 +40,11 @@ def _slope(y: np.ndarray) -> float:
     return float((x * y).sum() / denom)
 
 
+ENGINES = ("vectorized", "loop")
+# mark_fatigue looks back over a 12-row window per group + metric.
+FATIGUE_WINDOW = 12
+
+
 def compute_trend_index(
     df: pd.DataFrame,
     *,
@@ -42,8 +53,187 @@ def compute_trend_index(
     group_cols: list[str],
     week_col: str = "week_start",
     cfg: TrendIndexConfig = TrendIndexConfig(),
+    engine: str = "vectorized",
+) -> pd.DataFrame:
+    """Computes a z-like trend index per group using momentum + acceleration.
+
+    The default ``vectorized`` engine evaluates every group at once over the sorted panel;
+    ``loop`` is the original per-group implementation, kept as the reference.
+    """
+    if engine == "loop":
+        return _compute_trend_index_loop(
+            df,
+            metric_col=metric_col,
+            volume_col=volume_col,
+            group_cols=group_cols,
+            week_col=week_col,
+            cfg=cfg,
+        )
+    if engine != "vectorized":
+        raise ValueError(f"Unknown trend index engine {engine!r}; expected one of {ENGINES}.")
+
+    work = sorted_panel(
+        df, group_cols=group_cols, week_col=week_col, value_cols=[metric_col, volume_col]
+    )
+    pos = group_positions(work, group_cols)
+    y = work[metric_col].astype(float).to_numpy()
+    vol = work[volume_col].astype(float).to_numpy()
+    stats = trend_stats(y, vol, pos, cfg)
+    return scored_frame(work, stats, metric=metric_col, group_cols=group_cols, week_col=week_col)
+
+
+def sorted_panel(
+    df: pd.DataFrame, *, group_cols: list[str], week_col: str, value_cols: list[str]
+) -> pd.DataFrame:
+    """Projects the index's columns, drops rows without a full group key, sorts by group + week."""
+    work = df[list(dict.fromkeys(group_cols + [week_col] + value_cols))].dropna(subset=group_cols)
+    work[week_col] = pd.to_datetime(work[week_col])
+    return work.sort_values(group_cols + [week_col]).reset_index(drop=True)
+
+
+def scored_frame(
+    work: pd.DataFrame,
+    stats: dict[str, np.ndarray],
+    *,
+    metric: str,
+    group_cols: list[str],
+    week_col: str,
+) -> pd.DataFrame:
+    """Output rows of ``compute_trend_index`` from ``trend_stats`` arrays over the sorted panel."""
+    keep = stats["keep"]
+    out = work.loc[keep, group_cols + [week_col]].reset_index(drop=True)
+    out["metric"] = metric
+    for col, values in stats.items():
+        if col != "keep":
+            out[col] = values[keep]
+    return out
+
+
+def group_positions(sorted_df: pd.DataFrame, group_cols: list[str]) -> np.ndarray:
+    """0-based row position of every row within its group; ``sorted_df`` must be sorted by group."""
+    n = len(sorted_df)
+    starts = np.zeros(n, dtype=bool)
+    if n:
+        starts[0] = True
+        for c in group_cols:
+            v = sorted_df[c].to_numpy()
+            starts[1:] |= v[1:] != v[:-1]
+    return run_positions(starts)
+
+
+def run_positions(starts: np.ndarray) -> np.ndarray:
+    """0-based position of each row within its run; ``starts`` flags the first row of each run."""
+    start_idx = np.flatnonzero(starts)
+    return np.arange(len(starts)) - start_idx[np.cumsum(starts) - 1]
+
+
+def _lag(a: np.ndarray, k: int) -> np.ndarray:
+    if k == 0:
+        return a
+    out = np.empty_like(a)
+    out[:k] = np.nan
+    out[k:] = a[:-k]
+    return out
+
+
+def _window_mean(y: np.ndarray, pos: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """np.nanmean over rows ``i-hi .. i-lo`` of each row's own group."""
+    total = np.zeros(len(y))
+    count = np.zeros(len(y))
+    for k in range(hi, lo - 1, -1):
+        v = _lag(y, k)
+        ok = (pos >= k) & ~np.isnan(v)
+        total += np.where(ok, v, 0.0)
+        count += ok
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _window_std(
+    y: np.ndarray, pos: np.ndarray, lo: int, hi: int, mean: np.ndarray, ddof: np.ndarray
+) -> np.ndarray:
+    """np.nanstd (per-row ``ddof``) over rows ``i-hi .. i-lo`` of each row's own group."""
+    ssd = np.zeros(len(y))
+    count = np.zeros(len(y))
+    for k in range(hi, lo - 1, -1):
+        v = _lag(y, k)
+        ok = (pos >= k) & ~np.isnan(v)
+        d = np.where(ok, v - mean, 0.0)
+        ssd += d * d
+        count += ok
+    dof = count - ddof
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(dof > 0, np.sqrt(ssd / dof), np.nan)
+
+
+def _window_slope(y: np.ndarray, pos: np.ndarray, weeks: int) -> np.ndarray:
+    """Vectorized ``_slope`` over the trailing ``weeks`` rows (NaN if any value is NaN)."""
+    m = np.minimum(weeks, pos + 1).astype(float)
+    ysum = np.zeros(len(y))
+    for k in range(weeks - 1, -1, -1):
+        ysum += np.where(k < m, _lag(y, k), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ybar = ysum / m
+        num = np.zeros(len(y))
+        for k in range(weeks - 1, -1, -1):
+            x = (m - 1.0) / 2.0 - k
+            num += np.where(k < m, x * (_lag(y, k) - ybar), 0.0)
+        slope = num / (m * (m * m - 1.0) / 12.0)
+    return np.where(m < 2, 0.0, slope)
+
+
+def _zscore_arr(delta: np.ndarray, baseline_std: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(baseline_std <= 1e-9, 0.0, delta / baseline_std)
+
+
+def trend_stats(
+    y: np.ndarray, vol: np.ndarray, pos: np.ndarray, cfg: TrendIndexConfig
+) -> dict[str, np.ndarray]:
+    """Baseline/recent/slope statistics and the trend index for every row of a group-sorted panel.
+
+    ``pos`` is each row's position within its group (see ``group_positions``). Returns one array
+    per output column plus a boolean ``keep`` mask for rows with enough history to be scored.
+    """
+    b, e = cfg.baseline_weeks, cfg.exclude_recent_weeks
+    baseline_end = pos - e
+    hist_start = np.maximum(0, pos - (b + e) + 1)
+    baseline_len = baseline_end - hist_start
+    keep = (baseline_len > 0) & (baseline_end > 1)
+
+    baseline_mean = _window_mean(y, pos, e + 1, b + e - 1)
+    ddof = np.where(baseline_len >= 3, 1, 0)
+    baseline_std = _window_std(y, pos, e + 1, b + e - 1, baseline_mean, ddof)
+    recent_mean = _window_mean(y, pos, 0, cfg.recent_weeks - 1)
+
+    momentum = _zscore_arr(recent_mean - baseline_mean, baseline_std)
+    accel = _zscore_arr(_window_slope(y, pos, cfg.slope_weeks), baseline_std)
+    index = cfg.momentum_weight * momentum + cfg.accel_weight * accel
+    is_emerging = (index >= cfg.emerging_threshold) & (vol >= cfg.min_sessions)
+
+    return {
+        "keep": keep,
+        "baseline_mean": baseline_mean,
+        "baseline_std": baseline_std,
+        "recent_mean": recent_mean,
+        "momentum_z": momentum,
+        "accel_z": accel,
+        "trend_index": index,
+        "traffic_sessions": vol,
+        "is_emerging": is_emerging,
+    }
+
+
+def _compute_trend_index_loop(
+    df: pd.DataFrame,
+    *,
+    metric_col: str,
+    volume_col: str = "traffic_sessions",
+    group_cols: list[str],
+    week_col: str = "week_start",
+    cfg: TrendIndexConfig = TrendIndexConfig(),
 ) -> pd.DataFrame:
-    """Computes a z-like trend index per group using momentum + acceleration."""
+    """Reference implementation: walks every group and week in Python."""
     work = df.copy()
     work[week_col] = pd.to_datetime(work[week_col])
     work = work.sort_values(group_cols + [week_col])
@@ -74,7 +264,7 @@ def compute_trend_index(
             slope_start = max(0, i - cfg.slope_weeks + 1)
             accel = _zscore(_slope(y[slope_start : i + 1]), baseline_std)
 
-            index = 0.65 * momentum + 0.35 * accel
+            index = cfg.momentum_weight * momentum + cfg.accel_weight * accel
             is_emerging = (index >= cfg.emerging_threshold) and (vol[i] >= cfg.min_sessions)
 
             row = {c: v for c, v in zip(group_cols, keys if isinstance(keys, tuple) else (keys,))}
@@ -103,8 +293,55 @@ def mark_fatigue(
     group_cols: list[str],
     week_col: str = "week_start",
     cfg: TrendIndexConfig = TrendIndexConfig(),
+    engine: str = "vectorized",
 ) -> pd.DataFrame:
     """Marks fatigue if a style peaked recently and is now negative."""
+    if engine == "loop":
+        return _mark_fatigue_loop(index_df, group_cols=group_cols, week_col=week_col, cfg=cfg)
+    if engine != "vectorized":
+        raise ValueError(f"Unknown trend index engine {engine!r}; expected one of {ENGINES}.")
+    if index_df.empty:
+        index_df["is_fatiguing"] = False
+        return index_df
+
+    w = index_df.sort_values(group_cols + [week_col]).copy()
+    pos = group_positions(w, group_cols)
+    trend = w["trend_index"].astype(float).to_numpy()
+    peak_recent = grouped_rolling_max(trend, pos, window=FATIGUE_WINDOW)
+    fatigue = (trend <= cfg.fatiguing_threshold) & (peak_recent >= cfg.emerging_threshold)
+    w["is_fatiguing"] = fatigue & w[group_cols].notna().all(axis=1).to_numpy()
+    return w
+
+
+def grouped_rolling_max(values: np.ndarray, pos: np.ndarray, *, window: int) -> np.ndarray:
+    """NaN-skipping rolling max (``min_periods=1``) over each group's trailing ``window`` rows."""
+    peak = np.full(len(values), np.nan)
+    for k in range(window):
+        peak = np.fmax(peak, np.where(pos >= k, _lag(values, k), np.nan))
+    return peak
+
+
+def grouped_rolling_mean(values: np.ndarray, pos: np.ndarray, *, window: int) -> np.ndarray:
+    """Rolling mean with ``min_periods=window`` over the trailing ``window`` rows of each group."""
+    total = np.zeros(len(values))
+    count = np.zeros(len(values))
+    for k in range(window - 1, -1, -1):
+        v = _lag(values, k)
+        ok = (pos >= k) & ~np.isnan(v)
+        total += np.where(ok, v, 0.0)
+        count += ok
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count >= window, total / count, np.nan)
+
+
+def _mark_fatigue_loop(
+    index_df: pd.DataFrame,
+    *,
+    group_cols: list[str],
+    week_col: str = "week_start",
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+) -> pd.DataFrame:
+    """Reference implementation of ``mark_fatigue``: one rolling max per group."""
     if index_df.empty:
         index_df["is_fatiguing"] = False
         return index_df
@@ -113,7 +350,7 @@ def mark_fatigue(
     w["is_fatiguing"] = False
     for _, g in w.groupby(group_cols, sort=False):
         g = g.sort_values(week_col)
-        peak_recent = g["trend_index"].rolling(window=12, min_periods=1).max()
+        peak_recent = g["trend_index"].rolling(window=FATIGUE_WINDOW, min_periods=1).max()
         fatigue = (g["trend_index"] <= cfg.fatiguing_threshold) & (peak_recent >= cfg.emerging_threshold)
         w.loc[g.index, "is_fatiguing"] = fatigue.to_numpy()
     return w
@@ -0,0 +1,235 @@
+"""Scale-tiered pipeline benchmark behind the ``bench`` command.
+
+Each tier generates a deterministic dataset (fixed seed and end date) and times every pipeline
+stage on its own: generate, ingest, each SQL statement, loading the index panel, scoring it, the
+fatigue and lead-time passes, storing the index, the per-level indices and the Tableau export.
+Results are written as JSON and can be compared against a stored baseline, failing when a stage
+regresses beyond a tolerance.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+import duckdb
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends.analytics.arrow_index import compute_index_table, copied_columns
+from fashion_trends.analytics.backtest import compute_lead_time_weeks
+from fashion_trends.analytics.trend_index import TrendIndexConfig, mark_fatigue
+from fashion_trends.db import connect
+from fashion_trends.pipelines.compute_indices import (
+    KEY_COLS,
+    METRICS,
+    load_index_panel,
+    store_index_table,
+)
+from fashion_trends.pipelines.compute_level_indices import compute_and_store_level_indices
+from fashion_trends.pipelines.export_tableau import export_csvs
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import run_incremental, split_statements, statement_target
+from fashion_trends.settings import settings
+
+console = Console()
+
+BENCH_SEED = 7
+BENCH_END = date(2025, 6, 29)
+DEFAULT_TOLERANCE = 0.25
+# Stages faster than this (in baseline and current run) are never flagged: timer noise dominates.
+NOISE_FLOOR_SECONDS = 0.05
+
+
+@dataclass(frozen=True)
+class BenchTier:
+    days: int
+    n_users: int
+
+
+# "1x" is the Settings default dataset (DAYS=210, N_USERS=80000); "10x" has ten times the users.
+TIERS = {
+    "sample": BenchTier(days=42, n_users=2_000),
+    "1x": BenchTier(days=210, n_users=80_000),
+    "10x": BenchTier(days=210, n_users=800_000),
+}
+
+
+def run_benchmark(
+    tier: str | BenchTier,
+    *,
+    work_dir: Path | None = None,
+    sql_dir: Path = Path("sql"),
+    fmt: str = "csv",
+    repeat: int = 1,
+) -> dict:
+    """Runs the pipeline stage by stage ``repeat`` times; returns best-of seconds per stage."""
+    if isinstance(tier, str) and tier not in TIERS:
+        raise ValueError(f"Unknown tier {tier!r}; expected one of {list(TIERS)}.")
+    spec, name = (TIERS[tier], tier) if isinstance(tier, str) else (tier, "custom")
+    resources = settings.resources()
+    runs: list[dict[str, float]] = []
+    rows: dict[str, int] = {}
+    panel: dict[str, object] = {}
+    with tempfile.TemporaryDirectory(prefix="fashion-trends-bench-") as tmp:
+        base = work_dir or Path(tmp)
+        for i in range(repeat):
+            console.print(
+                f"[bold]Benchmark[/bold] tier={name} ({spec.days} days, {spec.n_users:,} users) "
+                f"run {i + 1}/{repeat}"
+            )
+            stages, rows, panel = _run_once(spec, base, sql_dir, fmt)
+            runs.append(stages)
+    return {
+        "tier": name,
+        "dataset": asdict(spec) | {"seed": BENCH_SEED, "end": BENCH_END.isoformat(), "format": fmt},
+        "repeat": repeat,
+        "stages": {stage: min(r[stage] for r in runs) for stage in runs[0]},
+        "rows": rows,
+        "panel": panel,
+        "environment": {
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "duckdb_threads": resources.threads,
+            "duckdb_memory_limit_mb": resources.memory_limit_bytes // 2**20,
+        },
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare_results(
+    current: dict,
+    baseline: dict,
+    *,
+    tolerance: float = DEFAULT_TOLERANCE,
+    noise_floor: float = NOISE_FLOOR_SECONDS,
+) -> list[str]:
+    """Prints current vs baseline seconds per stage; returns the stages that regressed.
+
+    A stage regresses when it is more than ``tolerance`` (a fraction) slower than the baseline
+    and more than ``noise_floor`` seconds slower in absolute terms.
+    """
+    t = Table(title=f"Benchmark vs baseline (tolerance {tolerance:.0%})")
+    for c in ["stage", "baseline_s", "current_s", "change", ""]:
+        t.add_column(c)
+    regressed = []
+    for stage in dict.fromkeys([*baseline["stages"], *current["stages"]]):
+        base, cur = baseline["stages"].get(stage), current["stages"].get(stage)
+        if base is None or cur is None:
+            note = "[dim]new[/dim]" if base is None else "[dim]removed[/dim]"
+            t.add_row(stage, _fmt(base), _fmt(cur), "", note)
+            continue
+        slow = cur > base * (1 + tolerance) and cur - base > noise_floor
+        if slow:
+            regressed.append(stage)
+        change = f"{cur / base - 1:+.0%}" if base > 0 else ""
+        t.add_row(stage, _fmt(base), _fmt(cur), change, "[red]REGRESSED[/red]" if slow else "")
+    console.print(t)
+    return regressed
+
+
+def write_results(results: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+def read_results(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def print_results(results: dict) -> None:
+    t = Table(title=f"Benchmark tier={results['tier']} {results['dataset']}")
+    for c in ["stage", "seconds"]:
+        t.add_column(c)
+    for stage, seconds in results["stages"].items():
+        t.add_row(stage, _fmt(seconds))
+    t.add_row("[bold]total[/bold]", _fmt(sum(results["stages"].values())))
+    console.print(t)
+
+
+def _run_once(
+    spec: BenchTier, base: Path, sql_dir: Path, fmt: str
+) -> tuple[dict[str, float], dict[str, int], dict[str, object]]:
+    raw_dir, export_dir, db_path = base / "raw", base / "exports", base / "bench.duckdb"
+    for stale in (db_path, db_path.with_suffix(".duckdb.wal")):
+        stale.unlink(missing_ok=True)
+    stages: dict[str, float] = {}
+
+    def timed(name: str, fn: Callable[[], object]) -> object:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        stages[name] = time.perf_counter() - t0
+        return result
+
+    cfg = GenConfig(
+        seed=BENCH_SEED,
+        days=spec.days,
+        n_users=spec.n_users,
+        out_dir=raw_dir,
+        fmt=fmt,
+        end=BENCH_END,
+    )
+    timed("generate", lambda: generate_synthetic_data(cfg))
+
+    con = connect(db_path)
+    try:
+        timed("ingest", lambda: ingest_raw_csvs(con, raw_dir))
+        for path in sorted(sql_dir.glob("*.sql")):
+            for i, stmt in enumerate(split_statements(path.read_text(encoding="utf-8"))):
+                text = stmt if isinstance(stmt, str) else stmt.statement
+                name = statement_target(text) or f"{path.name}#{i}"
+                timed(
+                    f"sql {name}", lambda stmt=stmt: run_incremental(con, [stmt], full_refresh=True)
+                )
+
+        index_cfg = TrendIndexConfig()
+        panel = timed("load_index_panel", lambda: load_index_panel(con))
+        idx = timed(
+            "compute_trend_index",
+            lambda: compute_index_table(
+                panel, metric_cols=METRICS, group_cols=KEY_COLS, cfg=index_cfg
+            ),
+        )
+        # A full rebuild derives fatigue and lead times inside compute_index_table; these are the
+        # pandas passes the incremental update still runs, timed over the whole index.
+        idx_df = idx.to_pandas()
+        timed(
+            "mark_fatigue",
+            lambda: mark_fatigue(idx_df, group_cols=KEY_COLS + ["metric"], cfg=index_cfg),
+        )
+        timed(
+            "compute_lead_time_weeks",
+            lambda: compute_lead_time_weeks(idx_df, group_cols=KEY_COLS, metric="conversion_rate"),
+        )
+        timed("store_index", lambda: store_index_table(con, idx))
+        timed("level_indices", lambda: compute_and_store_level_indices(con))
+        timed("export", lambda: export_csvs(con, export_dir, force=True))
+
+        rows = {
+            "web_events": con.execute("SELECT COUNT(*) FROM raw.web_events").fetchone()[0],
+            "mart_style_weekly": panel.num_rows,
+            "trend_index": idx.num_rows,
+        }
+        # Numeric panel columns the Arrow path copies rather than scoring in place: only columns
+        # that arrive in several chunks or with nulls (the rates of weeks without sessions).
+        copies = copied_columns(panel, METRICS + ["traffic_sessions"])
+        panel_info = {"mb": round(panel.nbytes / 2**20, 1), "copied_columns": copies}
+    finally:
+        con.close()
+    return stages, rows, panel_info
+
+
+def _fmt(seconds: float | None) -> str:
+    return "" if seconds is None else f"{seconds:.3f}"
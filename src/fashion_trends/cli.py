@@ -1,79 +1,512 @@
+"""Command line interface (``python -m fashion_trends`` / ``fashion-trends``).
+
+Every command imports the pipeline modules it runs (and through them duckdb, pandas, NumPy,
+pyarrow and rich) in its own body, so ``--help`` and light commands such as ``status`` start
+without them; ``tests/test_cli_startup.py`` holds them to an import-time budget.
+"""
 from __future__ import annotations
 
+from datetime import datetime
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING
+
 import typer
-from rich.console import Console
 
-from fashion_trends.settings import settings
-from fashion_trends.db import connect
-from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
-from fashion_trends.pipelines.ingest import ingest_raw_csvs
-from fashion_trends.pipelines.run_sql import run_sql_folder
-from fashion_trends.pipelines.compute_indices import compute_and_store_indices
-from fashion_trends.pipelines.export_tableau import export_csvs
+from fashion_trends.settings import DEFAULT_LOOKBACK_WEEKS, settings
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 app = typer.Typer(add_completion=False)
-console = Console()
+
+
+@cache
+def console() -> Console:
+    from rich.console import Console
+
+    return Console()
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help=(
+            "Record per-stage time, rows and peak RSS in meta.pipeline_runs / meta.stage_metrics."
+        ),
+    ),
+) -> None:
+    """Brand-level fashion trend pipeline."""
+    if profile and ctx.invoked_subcommand is not None:
+        from fashion_trends import profiling
+
+        settings.ensure_dirs()
+        ctx.call_on_close(profiling.start(ctx.invoked_subcommand, settings.db_path).finish)
 
 
 @app.command("generate-data")
-def generate_data_cmd() -> None:
-    """Generate synthetic raw CSVs into RAW_DIR (default: data/raw)."""
+def generate_data_cmd(
+    fmt: str = typer.Option(
+        "csv", "--format", help="Raw file format: csv or parquet (date-partitioned)."
+    ),
+    workers: int = typer.Option(
+        1, help="Processes generating shards in parallel (0 = one per CPU core)."
+    ),
+) -> None:
+    """Generate synthetic raw data into RAW_DIR (default: data/raw)."""
+    from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+
     settings.ensure_dirs()
     generate_synthetic_data(
-        GenConfig(seed=settings.seed, days=settings.days, n_users=settings.n_users, out_dir=settings.raw_dir)
+        GenConfig(
+            seed=settings.seed,
+            days=settings.days,
+            n_users=settings.n_users,
+            out_dir=settings.raw_dir,
+            fmt=fmt,
+            workers=workers,
+        )
+    )
+    console().print(f"[green]Raw data generated in {settings.raw_dir}.[/green]")
+
+
+@app.command("convert-raw")
+def convert_raw_cmd(
+    dst: Path = typer.Option(
+        Path("data/raw_parquet"), help="Output directory for the Parquet raw layer."
+    ),
+) -> None:
+    """Convert the CSV raw layer in RAW_DIR to (date-partitioned) Parquet."""
+    from fashion_trends.pipelines.convert_raw import convert_raw
+
+    convert_raw(settings.raw_dir, dst)
+    console().print(
+        f"[green]Parquet raw layer written to {dst}. Use RAW_DIR={dst} to ingest it.[/green]"
     )
-    console.print(f"[green]Raw data generated in {settings.raw_dir}.[/green]")
 
 
 @app.command()
-def ingest() -> None:
-    """Ingest raw CSVs into DuckDB raw schema."""
+def ingest(
+    append: bool = typer.Option(
+        False,
+        "--append",
+        help=(
+            "Only load raw files not yet in meta.ingest_manifest "
+            "(reload tables whose files changed)."
+        ),
+    ),
+    external: bool = typer.Option(
+        False,
+        "--external",
+        help="Create raw.* as views over Parquet files instead of loading them.",
+    ),
+) -> None:
+    """Ingest raw CSV / Parquet files into DuckDB raw schema."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.ingest import ingest_raw_csvs
+
     settings.ensure_dirs()
     con = connect(settings.db_path)
-    ingest_raw_csvs(con, settings.raw_dir)
-    console.print("[green]Ingest complete.[/green]")
+    ingest_raw_csvs(con, settings.raw_dir, append=append, external=external)
+    console().print("[green]Ingest complete.[/green]")
 
 
 @app.command("run-sql")
-def run_sql_cmd() -> None:
-    """Run SQL transforms (staging + marts) into DuckDB."""
+def run_sql_cmd(
+    full_refresh: bool = typer.Option(
+        False, "--full-refresh", help="Rebuild every mart from all history."
+    ),
+    lookback_weeks: int = typer.Option(
+        DEFAULT_LOOKBACK_WEEKS,
+        help="Trailing weeks always rebuilt to pick up late-arriving events.",
+    ),
+    sketches: bool | None = typer.Option(
+        None,
+        "--sketches/--no-sketches",
+        help="Build the session sketches without approximate marts (default: SESSION_SKETCHES).",
+    ),
+) -> None:
+    """Run SQL transforms (staging + marts) into DuckDB; marts only rebuild weeks with new data."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.run_sql import run_sql_folder
+    from fashion_trends.serving import publish_snapshot
+
     settings.ensure_dirs()
     con = connect(settings.db_path)
-    run_sql_folder(con, Path("sql"))
-    console.print("[green]SQL transforms complete.[/green]")
+    run_sql_folder(
+        con,
+        Path("sql"),
+        full_refresh=full_refresh,
+        lookback_weeks=lookback_weeks,
+        sketches=sketches,
+    )
+    publish_snapshot(con, settings.serving_dir)
+    console().print("[green]SQL transforms complete.[/green]")
 
 
 @app.command("compute-indices")
-def compute_indices_cmd() -> None:
-    """Compute trend indices (Python) and store to mart.mart_brand_trend_index."""
+def compute_indices_cmd(
+    since: datetime | None = typer.Option(
+        None,
+        formats=["%Y-%m-%d"],
+        help="Only recompute weeks from this week_start on (incremental).",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Resume from the last computed week using the stored rolling state.",
+    ),
+    engine: str = typer.Option(
+        "python", help="Where to compute the index: python (pandas/NumPy) or sql (DuckDB)."
+    ),
+    workers: int = typer.Option(1, help="Processes for the python engine (0 = one per CPU core)."),
+    stream: bool = typer.Option(
+        True,
+        "--stream/--no-stream",
+        help="Stream full rebuilds in style chunks sized by INDEX_CHUNK_ROWS / the memory limit.",
+    ),
+    levels: bool = typer.Option(
+        True,
+        "--levels/--no-levels",
+        help="Also compute brand, brand x category and category x color indices.",
+    ),
+) -> None:
+    """Compute trend indices into mart.mart_brand_trend_index and mart.mart_trend_index_levels."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.compute_indices import compute_and_store_indices
+    from fashion_trends.pipelines.compute_level_indices import compute_and_store_level_indices
+    from fashion_trends.serving import publish_snapshot
+
     settings.ensure_dirs()
     con = connect(settings.db_path)
-    compute_and_store_indices(con)
-    console.print("[green]Trend indices stored.[/green]")
+    compute_and_store_indices(
+        con,
+        since=since.date() if since else None,
+        incremental=incremental,
+        engine=engine,
+        workers=workers,
+        chunk_rows=settings.resolved_index_chunk_rows() if stream else None,
+    )
+    if levels:
+        compute_and_store_level_indices(con, workers=workers)
+    publish_snapshot(con, settings.serving_dir)
+    console().print("[green]Trend indices stored.[/green]")
 
 
 @app.command("export-tableau")
-def export_tableau_cmd() -> None:
-    """Export Tableau-ready CSV extracts."""
+def export_tableau_cmd(
+    fmt: str = typer.Option(
+        "csv", "--format", help="Extract format: csv, csv.gz, csv.zst or parquet."
+    ),
+    partition_by: str | None = typer.Option(
+        None, help="Write each extract as a directory partitioned by brand or week_start."
+    ),
+    workers: int = typer.Option(
+        4, help="Extracts exported concurrently (separate DuckDB cursors)."
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Re-export extracts whose fingerprint is unchanged."
+    ),
+) -> None:
+    """Export Tableau-ready extracts, skipping those unchanged since the last export."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.export_tableau import export_csvs
+
+    settings.ensure_dirs()
+    con = connect(settings.db_path)
+    export_csvs(
+        con, settings.export_dir, fmt=fmt, partition_by=partition_by, workers=workers, force=force
+    )
+    console().print(f"[green]Exports written to {settings.export_dir}.[/green]")
+
+
+@app.command()
+def run(
+    changed_only: bool = typer.Option(
+        False, "--changed-only", help="Only re-run stages whose inputs changed since the last run."
+    ),
+    workers: int = typer.Option(
+        4, help="Independent stages run concurrently on this many threads."
+    ),
+    sketches: bool | None = typer.Option(
+        None,
+        "--sketches/--no-sketches",
+        help="Build the session sketches without approximate marts (default: SESSION_SKETCHES).",
+    ),
+) -> None:
+    """Run ingest → SQL models → compute-indices → export-tableau as one dependency graph."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.dag import build_dag, run_pipeline
+    from fashion_trends.serving import publish_snapshot, read_current
+
+    settings.ensure_dirs()
+    con = connect(settings.db_path)
+    nodes = build_dag(
+        settings.raw_dir,
+        Path("sql"),
+        settings.export_dir,
+        index_chunk_rows=settings.resolved_index_chunk_rows(),
+        sketches=sketches,
+    )
+    status = run_pipeline(con, nodes, changed_only=changed_only, workers=workers)
+    ran = sum(s == "ran" for s in status.values())
+    if ran or read_current(settings.serving_dir) is None:
+        publish_snapshot(con, settings.serving_dir)
+    console().print(
+        f"[green]Pipeline complete: {ran} stage(s) run, {len(status) - ran} unchanged.[/green]"
+    )
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on."),
+    port: int = typer.Option(8765, help="TCP port (0 = any free port)."),
+    pool_size: int = typer.Option(4, help="Read-only DuckDB cursors shared by request threads."),
+    cache_size: int = typer.Option(
+        256, help="Responses kept in the LRU result cache (0 = no cache)."
+    ),
+) -> None:
+    """Serve the marts and latest emerging/fatiguing styles as JSON from the published snapshot."""
+    from fashion_trends.serving import make_server, read_current
+
+    if read_current(settings.serving_dir) is None:
+        console().print(
+            f"[yellow]No snapshot in {settings.serving_dir} yet; requests get 503 until a "
+            "pipeline run publishes one.[/yellow]"
+        )
+    server = make_server(
+        settings.serving_dir, host=host, port=port, pool_size=pool_size, cache_size=cache_size
+    )
+    console().print(
+        f"[green]Serving {settings.serving_dir} on http://{host}:{server.server_address[1]} "
+        "(Ctrl+C to stop).[/green]"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@app.command("watch")
+def watch_cmd(
+    interval: float = typer.Option(2.0, help="Seconds between polls of the raw directory."),
+    once: bool = typer.Option(False, "--once", help="Process the files waiting now, then exit."),
+    max_batches: int | None = typer.Option(None, help="Stop after this many batches."),
+    alerts_jsonl: Path | None = typer.Option(
+        None, help="Also append new trend alerts to this JSON Lines file."
+    ),
+    publish: bool = typer.Option(
+        True, "--publish/--no-publish", help="Publish a serving snapshot after each batch."
+    ),
+) -> None:
+    """Micro-batch new web_events/orders files in RAW_DIR into the marts, trend index and alerts."""
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.watch import watch
+    from fashion_trends.serving import publish_snapshot
+
     settings.ensure_dirs()
     con = connect(settings.db_path)
-    export_csvs(con, settings.export_dir)
-    console.print(f"[green]Exports written to {settings.export_dir}.[/green]")
+    on_batch = (lambda _: publish_snapshot(con, settings.serving_dir)) if publish else None
+    try:
+        batches = watch(
+            con,
+            settings.raw_dir,
+            Path("sql"),
+            interval=interval,
+            once=once,
+            max_batches=max_batches,
+            alerts_jsonl=alerts_jsonl,
+            on_batch=on_batch,
+        )
+    except KeyboardInterrupt:
+        return
+    console().print(f"[green]Watch stopped after {len(batches)} batch(es).[/green]")
+
+
+@app.command("profile-report")
+def profile_report_cmd(
+    run_id: str | None = typer.Option(
+        None, help="Run to break down (default: the latest profiled run)."
+    ),
+    history: int = typer.Option(
+        7, help="Previous runs of the same command to compare each stage against."
+    ),
+) -> None:
+    """Summarize profiled runs (--profile) and flag stages slower than their recent median."""
+    from fashion_trends import profiling
+    from fashion_trends.db import connect
+
+    con = connect(settings.db_path)
+    profiling.profile_report(con, run_id=run_id, history=history)
+
+
+@app.command()
+def status(limit: int = typer.Option(5, help="Profiled runs to list.")) -> None:
+    """Show the latest profiled runs from meta.pipeline_runs (starts fast: no pandas/NumPy/rich)."""
+    import duckdb
+
+    from fashion_trends import profiling
+
+    if not settings.db_path.exists():
+        typer.echo(f"No warehouse at {settings.db_path} yet.")
+        raise typer.Exit(code=1)
+    # Read-only, so status works next to a running pipeline's readers and never creates tables.
+    con = duckdb.connect(str(settings.db_path), read_only=True)
+    try:
+        runs = profiling.latest_runs(con, limit)
+    finally:
+        con.close()
+    typer.echo(f"Warehouse {settings.db_path}")
+    if not runs:
+        typer.echo("No profiled runs yet; re-run a command with --profile.")
+        return
+    for run_id, command, started_at, seconds, peak_rss_mb, stages, state in runs:
+        rss = "" if peak_rss_mb is None else f", peak RSS {peak_rss_mb:.0f} MB"
+        typer.echo(
+            f"{started_at:%Y-%m-%d %H:%M:%S}  {run_id}  {command:<16} {state:<6} {seconds:8.2f}s, "
+            f"{stages} stage(s){rss}"
+        )
+
+
+def _values(text: str, cast: type) -> list:
+    """Comma-separated grid values, e.g. ``"8,12,16"``."""
+    try:
+        return [cast(v) for v in text.split(",") if v.strip()]
+    except ValueError as exc:
+        raise typer.BadParameter(f"{text!r}: {exc}") from exc
+
+
+@app.command("backtest-sweep")
+def backtest_sweep_cmd(
+    baseline_weeks: str = typer.Option(
+        "8,12,16", help="Baseline window lengths (comma-separated)."
+    ),
+    exclude_recent_weeks: str = typer.Option("4", help="Weeks left out between baseline and now."),
+    recent_weeks: str = typer.Option("2,3,4", help="Recent-mean window lengths."),
+    slope_weeks: str = typer.Option("3,4,6", help="Slope (acceleration) window lengths."),
+    min_sessions: str = typer.Option("250", help="Minimum weekly sessions for an emerging flag."),
+    emerging_threshold: str = typer.Option(
+        "1.25,1.5,2.0", help="Index thresholds for emerging (and lead time)."
+    ),
+    momentum_weight: str = typer.Option("0.5,0.65,0.8", help="Momentum share of the index blend."),
+    lead_window: str = typer.Option(
+        "8", help="Moving-average windows of the naive lead-time baseline."
+    ),
+    metric: str = typer.Option(
+        "conversion_rate", help="Metric to backtest: conversion_rate or atc_rate."
+    ),
+    workers: int = typer.Option(
+        0, help="Processes evaluating configurations (0 = one per CPU core)."
+    ),
+    top: int = typer.Option(10, help="Configurations to show."),
+    out: Path | None = typer.Option(
+        None, help="Also write every configuration's results to this CSV."
+    ),
+) -> None:
+    """Backtest a grid of trend index configurations against the injected emerging buckets."""
+    from fashion_trends.analytics.sweep import parameter_grid
+    from fashion_trends.db import connect
+    from fashion_trends.pipelines.backtest_sweep import backtest_sweep, print_sweep
+
+    grid = parameter_grid(
+        baseline_weeks=_values(baseline_weeks, int),
+        exclude_recent_weeks=_values(exclude_recent_weeks, int),
+        recent_weeks=_values(recent_weeks, int),
+        slope_weeks=_values(slope_weeks, int),
+        min_sessions=_values(min_sessions, int),
+        emerging_threshold=_values(emerging_threshold, float),
+        momentum_weight=_values(momentum_weight, float),
+        lead_window=_values(lead_window, int),
+    )
+    con = connect(settings.db_path)
+    results = backtest_sweep(con, grid, metric=metric, workers=workers)
+    print_sweep(results, top=top)
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(out, index=False)
+        console().print(f"[green]Sweep results written to {out}.[/green]")
+
+
+@app.command("sketch-report")
+def sketch_report_cmd() -> None:
+    """Compare funnel rates merged from the session sketches with the exact ones, per grain."""
+    from fashion_trends.db import connect
+    from fashion_trends.sketches import SKETCH_TABLE, print_report, validation_report
+
+    con = connect(settings.db_path)
+    if not con.execute(f"SELECT EXISTS (FROM {SKETCH_TABLE})").fetchone()[0]:
+        console().print(
+            f"[yellow]{SKETCH_TABLE} is empty; build it with `run-sql --sketches` "
+            "(or SESSION_SKETCHES=1).[/yellow]"
+        )
+        raise typer.Exit(code=1)
+    print_report(validation_report(con))
+
+
+@app.command()
+def bench(
+    tier: str = typer.Option(
+        "sample", help="Dataset tier: sample, 1x (Settings defaults) or 10x (10x users)."
+    ),
+    out: Path | None = typer.Option(
+        None, help="Results JSON (default: benchmarks/results/<tier>.json)."
+    ),
+    baseline: Path | None = typer.Option(
+        None, help="Baseline results JSON; exit with code 1 if a stage regressed."
+    ),
+    tolerance: float = typer.Option(
+        0.25, help="Allowed slowdown per stage vs the baseline, as a fraction."
+    ),
+    results: Path | None = typer.Option(
+        None, help="Compare this existing results JSON instead of running."
+    ),
+    repeat: int = typer.Option(1, help="Runs per stage; the fastest is kept."),
+    fmt: str = typer.Option("csv", "--format", help="Raw file format for the generated dataset."),
+) -> None:
+    """Benchmark each pipeline stage on a deterministic dataset tier; optionally vs a baseline."""
+    from fashion_trends.bench import (
+        compare_results,
+        print_results,
+        read_results,
+        run_benchmark,
+        write_results,
+    )
+
+    if results is not None:
+        current = read_results(results)
+    else:
+        current = run_benchmark(tier, fmt=fmt, repeat=repeat)
+        out = out or Path("benchmarks/results") / f"{tier}.json"
+        write_results(current, out)
+        console().print(f"[green]Benchmark results written to {out}.[/green]")
+    print_results(current)
+    if baseline is not None:
+        regressed = compare_results(current, read_results(baseline), tolerance=tolerance)
+        if regressed:
+            console().print(f"[red]Regressed beyond {tolerance:.0%}: {', '.join(regressed)}[/red]")
+            raise typer.Exit(code=1)
+        console().print("[green]No stage regressed beyond the tolerance.[/green]")
 
 
 @app.command("demo-existing")
 def demo_existing_cmd() -> None:
     """Run pipeline assuming raw CSVs already exist in RAW_DIR (e.g., data/sample)."""
-    ingest()
-    run_sql_cmd()
-    compute_indices_cmd()
-    export_tableau_cmd()
-    console.print("[bold green]Demo (existing data) complete.[/bold green]")
+    ingest(append=False, external=False)
+    run_sql_cmd(full_refresh=False, lookback_weeks=DEFAULT_LOOKBACK_WEEKS, sketches=None)
+    compute_indices_cmd(
+        since=None, incremental=False, engine="python", workers=1, stream=True, levels=True
+    )
+    export_tableau_cmd(fmt="csv", partition_by=None, workers=4, force=False)
+    console().print("[bold green]Demo (existing data) complete.[/bold green]")
 
 
 @app.command()
 def demo() -> None:
     """Generate data + run the full pipeline end-to-end."""
-    generate_data_cmd()
+    generate_data_cmd(fmt="csv", workers=1)
     demo_existing_cmd()
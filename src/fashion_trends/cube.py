@@ -0,0 +1,50 @@
+"""Point reads of dashboard slices from ``mart.mart_performance_cube``.
+
+The cube (``sql/03_marts.sql``) holds every combination of ``CUBE_DIMS`` per week, so a slice such
+as "brand X, region NA, all genders/categories/collections" is one ``grouping_id`` plus equality
+filters instead of an aggregation over the finest grain.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date
+
+import duckdb
+import pandas as pd
+
+CUBE_TABLE = "mart.mart_performance_cube"
+# Order of the grouping_id bits, most significant first (GROUPING(brand, region, ...)).
+CUBE_DIMS = ("brand", "region", "gender", "category", "collection")
+
+
+def grouping_id(dims: Iterable[str]) -> int:
+    """The cube's ``grouping_id`` for slices that fix ``dims`` and roll up every other dimension."""
+    dims = set(dims)
+    unknown = sorted(dims - set(CUBE_DIMS))
+    if unknown:
+        raise ValueError(
+            f"Unknown cube dimension(s) {unknown}; expected some of {list(CUBE_DIMS)}."
+        )
+    return sum(1 << (len(CUBE_DIMS) - 1 - i) for i, d in enumerate(CUBE_DIMS) if d not in dims)
+
+
+def slice_query(*, week_start: date | str | None = None, **dims: str) -> tuple[str, list]:
+    """SQL and parameters reading one slice of the cube (every week when ``week_start`` is None)."""
+    params: list = [grouping_id(dims)]
+    where = "grouping_id = ?"
+    for d in CUBE_DIMS:
+        if d in dims:
+            where += f" AND {d} = ?"
+            params.append(dims[d])
+    if week_start is not None:
+        where += " AND week_start = ?"
+        params.append(week_start)
+    return f"SELECT * FROM {CUBE_TABLE} WHERE {where} ORDER BY week_start", params
+
+
+def lookup_slice(
+    con: duckdb.DuckDBPyConnection, *, week_start: date | str | None = None, **dims: str
+) -> pd.DataFrame:
+    """Weekly rows of one slice, e.g. ``lookup_slice(con, brand="AMI", region="NA")``."""
+    sql, params = slice_query(week_start=week_start, **dims)
+    return con.execute(sql, params).df()
@@ -1,14 +1,113 @@
 from __future__ import annotations
+
+import threading
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+
 import duckdb
 
-def connect(db_path: Path) -> duckdb.DuckDBPyConnection:
+from fashion_trends.resources import (
+    INDEX_DUCKDB_SHARE,
+    STAGE_OVERRIDES,
+    Resources,
+    format_mib,
+    parse_size,
+)
+from fashion_trends.settings import settings
+
+
+def connect(db_path: Path, resources: Resources | None = None) -> duckdb.DuckDBPyConnection:
+    """Opens the warehouse with ``resources`` (default ``settings.resources()`` for ``db_path``)."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
     con = duckdb.connect(str(db_path))
-    con.execute("PRAGMA threads=4;")
+    apply_resources(con, resources or settings.resources(db_path))
     return con
 
+def apply_resources(con: duckdb.DuckDBPyConnection, resources: Resources) -> None:
+    _set_all(con, resources.settings())
+
+@dataclass
+class _StageState:
+    depth: int = 0
+    previous: dict[str, object] = field(default_factory=dict)
+
+_stage_lock = threading.Lock()
+# Keyed by the connection that opened the database (cursors map to it): settings are per database.
+_stage_states: weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, _StageState] = (
+    weakref.WeakKeyDictionary()
+)
+_cursor_roots: weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, duckdb.DuckDBPyConnection] = (
+    weakref.WeakKeyDictionary()
+)
+
+def cursor(con: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyConnection:
+    """A cursor of ``con`` that ``stage_resources`` counts as the same database as ``con``."""
+    cur = con.cursor()
+    _cursor_roots[cur] = _cursor_roots.get(con, con)
+    return cur
+
+@contextmanager
+def stage_resources(con: duckdb.DuckDBPyConnection, kind: str) -> Iterator[None]:
+    """Applies the ``STAGE_OVERRIDES`` of a stage kind for the block, then restores the old values.
+
+    DuckDB settings are global to the database, so when stages overlap on one database (the DAG
+    runs independent stages concurrently on ``cursor``s) the first stage to start picks the
+    overrides and the last one to finish restores the previous settings. A stage that fails while
+    applying them restores whatever it had already changed.
+    """
+    root = _cursor_roots.get(con, con)
+    with _stage_lock:
+        state = _stage_states.setdefault(root, _StageState())
+    try:
+        with _stage_lock:
+            state.depth += 1
+            if state.depth == 1:
+                overrides = dict(STAGE_OVERRIDES.get(kind, {}))
+                if kind == "indices":
+                    current = con.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+                    limit = int(parse_size(current) * INDEX_DUCKDB_SHARE)
+                    overrides["memory_limit"] = format_mib(limit)
+                state.previous = {}
+                for name in overrides:
+                    query = f"SELECT current_setting({_literal(name)})"
+                    state.previous[name] = con.execute(query).fetchone()[0]
+                _set_all(con, overrides)
+        yield
+    finally:
+        with _stage_lock:
+            state.depth -= 1
+            if state.depth == 0:
+                _stage_states.pop(root, None)
+                _set_all(con, state.previous)
+
+def _set_all(con: duckdb.DuckDBPyConnection, values: dict[str, object]) -> None:
+    for name, value in values.items():
+        con.execute(f"SET {name} = {_literal(value)};")
+
+def _literal(value: object) -> str:
+    """``value`` as a SQL literal: booleans and integers bare, anything else a quoted string."""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
 def bootstrap_schemas(con: duckdb.DuckDBPyConnection) -> None:
     con.execute("CREATE SCHEMA IF NOT EXISTS raw;")
     con.execute("CREATE SCHEMA IF NOT EXISTS staging;")
     con.execute("CREATE SCHEMA IF NOT EXISTS mart;")
+    con.execute("CREATE SCHEMA IF NOT EXISTS meta;")
+
+
+def table_exists(con: duckdb.DuckDBPyConnection, qualified_name: str) -> bool:
+    schema, name = qualified_name.split(".", 1)
+    return bool(
+        con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_name = ?",
+            [schema, name],
+        ).fetchone()[0]
+    )
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends.analytics.sweep import SweepPanel, SweepParams, run_sweep
+from fashion_trends.pipelines.compute_indices import GROUP_COLS, KEY_COLS, METRICS
+from fashion_trends.pipelines.generate_data import EMERGING_RULES
+
+console = Console()
+
+# Columns of a style group that an EMERGING_RULES bucket fixes (every region is part of it).
+RULE_COLS = ["brand", "category", "gender", "silhouette", "color"]
+
+
+def load_sweep_panel(con: duckdb.DuckDBPyConnection, metric: str = "conversion_rate") -> SweepPanel:
+    """The ``metric`` series of mart_style_weekly, labelled with the injected emerging buckets.
+
+    DuckDB sorts the panel and numbers the weeks of each group, so only numeric columns cross into
+    Python; a group is positive when its style matches one of ``EMERGING_RULES``.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}.")
+    keys = ", ".join(KEY_COLS)
+    bucket = " AND ".join(f"{c} = ?" for c in RULE_COLS)
+    positive = " OR ".join(f"({bucket})" for _ in EMERGING_RULES)
+    panel = pa.table(
+        con.execute(
+            f"""
+            SELECT
+              row_number() OVER (PARTITION BY {keys} ORDER BY week_start) - 1 AS pos,
+              CAST(traffic_sessions AS DOUBLE) AS traffic_sessions,
+              CAST({metric} AS DOUBLE) AS metric,
+              COALESCE({positive}, false) AS positive
+            FROM mart.mart_style_weekly
+            WHERE {" AND ".join(f"{c} IS NOT NULL" for c in GROUP_COLS)}
+            ORDER BY {keys}, week_start
+            """,
+            [v for rule in EMERGING_RULES for v in rule],
+        ).arrow()
+    )
+    if not panel.num_rows:
+        raise RuntimeError("mart.mart_style_weekly is empty. Run SQL transforms first (run-sql).")
+    return SweepPanel.prepare(
+        panel.column("metric").to_numpy(),
+        panel.column("traffic_sessions").to_numpy(),
+        panel.column("pos").to_numpy(),
+        panel.column("positive").to_numpy(zero_copy_only=False),
+    )
+
+
+def backtest_sweep(
+    con: duckdb.DuckDBPyConnection,
+    grid: list[SweepParams],
+    *,
+    metric: str = "conversion_rate",
+    workers: int = 0,
+) -> pd.DataFrame:
+    """Scores every configuration of ``grid``; best (hit rate - false-positive rate, lead) first."""
+    panel = load_sweep_panel(con, metric)
+    n_pos = int(panel.group_positive.sum())
+    console.print(
+        f"[bold]Backtest sweep[/bold] of {len(grid):,} configurations over {panel.n:,} rows, "
+        f"{panel.n_groups:,} style groups ({n_pos} injected emerging)"
+    )
+    if not n_pos:
+        console.print(
+            "[yellow]No injected emerging buckets in the panel; hit rates are undefined.[/yellow]"
+        )
+    t0 = time.perf_counter()
+    results = run_sweep(panel, grid, workers=workers)
+    console.print(f"[dim]{len(grid):,} configurations in {time.perf_counter() - t0:.1f}s[/dim]")
+    return results.sort_values(
+        ["score", "mean_lead_time_weeks"], ascending=False, na_position="last", kind="stable"
+    ).reset_index(drop=True)
+
+
+# Short table headers of the sweep columns.
+HEADERS = {
+    "baseline_weeks": "base",
+    "exclude_recent_weeks": "excl",
+    "recent_weeks": "recent",
+    "slope_weeks": "slope",
+    "min_sessions": "min_sess",
+    "emerging_threshold": "thresh",
+    "momentum_weight": "w_mom",
+    "lead_window": "lead_win",
+    "hit_rate": "hit",
+    "false_positive_rate": "fp",
+    "mean_lead_time_weeks": "lead_wk",
+    "flagged_groups": "flagged",
+}
+
+
+def print_sweep(results: pd.DataFrame, *, top: int = 10) -> None:
+    t = Table(title=f"Top {min(top, len(results))} of {len(results)} configurations")
+    params = list(HEADERS)[:8]
+    for header in HEADERS.values():
+        t.add_column(header, justify="right")
+    for _, r in results.head(top).iterrows():
+        t.add_row(
+            *(f"{r[c]:g}" for c in params),
+            f"{r['hit_rate']:.1%}",
+            f"{r['false_positive_rate']:.2%}",
+            "" if np.isnan(r["mean_lead_time_weeks"]) else f"{r['mean_lead_time_weeks']:.1f}",
+            f"{int(r['flagged_groups']):,}",
+        )
+    console.print(t)
@@ -1,37 +1,527 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Iterator
+from dataclasses import asdict
+from datetime import date, timedelta
+from pathlib import Path
+
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from rich.console import Console
 from rich.table import Table
 
-from fashion_trends.analytics.trend_index import TrendIndexConfig, compute_trend_index, mark_fatigue
+from fashion_trends import profiling
+from fashion_trends.analytics.arrow_index import compute_index_table
 from fashion_trends.analytics.backtest import compute_lead_time_weeks
+from fashion_trends.analytics.parallel import compute_trend_indices
+from fashion_trends.analytics.trend_index import FATIGUE_WINDOW, TrendIndexConfig, mark_fatigue
+from fashion_trends.db import bootstrap_schemas, stage_resources, table_exists
 
 console = Console()
 
+GROUP_COLS = ["brand", "region", "gender", "category", "silhouette", "color"]
+# What the python engine groups and sorts on: the integer style key of STYLE_DIM and the region.
+# The GROUP_COLS labels are joined back from STYLE_DIM only when index rows are stored.
+KEY_COLS = ["style_id", "region"]
+STYLE_DIM = "staging.dim_style"
+METRICS = ["conversion_rate", "atc_rate"]
+INDEX_TABLE = "mart.mart_brand_trend_index"
+STATE_TABLE = "meta.trend_index_state"
+STATE_INFO_TABLE = "meta.trend_index_state_info"
+ENGINES = ("python", "sql")
+TREND_INDEX_SQL = Path("sql/engines/trend_index.sql")
+
+# How many already-computed weeks an incremental run may recompute (e.g. a partial latest week).
+STATE_REWIND_WEEKS = 4
+BUILD_SUFFIX = "__build"
+# Registered name of the style groups an incremental update is restricted to.
+GROUPS_VIEW = "index_groups_df"
+# Record batch size when streaming the style panel (capped by the chunk size).
+PANEL_BATCH_ROWS = 100_000
+
+
+def compute_and_store_indices(
+    con: duckdb.DuckDBPyConnection,
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    *,
+    since: date | None = None,
+    incremental: bool = False,
+    engine: str = "python",
+    sql_path: Path = TREND_INDEX_SQL,
+    workers: int = 1,
+    chunk_rows: int | None = None,
+) -> None:
+    """Computes trend indices into mart.mart_brand_trend_index.
+
+    With ``since`` (or ``incremental``, which resumes from the last computed week) only weeks from
+    that point on are recomputed from the persisted rolling state and upserted. A full rebuild is
+    done instead when there is no state yet or ``TrendIndexConfig`` changed since it was written.
+
+    ``engine="sql"`` computes the same table inside DuckDB from ``sql_path`` (full rebuilds only).
+    ``workers`` > 1 scores the python engine's style partitions on a process pool (0 = all cores).
+    With ``chunk_rows`` a python full rebuild streams the style panel in chunks of about that many
+    rows, cut on style boundaries, so its memory does not grow with the data.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}.")
+    bootstrap_schemas(con)
+    if chunk_rows is not None and chunk_rows < 1:
+        raise ValueError(f"chunk_rows must be >= 1, got {chunk_rows}.")
+    with stage_resources(con, "indices"), profiling.stage(INDEX_TABLE, "indices") as st:
+        _compute_and_store(con, cfg, since, incremental, engine, sql_path, workers, chunk_rows)
+        if profiling.active():
+            st.rows_in = con.execute("SELECT COUNT(*) FROM mart.mart_style_weekly").fetchone()[0]
+            st.rows_out = con.execute(f"SELECT COUNT(*) FROM {INDEX_TABLE}").fetchone()[0]
+
+
+def _compute_and_store(
+    con: duckdb.DuckDBPyConnection,
+    cfg: TrendIndexConfig,
+    since: date | None,
+    incremental: bool,
+    engine: str,
+    sql_path: Path,
+    workers: int,
+    chunk_rows: int | None,
+) -> None:
+    if engine == "sql":
+        if since is not None or incremental:
+            raise ValueError("Incremental runs are only supported by the python engine.")
+        _compute_in_database(con, cfg, sql_path)
+        return
+    if since is not None or incremental:
+        start = _incremental_start(con, cfg, since)
+        if start is not None:
+            _compute_incremental(con, cfg, start, workers)
+            return
+        console.print(
+            "[yellow]No usable trend index state for this config; running a full rebuild.[/yellow]"
+        )
+
+    # Chunks are committed into a side table one by one (an open transaction would keep them all in
+    # memory) and swapped in at the end, so readers never see a partial index.
+    build = f"{INDEX_TABLE}{BUILD_SUFFIX}"
+    chunks = [load_index_panel(con)] if chunk_rows is None else iter_index_panel(con, chunk_rows)
+    n_chunks = 0
+    try:
+        for panel in chunks:
+            if not panel.num_rows:
+                break
+            idx = compute_index_table(
+                panel, metric_cols=METRICS, group_cols=KEY_COLS, cfg=cfg, workers=workers
+            )
+            if chunk_rows is not None:
+                styles = panel.column(KEY_COLS[0])
+                console.print(
+                    f"[dim]Chunk {n_chunks + 1}: style_id {styles[0]}..{styles[-1]}, "
+                    f"{panel.num_rows:,} style rows[/dim]"
+                )
+            del panel
+            store_index_table(con, idx, table=build, append=n_chunks > 0)
+            n_chunks += 1
+        if not n_chunks:
+            raise RuntimeError(
+                "mart.mart_style_weekly is empty. Run SQL transforms first (run-sql)."
+            )
+        con.begin()
+        try:
+            con.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE};")
+            con.execute(f"ALTER TABLE {build} RENAME TO {INDEX_TABLE.split('.')[1]};")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+    except Exception:
+        con.execute(f"DROP TABLE IF EXISTS {build};")
+        raise
+    _write_full_state(con, cfg)
+
+    _print_report(_latest_week(con))
+
+
+def _keyed() -> str:
+    """Predicate of the style rows the index scores: every ``GROUP_COLS`` label present."""
+    return " AND ".join(f"{c} IS NOT NULL" for c in GROUP_COLS)
+
+
+def _panel_sql() -> str:
+    keys = ", ".join(KEY_COLS)
+    return f"""
+        SELECT {keys}, CAST(week_start AS TIMESTAMP) AS week_start,
+               CAST(traffic_sessions AS DOUBLE) AS traffic_sessions,
+               {", ".join(f"CAST({m} AS DOUBLE) AS {m}" for m in METRICS)}
+        FROM mart.mart_style_weekly
+        WHERE {_keyed()}
+        ORDER BY {keys}, week_start
+        """
+
+
+def load_index_panel(con: duckdb.DuckDBPyConnection) -> pa.Table:
+    """The index columns of mart_style_weekly, keyed rows only, sorted by group + week, as Arrow.
+
+    Groups are identified by ``KEY_COLS`` (an integer style key and the region), not by their six
+    labels.
+    """
+    return pa.table(con.execute(_panel_sql()).arrow())
+
+
+def iter_index_panel(con: duckdb.DuckDBPyConnection, chunk_rows: int) -> Iterator[pa.Table]:
+    """``load_index_panel`` in chunks of about ``chunk_rows`` rows that never split a style.
+
+    DuckDB sorts the panel (spilling to its temp directory when it exceeds the memory limit) and
+    streams it as record batches on a separate cursor. Once ``chunk_rows`` rows have arrived the
+    chunk is cut where its last style starts; a style larger than ``chunk_rows`` is one chunk.
+    """
+    cur = con.cursor()
+    try:
+        batches = cur.execute(_panel_sql()).arrow(min(chunk_rows, PANEL_BATCH_ROWS))
+        reader = pa.RecordBatchReader.from_stream(batches)
+        pending: list[pa.RecordBatch] = []
+        rows = 0
+        for batch in reader:
+            pending.append(batch)
+            rows += batch.num_rows
+            if rows < chunk_rows:
+                continue
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            style = table.column(KEY_COLS[0])
+            cut = pc.index(style, style[-1]).as_py()
+            if cut == 0:
+                continue
+            yield table.slice(0, cut)
+            rest = table.slice(cut)
+            pending, rows = rest.to_batches(), rest.num_rows
+        if rows:
+            yield pa.Table.from_batches(pending, schema=reader.schema)
+    finally:
+        cur.close()
+
+
+def store_index_table(
+    con: duckdb.DuckDBPyConnection, idx: pa.Table, *, table: str = INDEX_TABLE, append: bool = False
+) -> None:
+    """Replaces (or appends to) ``table`` with ``idx``; DuckDB scans the Arrow buffers directly.
+
+    ``idx`` is keyed by ``KEY_COLS``; its labels are attached by ``decode_styles`` first.
+    """
+    con.register("idx_arrow", decode_styles(con, idx))
+    labels = ", ".join(f"{c}::VARCHAR AS {c}" for c in GROUP_COLS)
+    select = f"SELECT * REPLACE ({labels}) FROM idx_arrow"
+    if append:
+        con.execute(f"INSERT INTO {table} {select};")
+    else:
+        con.execute(f"CREATE OR REPLACE TABLE {table} AS {select};")
+    con.unregister("idx_arrow")
+
+
+def decode_styles(con: duckdb.DuckDBPyConnection, idx: pa.Table) -> pa.Table:
+    """``idx`` (keyed by ``KEY_COLS``) with the ``GROUP_COLS`` labels of its styles in front.
+
+    Each label column is a dictionary array over the ``STYLE_DIM`` column, indexed by the row's
+    position there, so no per-row strings exist until DuckDB writes the table (a SQL join of the
+    same rows buffered its output and peaked ~250 MB higher on an 870k-row panel).
+    """
+    labels = [c for c in GROUP_COLS if c != "region"]
+    as_text = ", ".join(f"{c}::VARCHAR AS {c}" for c in labels)
+    dim = pa.table(
+        con.execute(f"SELECT style_id, {as_text} FROM {STYLE_DIM}").arrow()
+    ).combine_chunks()
+    pos = pc.index_in(idx.column("style_id"), value_set=dim.column("style_id"))
+    cols = {
+        c: idx.column(c) if c == "region" else pa.chunked_array(
+            [pa.DictionaryArray.from_arrays(chunk, dim.column(c).chunk(0)) for chunk in pos.chunks],
+            pa.dictionary(pa.int32(), pa.string()),
+        )
+        for c in GROUP_COLS
+    }
+    rest = [c for c in idx.column_names if c != "region"]
+    return pa.table({**cols, **{c: idx.column(c) for c in rest}})
+
+
+def decoded_sql(relation: str) -> str:
+    """``relation`` (keyed by ``KEY_COLS``) with ``STYLE_DIM``'s ``GROUP_COLS`` labels in front.
+
+    The index table keeps its labels as VARCHAR: it is upserted across runs, and an ENUM column
+    would pin the label domains of the run that created it.
+    """
+    labels = ", ".join(f"{'k' if c == 'region' else 'd'}.{c}::VARCHAR AS {c}" for c in GROUP_COLS)
+    return (
+        f"SELECT {labels}, k.* EXCLUDE (region) "
+        f"FROM {relation} k JOIN {STYLE_DIM} d USING (style_id)"
+    )
+
 
-def compute_and_store_indices(con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig = TrendIndexConfig()) -> None:
-    df = con.execute("SELECT * FROM mart.mart_style_weekly").df()
-    if df.empty:
+def render_trend_index_sql(cfg: TrendIndexConfig, sql_path: Path = TREND_INDEX_SQL) -> str:
+    """Fills the SQL engine template with the window frames and thresholds of ``cfg``."""
+    return sql_path.read_text(encoding="utf-8").format(
+        baseline_far=cfg.baseline_weeks + cfg.exclude_recent_weeks - 1,
+        baseline_near=cfg.exclude_recent_weeks + 1,
+        exclude_recent_weeks=cfg.exclude_recent_weeks,
+        recent_far=cfg.recent_weeks - 1,
+        slope_far=cfg.slope_weeks - 1,
+        fatigue_far=FATIGUE_WINDOW - 1,
+        min_sessions=float(cfg.min_sessions),
+        emerging_threshold=float(cfg.emerging_threshold),
+        fatiguing_threshold=float(cfg.fatiguing_threshold),
+        momentum_weight=repr(float(cfg.momentum_weight)),
+        accel_weight=repr(float(cfg.accel_weight)),
+    )
+
+
+def _compute_in_database(
+    con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig, sql_path: Path
+) -> None:
+    if not con.execute("SELECT COUNT(*) FROM mart.mart_style_weekly").fetchone()[0]:
         raise RuntimeError("mart.mart_style_weekly is empty. Run SQL transforms first (run-sql).")
+    console.print(f"[bold]Running SQL[/bold] {sql_path}")
+    con.execute(render_trend_index_sql(cfg, sql_path))
+    _write_full_state(con, cfg)
+    _print_report(_latest_week(con))
+
+
+def _latest_week(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    return con.execute(
+        f"SELECT * FROM {INDEX_TABLE} "
+        f"WHERE week_start = (SELECT MAX(week_start) FROM {INDEX_TABLE})"
+    ).df()
+
+
+def _compute_index(df: pd.DataFrame, cfg: TrendIndexConfig, workers: int) -> pd.DataFrame:
+    return compute_trend_indices(
+        df, metric_cols=METRICS, group_cols=KEY_COLS, cfg=cfg, workers=workers
+    )
+
+
+def _state_depth(cfg: TrendIndexConfig) -> int:
+    """Rows kept per group: the longest look-back window plus the rewind horizon."""
+    window = max(cfg.baseline_weeks + cfg.exclude_recent_weeks, cfg.recent_weeks, cfg.slope_weeks)
+    return window + STATE_REWIND_WEEKS
+
+
+def _state_fingerprint(con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig) -> str:
+    # State and index rows are keyed by style_id, so renumbered styles need a full rebuild.
+    labels = ", ".join(c for c in GROUP_COLS if c != "region")
+    styles = con.execute(
+        f"SELECT COUNT(*), bit_xor(hash(style_id, {labels})) FROM {STYLE_DIM}"
+    ).fetchone()
+    return json.dumps(
+        {
+            "config": asdict(cfg),
+            "depth": _state_depth(cfg),
+            "metrics": METRICS,
+            "styles": list(styles),
+        },
+        sort_keys=True,
+    )
+
+
+def _incremental_start(
+    con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig, since: date | None
+) -> date | None:
+    """Effective first week for an incremental run, or None when a full rebuild is required."""
+    if not all(table_exists(con, t) for t in (STATE_INFO_TABLE, STATE_TABLE, INDEX_TABLE)):
+        return None
+    row = con.execute(f"SELECT fingerprint, last_week FROM {STATE_INFO_TABLE}").fetchone()
+    if row is None or row[0] != _state_fingerprint(con, cfg) or row[1] is None:
+        return None
+
+    last_week: date = row[1]
+    start = last_week if since is None else min(since, last_week + timedelta(weeks=1))
+    if start < last_week - timedelta(weeks=STATE_REWIND_WEEKS - 1):
+        console.print(
+            f"[yellow]--since {start} is more than {STATE_REWIND_WEEKS} weeks before the stored "
+            f"state ({last_week}).[/yellow]"
+        )
+        return None
+    return start
+
+
+def _write_full_state(con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig) -> None:
+    keys = ", ".join(KEY_COLS)
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {STATE_TABLE} AS
+        SELECT {keys}, week_start, traffic_sessions, {", ".join(METRICS)}
+        FROM mart.mart_style_weekly
+        WHERE {_keyed()}
+        QUALIFY row_number() OVER (PARTITION BY {keys} ORDER BY week_start DESC)
+          <= {_state_depth(cfg)}
+        """
+    )
+    _write_state_info(con, cfg)
+
+
+def _write_state_info(con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig) -> None:
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {STATE_INFO_TABLE} AS
+        SELECT ? AS fingerprint, (SELECT MAX(week_start) FROM {STATE_TABLE}) AS last_week,
+               (SELECT COUNT(*) FROM {STATE_TABLE}) AS state_rows, now() AS updated_at
+        """,
+        [_state_fingerprint(con, cfg)],
+    )
+
+
+def update_index_groups(
+    con: duckdb.DuckDBPyConnection,
+    cfg: TrendIndexConfig,
+    groups: pd.DataFrame,
+    start: date,
+    *,
+    workers: int = 1,
+) -> bool:
+    """Recomputes the index of the style ``groups`` (a frame with ``KEY_COLS``) from ``start`` on.
+
+    Uses the persisted rolling state like ``--incremental``, but reads, rewrites and re-derives lead
+    times for those groups only. Returns False (and changes nothing) when the state cannot serve
+    ``start``; the caller then needs a regular ``compute_and_store_indices`` run.
+    """
+    effective = _incremental_start(con, cfg, start)
+    if effective is None:
+        return False
+    _compute_incremental(con, cfg, effective, workers, groups=groups, report=False)
+    return True
+
+
+def _compute_incremental(
+    con: duckdb.DuckDBPyConnection,
+    cfg: TrendIndexConfig,
+    start: date,
+    workers: int,
+    *,
+    groups: pd.DataFrame | None = None,
+    report: bool = True,
+) -> None:
+    keys = ", ".join(KEY_COLS)
+    cols = f"{keys}, week_start, traffic_sessions, {', '.join(METRICS)}"
+    # With ``groups`` every read and rewrite is restricted to those style groups.
+    only, in_groups = _group_filters(groups is not None)
+    if groups is not None:
+        con.register(GROUPS_VIEW, groups[KEY_COLS].drop_duplicates())
+    try:
+        new = con.execute(
+            f"SELECT {cols} FROM mart.mart_style_weekly {only} "
+            f"WHERE week_start >= ? AND {_keyed()}",
+            [start],
+        ).df()
+        if new.empty:
+            console.print(
+                f"[yellow]No mart_style_weekly rows since {start}; trend indices are up to date."
+                "[/yellow]"
+            )
+            return
+        if report:
+            console.print(
+                f"[bold]Incremental trend index[/bold] from week_start={start} "
+                f"({len(new):,} style rows)"
+            )
+
+        tail = con.execute(
+            f"SELECT {cols} FROM {STATE_TABLE} {only} WHERE week_start < ?", [start]
+        ).df()
+        panel = pd.concat([tail, new], ignore_index=True)
+        start_ts = pd.Timestamp(start)
+
+        idx = _compute_index(panel, cfg, workers)
+        idx = idx[idx["week_start"] >= start_ts]
+
+        # Fatigue needs the previous index rows of each group + metric, which the index table
+        # already holds.
+        prev = con.execute(
+            f"""
+            SELECT {keys}, metric, week_start, trend_index
+            FROM {INDEX_TABLE} {only}
+            WHERE week_start < ?
+            QUALIFY row_number() OVER (PARTITION BY {keys}, metric ORDER BY week_start DESC)
+              < {FATIGUE_WINDOW}
+            """,
+            [start],
+        ).df()
+        marked = mark_fatigue(
+            pd.concat([prev, idx], ignore_index=True), group_cols=KEY_COLS + ["metric"], cfg=cfg
+        )
+        recent = pd.to_datetime(marked["week_start"]) >= start_ts
+        idx = marked.loc[recent, list(idx.columns) + ["is_fatiguing"]]
+
+        state = pd.concat([tail, new], ignore_index=True).sort_values(KEY_COLS + ["week_start"])
+        state = state.groupby(KEY_COLS, sort=False).tail(_state_depth(cfg))
+
+        con.begin()
+        try:
+            con.execute(f"DELETE FROM {INDEX_TABLE} WHERE week_start >= ?{in_groups}", [start])
+            con.register("idx_df", idx)
+            con.execute(f"INSERT INTO {INDEX_TABLE} BY NAME {decoded_sql('idx_df')};")
+            con.unregister("idx_df")
+            _update_lead_times(con, restrict=groups is not None)
+
+            con.execute(f"DELETE FROM {STATE_TABLE} WHERE true{in_groups};")
+            con.register("state_df", state)
+            con.execute(f"INSERT INTO {STATE_TABLE} BY NAME SELECT * FROM state_df;")
+            con.unregister("state_df")
+            _write_state_info(con, cfg)
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+    finally:
+        if groups is not None:
+            con.unregister(GROUPS_VIEW)
+
+    if report:
+        _print_report(_latest_week(con))
 
-    group_cols = ["brand", "region", "gender", "category", "silhouette", "color"]
-    idx_conv = compute_trend_index(df, metric_col="conversion_rate", group_cols=group_cols, cfg=cfg)
-    idx_atc = compute_trend_index(df, metric_col="atc_rate", group_cols=group_cols, cfg=cfg)
 
-    idx = pd.concat([idx_conv, idx_atc], ignore_index=True)
-    idx = mark_fatigue(idx, group_cols=group_cols + ["metric"], cfg=cfg)
+def _group_filters(restrict: bool) -> tuple[str, str]:
+    """A join clause and a predicate (`` AND ...``) limiting a query to ``GROUPS_VIEW``'s groups."""
+    if not restrict:
+        return "", ""
+    keys = ", ".join(KEY_COLS)
+    join = f"SEMI JOIN {GROUPS_VIEW} USING ({keys})"
+    return join, f" AND ({keys}) IN (SELECT ({keys}) FROM {GROUPS_VIEW})"
 
-    lead = compute_lead_time_weeks(idx, group_cols=group_cols, metric="conversion_rate")
-    if not lead.empty:
-        idx = idx.merge(lead, on=group_cols, how="left")
 
-    con.execute("DROP TABLE IF EXISTS mart.mart_brand_trend_index;")
-    con.register("idx_df", idx)
-    con.execute("CREATE TABLE mart.mart_brand_trend_index AS SELECT * FROM idx_df;")
+def _update_lead_times(con: duckdb.DuckDBPyConnection, *, restrict: bool = False) -> None:
+    """Lead times depend on a group's whole history, so re-derive them from the stored index rows.
 
-    _print_report(idx)
+    With ``restrict`` only the groups registered as ``GROUPS_VIEW`` are re-derived.
+    """
+    keys = ", ".join(KEY_COLS)
+    only, in_groups = _group_filters(restrict)
+    hist = con.execute(
+        f"""
+        SELECT {keys}, metric, week_start, baseline_mean, recent_mean, trend_index
+        FROM {INDEX_TABLE} {only} WHERE metric = 'conversion_rate'
+        """
+    ).df()
+    lead = compute_lead_time_weeks(hist, group_cols=KEY_COLS, metric="conversion_rate")
+    if lead.empty:
+        con.execute(
+            f"UPDATE {INDEX_TABLE} SET lead_time_weeks = NULL "
+            f"WHERE lead_time_weeks IS NOT NULL{in_groups};"
+        )
+        return
+    match = " AND ".join(f"t.{c} = l.{c}" for c in KEY_COLS)
+    con.register("lead_df", lead)
+    con.execute(
+        f"""
+        UPDATE {INDEX_TABLE} AS t
+        SET lead_time_weeks = NULL
+        WHERE t.lead_time_weeks IS NOT NULL{in_groups}
+          AND NOT EXISTS (SELECT 1 FROM lead_df l WHERE {match})
+        """
+    )
+    con.execute(
+        f"""
+        UPDATE {INDEX_TABLE} AS t
+        SET lead_time_weeks = l.lead_time_weeks
+        FROM lead_df l
+        WHERE {match} AND t.lead_time_weeks IS DISTINCT FROM l.lead_time_weeks
+        """
+    )
+    con.unregister("lead_df")
 
 
 def _print_report(idx: pd.DataFrame) -> None:
@@ -42,7 +532,10 @@ def _print_report(idx: pd.DataFrame) -> None:
 
     def show(flag: str, title: str, ascending: bool) -> None:
         t = Table(title=title)
-        cols = ["brand", "region", "gender", "category", "silhouette", "color", "metric", "trend_index", "traffic_sessions", "lead_time_weeks"]
+        cols = [
+            "brand", "region", "gender", "category", "silhouette", "color",
+            "metric", "trend_index", "traffic_sessions", "lead_time_weeks",
+        ]
         for c in cols:
             t.add_column(c)
         view = latest[latest[flag] == True].sort_values("trend_index", ascending=ascending).head(12)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import duckdb
+import pyarrow as pa
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends import profiling
+from fashion_trends.analytics.arrow_index import compute_index_table
+from fashion_trends.analytics.trend_index import TrendIndexConfig
+from fashion_trends.db import bootstrap_schemas, stage_resources
+from fashion_trends.pipelines.compute_indices import GROUP_COLS, METRICS
+
+console = Console()
+
+LEVEL_TABLE = "mart.mart_trend_index_levels"
+# Hierarchy level -> the style dimensions it keeps (the others are summed over).
+INDEX_LEVELS: dict[str, tuple[str, ...]] = {
+    "brand": ("brand",),
+    "brand_category": ("brand", "category"),
+    "category_color": ("category", "color"),
+}
+# Weekly sums per level; the rates are re-derived from them.
+SUM_COLS = ("traffic_sessions", "atc_sessions", "purchase_sessions")
+RATES = {"conversion_rate": "purchase_sessions", "atc_rate": "atc_sessions"}
+
+
+def compute_and_store_level_indices(
+    con: duckdb.DuckDBPyConnection,
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    *,
+    levels: dict[str, tuple[str, ...]] = INDEX_LEVELS,
+    workers: int = 1,
+) -> None:
+    """Computes trend indices above the style grain into mart.mart_trend_index_levels.
+
+    One ``GROUPING SETS`` scan of mart_style_weekly sums the weekly session counts of every level;
+    each level's rates are re-derived from those sums (so a level's traffic counts a session once
+    per style it viewed, as the style panel does). All levels' series are then scored together in
+    one ``compute_index_table`` pass. The table has a ``level`` column, the dimensions of every
+    level (NULL where a level does not keep one) and the columns of mart_brand_trend_index.
+    """
+    bootstrap_schemas(con)
+    with stage_resources(con, "indices"), profiling.stage(LEVEL_TABLE, "indices") as st:
+        panel = load_level_panel(con, levels)
+        if not panel.num_rows:
+            raise RuntimeError(
+                "mart.mart_style_weekly is empty. Run SQL transforms first (run-sql)."
+            )
+        idx = compute_index_table(
+            panel,
+            metric_cols=METRICS,
+            group_cols=["level", "series_key"],
+            cfg=cfg,
+            workers=workers,
+        )
+        st.rows_in, st.rows_out = panel.num_rows, idx.num_rows
+        store_level_table(con, idx, panel.select(["series_key", *_level_dims(levels)]))
+    _print_report(con, _level_dims(levels))
+
+
+def load_level_panel(
+    con: duckdb.DuckDBPyConnection, levels: dict[str, tuple[str, ...]] = INDEX_LEVELS
+) -> pa.Table:
+    """Weekly rates of every level's series as Arrow, sorted by level, series and week.
+
+    ``series_key`` numbers the (level, dimension values) series, so group boundaries never have to
+    compare the NULL dimensions a level does not keep.
+    """
+    dims = _level_dims(levels)
+    unknown = sorted(set(dims) - set(GROUP_COLS))
+    if unknown:
+        raise ValueError(f"Unknown level dimension(s) {unknown}; expected some of {GROUP_COLS}.")
+    # GROUPING() sets a bit for every rolled-up dimension, most significant first.
+    level_of = " ".join(
+        f"WHEN {_rolled_up_bits(dims, keep)} THEN '{name}'" for name, keep in levels.items()
+    )
+    sets = ", ".join(f"(week_start, {', '.join(keep)})" for keep in levels.values())
+    keys = ", ".join(dims)
+    rates = ", ".join(
+        f"safe_divide({num}, traffic_sessions) AS {rate}" for rate, num in RATES.items()
+    )
+    return pa.table(
+        con.execute(
+            f"""
+            WITH sums AS (
+              SELECT CASE GROUPING({keys}) {level_of} END AS level, {keys}, week_start,
+                {", ".join(f"SUM({c}) AS {c}" for c in SUM_COLS)}
+              FROM mart.mart_style_weekly
+              WHERE {" AND ".join(f"{d} IS NOT NULL" for d in dims)}
+              GROUP BY GROUPING SETS ({sets})
+            )
+            SELECT level, dense_rank() OVER (ORDER BY level, {keys}) AS series_key, {keys},
+              CAST(week_start AS TIMESTAMP) AS week_start,
+              CAST(traffic_sessions AS DOUBLE) AS traffic_sessions,
+              {rates}
+            FROM sums
+            ORDER BY level, series_key, week_start
+            """
+        ).arrow()
+    )
+
+
+def store_level_table(con: duckdb.DuckDBPyConnection, idx: pa.Table, labels: pa.Table) -> None:
+    """Replaces the level table with ``idx``, decoding ``series_key`` into the level dimensions."""
+    dims = [c for c in labels.column_names if c != "series_key"]
+    con.register("level_idx_arrow", idx)
+    con.register("level_labels_arrow", labels)
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {LEVEL_TABLE} AS
+        SELECT i.level, {", ".join(f"k.{d}" for d in dims)}, i.* EXCLUDE (level, series_key)
+        FROM level_idx_arrow i
+        JOIN (SELECT DISTINCT * FROM level_labels_arrow) k USING (series_key)
+        """
+    )
+    con.unregister("level_idx_arrow")
+    con.unregister("level_labels_arrow")
+
+
+def _level_dims(levels: dict[str, tuple[str, ...]]) -> list[str]:
+    """Every dimension some level keeps, in style-grain order."""
+    return [c for c in GROUP_COLS if any(c in keep for keep in levels.values())]
+
+
+def _rolled_up_bits(dims: list[str], keep: tuple[str, ...]) -> int:
+    """``GROUPING(*dims)`` of the rows that keep ``keep`` and roll up the other dimensions."""
+    return sum(1 << (len(dims) - 1 - i) for i, d in enumerate(dims) if d not in keep)
+
+
+def _print_report(con: duckdb.DuckDBPyConnection, dims: list[str]) -> None:
+    rows = con.execute(
+        f"""
+        SELECT level, COUNT(DISTINCT ({", ".join(dims)})), COUNT(*),
+          count_if(is_emerging AND week_start = latest),
+          count_if(is_fatiguing AND week_start = latest)
+        FROM (SELECT *, MAX(week_start) OVER () AS latest FROM {LEVEL_TABLE})
+        GROUP BY level ORDER BY level
+        """
+    ).fetchall()
+    t = Table(title="Trend indices by level (latest week)")
+    for c in ["level", "series", "rows", "emerging", "fatiguing"]:
+        t.add_column(c)
+    for r in rows:
+        t.add_row(*(str(v) for v in r))
+    console.print(t)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import duckdb
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends.pipelines.ingest import RAW_SCHEMAS, discover_raw_files, source_sql
+
+console = Console()
+
+# Large raw tables are written as Hive-style date=YYYY-MM-DD partitions (orders derive it from
+# order_ts).
+PARTITION_COLUMNS = {
+    "web_events": "date",
+    "orders": "CAST(order_ts AS DATE)",
+}
+
+
+def typed_select(table: str, relation: str) -> str:
+    """SELECT casting ``relation``'s columns to the raw table's declared types."""
+    casts = ", ".join(f"CAST({c} AS {t}) AS {c}" for c, t in RAW_SCHEMAS[table].items())
+    return f"SELECT {casts} FROM {relation}"
+
+
+def write_parquet_table(
+    con: duckdb.DuckDBPyConnection,
+    select_sql: str,
+    out_dir: Path,
+    table: str,
+    *,
+    file_prefix: str = "part",
+) -> Path:
+    """Writes a raw table as Parquet: date partitions under ``<table>/`` or ``<table>.parquet``."""
+    if table not in PARTITION_COLUMNS:
+        out = out_dir / f"{table}.parquet"
+        con.execute(
+            f"COPY ({select_sql}) TO '{out.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD);"
+        )
+        return out
+
+    out = out_dir / table
+    out.mkdir(parents=True, exist_ok=True)
+    columns = ", ".join(c for c in RAW_SCHEMAS[table] if c != "date")
+    con.execute(
+        f"""
+        COPY (SELECT {columns}, {PARTITION_COLUMNS[table]} AS date FROM ({select_sql}))
+        TO '{out.as_posix()}'
+        (FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (date), OVERWRITE_OR_IGNORE,
+         FILENAME_PATTERN '{file_prefix}_{{i}}');
+        """
+    )
+    return out
+
+
+def convert_raw(src_dir: Path, dst_dir: Path) -> dict[str, tuple[int, int]]:
+    """Converts the CSV raw layer in ``src_dir`` to Parquet in ``dst_dir``.
+
+    Returns ``{table: (csv_bytes, parquet_bytes)}`` and prints the size comparison.
+    """
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect()
+    sizes: dict[str, tuple[int, int]] = {}
+    for table in RAW_SCHEMAS:
+        files = [p for p in discover_raw_files(src_dir, table) if p.suffix == ".csv"]
+        if not files:
+            raise FileNotFoundError(f"Missing {src_dir / table}.csv. Run generate-data first.")
+        console.print(f"[bold]Converting[/bold] {table} ({len(files)} CSV file(s)) → Parquet")
+        shutil.rmtree(dst_dir / table, ignore_errors=True)
+        (dst_dir / f"{table}.parquet").unlink(missing_ok=True)
+        out = write_parquet_table(con, source_sql(table, files), dst_dir, table)
+        sizes[table] = (sum(p.stat().st_size for p in files), _size_on_disk(out))
+
+    t = Table(title=f"Raw layer: CSV ({src_dir}) vs Parquet ({dst_dir})")
+    for c in ["table", "csv_mb", "parquet_mb", "ratio"]:
+        t.add_column(c)
+    for table, (csv_bytes, pq_bytes) in sizes.items():
+        ratio = csv_bytes / max(pq_bytes, 1)
+        t.add_row(table, f"{csv_bytes / 1e6:.2f}", f"{pq_bytes / 1e6:.2f}", f"{ratio:.1f}x")
+    console.print(t)
+    return sizes
+
+
+def _size_on_disk(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*.parquet"))
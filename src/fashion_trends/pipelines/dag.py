@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from collections.abc import Callable, Collection
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import duckdb
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends.analytics.trend_index import TrendIndexConfig
+from fashion_trends.db import bootstrap_schemas, cursor, table_exists
+from fashion_trends.pipelines.compute_indices import (
+    INDEX_TABLE,
+    TREND_INDEX_SQL,
+    compute_and_store_indices,
+)
+from fashion_trends.pipelines.compute_level_indices import (
+    INDEX_LEVELS,
+    LEVEL_TABLE,
+    compute_and_store_level_indices,
+)
+from fashion_trends.pipelines.export_tableau import EXPORTS, export_csvs, table_fingerprint
+from fashion_trends.pipelines.ingest import (
+    RAW_SCHEMAS,
+    discover_raw_files,
+    ensure_manifest,
+    ingest_table,
+)
+from fashion_trends.pipelines.run_sql import (
+    DEFAULT_LOOKBACK_WEEKS,
+    MartModel,
+    ensure_builds,
+    run_incremental,
+    split_statements,
+    statement_target,
+    with_session_mode,
+)
+from fashion_trends.settings import settings
+
+console = Console()
+
+FINGERPRINT_TABLE = "meta.pipeline_fingerprints"
+
+RELATION_REF = re.compile(r"\b((?:raw|staging|mart)\.\w+)\b")
+
+
+@dataclass(frozen=True)
+class Node:
+    """One pipeline step: what it produces, what it reads, and the inputs that define its result.
+
+    ``definition`` is everything besides upstream results that determines the output (SQL text,
+    config values, raw file stats). ``run`` receives a cursor and whether a full rebuild is needed
+    because the definition of the node or of one of its ancestors changed.
+    """
+
+    name: str
+    kind: str
+    deps: tuple[str, ...]
+    definition: str
+    run: Callable[[duckdb.DuckDBPyConnection, bool], object]
+
+
+def build_dag(
+    raw_dir: Path,
+    sql_dir: Path,
+    export_dir: Path,
+    *,
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    engine: str = "python",
+    lookback_weeks: int = DEFAULT_LOOKBACK_WEEKS,
+    index_chunk_rows: int | None = None,
+    approx_sessions: Collection[str] | None = None,
+    sketches: bool | None = None,
+) -> dict[str, Node]:
+    """Ingest per raw table → every statement in ``sql_dir`` → compute-indices (style grain and
+    levels) → export-tableau.
+
+    SQL dependencies are read from the ``raw.``/``staging.``/``mart.`` relations and macros each
+    statement references. A node told to rebuild fully reloads its raw table or refreshes its mart
+    from all history; otherwise ingest appends new files and marts rebuild the touched weeks. The
+    export skips unchanged extracts by their own fingerprints either way. Marts in
+    ``approx_sessions`` (default: ``settings.approx_session_marts``) count sessions from sketches,
+    which are only built then or with ``sketches`` (default: ``settings.session_sketches``).
+    """
+    approx = settings.approx_session_marts if approx_sessions is None else approx_sessions
+    sketches = settings.session_sketches if sketches is None else sketches
+    nodes: dict[str, Node] = {}
+    for table in RAW_SCHEMAS:
+        # order_items dates come from raw.orders.
+        deps = ("raw.orders",) if table == "order_items" else ()
+        nodes[f"raw.{table}"] = Node(
+            f"raw.{table}",
+            "ingest",
+            deps,
+            json.dumps(_file_stats(discover_raw_files(raw_dir, table))),
+            lambda con, full, table=table: ingest_table(con, raw_dir, table, append=not full),
+        )
+
+    sql_files = sorted(p for p in sql_dir.glob("*.sql") if p.is_file())
+    if not sql_files:
+        raise RuntimeError(f"No SQL files found in {sql_dir}")
+    macros: list[str] = []
+    for path in sql_files:
+        for i, stmt in enumerate(split_statements(path.read_text(encoding="utf-8"))):
+            stmt = with_session_mode(stmt, approx, sketches=sketches)
+            text = stmt.statement if isinstance(stmt, MartModel) else stmt
+            created = statement_target(text)
+            name = created or f"{path.name}#{i}"
+            calls = {m for m in macros if re.search(rf"\b{m}\s*\(", text)}
+            refs = set(RELATION_REF.findall(text)) | calls
+            nodes[name] = Node(
+                name,
+                "sql",
+                _known(refs - {name}, nodes),
+                stmt.definition if isinstance(stmt, MartModel) else stmt,
+                lambda con, full, stmt=stmt: run_incremental(
+                    con,
+                    [stmt],
+                    full_refresh=full,
+                    lookback_weeks=lookback_weeks,
+                    approx_sessions=approx,
+                    sketches=sketches,
+                ),
+            )
+            if created and re.match(r"CREATE\s+(?:OR\s+REPLACE\s+)?MACRO", text, re.IGNORECASE):
+                macros.append(name)
+
+    index_def = {"config": asdict(cfg), "engine": engine}
+    if engine == "sql":
+        index_def["sql"] = TREND_INDEX_SQL.read_text(encoding="utf-8")
+    nodes[INDEX_TABLE] = Node(
+        INDEX_TABLE,
+        "indices",
+        ("mart.mart_style_weekly",),
+        json.dumps(index_def, sort_keys=True),
+        lambda con, full: compute_and_store_indices(
+            con, cfg, engine=engine, chunk_rows=index_chunk_rows
+        ),
+    )
+    nodes[LEVEL_TABLE] = Node(
+        LEVEL_TABLE,
+        "indices",
+        _known({"mart.mart_style_weekly", "safe_divide"}, nodes),
+        json.dumps({"config": asdict(cfg), "levels": INDEX_LEVELS}, sort_keys=True),
+        lambda con, full: compute_and_store_level_indices(con, cfg),
+    )
+    export_refs = {ref for sql in EXPORTS.values() for ref in RELATION_REF.findall(sql)}
+    nodes["export"] = Node(
+        "export",
+        "export",
+        _known(export_refs, nodes),
+        json.dumps({"export_dir": export_dir.as_posix(), "exports": EXPORTS}, sort_keys=True),
+        lambda con, full: export_csvs(con, export_dir, workers=1),
+    )
+    return nodes
+
+
+def definition_hashes(nodes: dict[str, Node]) -> dict[str, str]:
+    """Hash of each node's definition chained through its ancestors' (raw file stats left out).
+
+    A change means the node must be rebuilt from scratch rather than incrementally.
+    """
+    out: dict[str, str] = {}
+
+    def visit(name: str) -> str:
+        if name not in out:
+            node = nodes[name]
+            own = "" if node.kind == "ingest" else node.definition
+            out[name] = _sha(node.kind, own, *(visit(d) for d in node.deps))
+        return out[name]
+
+    for name in nodes:
+        visit(name)
+    return out
+
+
+def run_pipeline(
+    con: duckdb.DuckDBPyConnection,
+    nodes: dict[str, Node],
+    *,
+    changed_only: bool = False,
+    workers: int = 4,
+) -> dict[str, str]:
+    """Runs the DAG, returning ``{node: "ran" | "skipped"}``.
+
+    Nodes whose dependencies are done run concurrently (up to ``workers``) on separate cursors of
+    ``con``. A node's fingerprint hashes its definition with the output fingerprints of its
+    dependencies: a row-hash checksum for tables built by SQL or compute-indices, the input
+    fingerprint otherwise. With ``changed_only`` a node is skipped when its fingerprint matches the
+    one stored in ``meta.pipeline_fingerprints`` by the last successful run and its output still
+    exists, so a rebuild that reproduces the same table does not ripple further downstream.
+    """
+    bootstrap_schemas(con)
+    ensure_manifest(con)
+    ensure_builds(con)
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+          node VARCHAR,
+          kind VARCHAR,
+          fingerprint VARCHAR,
+          definition_hash VARCHAR,
+          output_fingerprint VARCHAR,
+          seconds DOUBLE,
+          run_at TIMESTAMP
+        );
+        """
+    )
+    definitions = definition_hashes(nodes)
+    stored = {
+        row[0]: row[1:]
+        for row in con.execute(
+            "SELECT node, fingerprint, definition_hash, output_fingerprint "
+            f"FROM {FINGERPRINT_TABLE}"
+        ).fetchall()
+    }
+
+    status: dict[str, str] = {}
+    seconds: dict[str, float] = {}
+    current: dict[str, str] = {}
+    outputs: dict[str, str] = {}
+    pending = dict(nodes)
+    running: dict[Future, str] = {}
+
+    def execute(node: Node, full: bool) -> tuple[float, str]:
+        cur = cursor(con)
+        try:
+            t0 = time.perf_counter()
+            node.run(cur, full)
+            return time.perf_counter() - t0, _output_fingerprint(cur, node, current[node.name])
+        finally:
+            cur.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            for name, node in list(pending.items()):
+                if not all(d in status for d in node.deps):
+                    continue
+                del pending[name]
+                current[name] = _sha(node.kind, node.definition, *(outputs[d] for d in node.deps))
+                prev = stored.get(name)
+                if changed_only and prev and prev[0] == current[name] and _output_exists(con, node):
+                    status[name] = "skipped"
+                    outputs[name] = prev[2]
+                    # Same inputs as last time even if an ancestor was redefined: the output is
+                    # current.
+                    con.execute(
+                        f"UPDATE {FINGERPRINT_TABLE} SET definition_hash = ? WHERE node = ?",
+                        [definitions[name], name],
+                    )
+                    continue
+                full = not changed_only or prev is None or prev[1] != definitions[name]
+                console.print(f"[bold]▶ {node.kind}[/bold] {name}")
+                running[pool.submit(execute, node, full)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    seconds[name], outputs[name] = future.result()
+                except Exception:
+                    pending.clear()
+                    wait(running)
+                    raise
+                status[name] = "ran"
+                con.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE node = ?", [name])
+                con.execute(
+                    f"INSERT INTO {FINGERPRINT_TABLE} VALUES (?, ?, ?, ?, ?, ?, now())",
+                    [
+                        name, nodes[name].kind, current[name], definitions[name], outputs[name],
+                        seconds[name],
+                    ],
+                )
+
+    _print_report(nodes, status, seconds)
+    return status
+
+
+def _output_exists(con: duckdb.DuckDBPyConnection, node: Node) -> bool:
+    if RELATION_REF.fullmatch(node.name):
+        return table_exists(con, node.name) or _type_exists(con, node.name)
+    return True
+
+
+def _type_exists(con: duckdb.DuckDBPyConnection, name: str) -> bool:
+    schema, type_name = name.split(".", 1)
+    return bool(
+        con.execute(
+            "SELECT COUNT(*) FROM duckdb_types() WHERE schema_name = ? AND type_name = ?",
+            [schema, type_name],
+        ).fetchone()[0]
+    )
+
+
+def _output_fingerprint(con: duckdb.DuckDBPyConnection, node: Node, fingerprint: str) -> str:
+    """Content checksum of tables built by SQL or compute-indices and the values of ENUM types; raw
+    tables, views and macros are identified by their input fingerprint (checksumming a view would
+    mean running it)."""
+    if node.kind in ("sql", "indices") and RELATION_REF.fullmatch(node.name):
+        schema, table = node.name.split(".", 1)
+        kind = con.execute(
+            "SELECT table_type FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_name = ?",
+            [schema, table],
+        ).fetchone()
+        if kind and kind[0] == "BASE TABLE":
+            return table_fingerprint(con, f"SELECT * FROM {node.name}")[1]
+        if kind is None and _type_exists(con, node.name):
+            return _sha(con.execute(f"SELECT enum_range(NULL::{node.name})::VARCHAR").fetchone()[0])
+    return fingerprint
+
+
+def _known(refs: set[str], nodes: dict[str, Node]) -> tuple[str, ...]:
+    return tuple(sorted(r for r in refs if r in nodes))
+
+
+def _file_stats(paths: list[Path]) -> list[tuple[str, int, float]]:
+    return [(p.as_posix(), p.stat().st_size, p.stat().st_mtime) for p in paths]
+
+
+def _sha(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _print_report(
+    nodes: dict[str, Node], status: dict[str, str], seconds: dict[str, float]
+) -> None:
+    t = Table(title="Pipeline run")
+    for c in ["node", "kind", "status", "seconds"]:
+        t.add_column(c)
+    for name, node in nodes.items():
+        took = f"{seconds[name]:.2f}" if name in seconds else ""
+        t.add_row(name, node.kind, status.get(name, ""), took)
+    console.print(t)
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 import duckdb
 from rich.console import Console
+from rich.table import Table
+
+from fashion_trends import profiling
+from fashion_trends.db import stage_resources
 
 console = Console()
 
@@ -11,12 +19,150 @@ EXPORTS = {
     "collection_health": "SELECT * FROM mart.mart_collection_health",
     "style_weekly": "SELECT * FROM mart.mart_style_weekly",
     "brand_trend_index": "SELECT * FROM mart.mart_brand_trend_index",
+    "performance_cube": "SELECT * FROM mart.mart_performance_cube",
+    "trend_index_levels": "SELECT * FROM mart.mart_trend_index_levels",
+}
+FINGERPRINT_TABLE = "meta.export_fingerprints"
+
+# format -> (file extension, COPY options)
+EXPORT_FORMATS = {
+    "csv": (".csv", "FORMAT CSV, HEADER, DELIMITER ','"),
+    "csv.gz": (".csv.gz", "FORMAT CSV, HEADER, DELIMITER ',', COMPRESSION GZIP"),
+    "csv.zst": (".csv.zst", "FORMAT CSV, HEADER, DELIMITER ',', COMPRESSION ZSTD"),
+    "parquet": (".parquet", "FORMAT PARQUET, COMPRESSION ZSTD"),
 }
+PARTITION_KEYS = ("brand", "week_start")
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    name: str
+    path: Path
+    rows: int
+    fingerprint: str
+    skipped: bool
+    seconds: float
 
 
-def export_csvs(con: duckdb.DuckDBPyConnection, export_dir: Path) -> None:
+def export_csvs(
+    con: duckdb.DuckDBPyConnection,
+    export_dir: Path,
+    *,
+    fmt: str = "csv",
+    partition_by: str | None = None,
+    workers: int = len(EXPORTS),
+    force: bool = False,
+) -> dict[str, ExportResult]:
+    """Exports the Tableau extracts as CSV (optionally gzip/zstd compressed) or Parquet.
+
+    With ``partition_by`` (``brand`` or ``week_start``) each extract becomes a Hive-style directory
+    ``<name>/<key>=<value>/`` instead of a single file. Extracts are written concurrently on
+    separate cursors. Each one is fingerprinted (row count + order-independent row-hash checksum +
+    export options) in ``meta.export_fingerprints``, and is skipped when the fingerprint matches
+    the previous export and its output still exists, unless ``force=True``.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format {fmt!r}; expected one of {sorted(EXPORT_FORMATS)}."
+        )
+    if partition_by is not None and partition_by not in PARTITION_KEYS:
+        raise ValueError(f"partition_by must be one of {PARTITION_KEYS}, got {partition_by!r}.")
     export_dir.mkdir(parents=True, exist_ok=True)
-    for name, sql in EXPORTS.items():
-        out = export_dir / f"{name}.csv"
-        console.print(f"[bold]Exporting[/bold] {name} → {out}")
-        con.execute(f"COPY ({sql}) TO '{out.as_posix()}' (HEADER, DELIMITER ',');")
+    con.execute("CREATE SCHEMA IF NOT EXISTS meta;")
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+          name VARCHAR,
+          path VARCHAR,
+          fingerprint VARCHAR,
+          row_count BIGINT,
+          exported_at TIMESTAMP
+        );
+        """
+    )
+    stored = con.execute(f"SELECT name, path, fingerprint FROM {FINGERPRINT_TABLE}").fetchall()
+    previous = {name: (path, fp) for name, path, fp in stored}
+
+    def run(name: str) -> ExportResult:
+        cur = con.cursor()
+        try:
+            prev = None if force else previous.get(name)
+            return _export_one(cur, name, export_dir, fmt, partition_by, prev)
+        finally:
+            cur.close()
+
+    with stage_resources(con, "export"), ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = {r.name: r for r in pool.map(run, EXPORTS)}
+
+    for r in results.values():
+        if not r.skipped:
+            con.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE name = ?", [r.name])
+            con.execute(
+                f"INSERT INTO {FINGERPRINT_TABLE} VALUES (?, ?, ?, ?, now())",
+                [r.name, r.path.as_posix(), r.fingerprint, r.rows],
+            )
+    _print_report(results)
+    return results
+
+
+def table_fingerprint(con: duckdb.DuckDBPyConnection, sql: str) -> tuple[int, str]:
+    """Row count and an order-independent checksum (sum of row hashes) of a query's result."""
+    rows, checksum = con.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(hash(t)::HUGEINT), 0) FROM ({sql}) t"
+    ).fetchone()
+    return rows, f"{rows}:{checksum:x}"
+
+
+def _export_one(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    export_dir: Path,
+    fmt: str,
+    partition_by: str | None,
+    previous: tuple[str, str] | None,
+) -> ExportResult:
+    t0 = time.perf_counter()
+    sql = EXPORTS[name]
+    ext, options = EXPORT_FORMATS[fmt]
+    out = export_dir / name if partition_by else export_dir / f"{name}{ext}"
+    with profiling.stage(f"export {name}", "export") as st:
+        rows, checksum = table_fingerprint(con, sql)
+        st.rows_in = rows
+        fingerprint = f"{checksum}|{fmt}|{partition_by or '-'}"
+        if previous == (out.as_posix(), fingerprint) and out.exists():
+            st.rows_out = 0
+            return ExportResult(name, out, rows, fingerprint, True, time.perf_counter() - t0)
+
+        _remove_outputs(export_dir, name)
+        if partition_by:
+            options += (
+                f", PARTITION_BY ({partition_by}), FILENAME_PATTERN 'data_{{i}}', "
+                f"FILE_EXTENSION '{ext.lstrip('.')}'"
+            )
+        st.rows_out = con.execute(f"COPY ({sql}) TO '{out.as_posix()}' ({options});").fetchone()[0]
+    return ExportResult(name, out, rows, fingerprint, False, time.perf_counter() - t0)
+
+
+def _remove_outputs(export_dir: Path, name: str) -> None:
+    """Removes earlier extracts of ``name`` in any format or layout."""
+    shutil.rmtree(export_dir / name, ignore_errors=True)
+    for ext, _ in EXPORT_FORMATS.values():
+        (export_dir / f"{name}{ext}").unlink(missing_ok=True)
+
+
+def _print_report(results: dict[str, ExportResult]) -> None:
+    t = Table(title="Tableau extracts")
+    for c in ["extract", "status", "rows", "mb", "seconds", "path"]:
+        t.add_column(c)
+    for r in results.values():
+        files = [r.path] if r.path.is_file() else [p for p in r.path.rglob("*") if p.is_file()]
+        size = sum(p.stat().st_size for p in files)
+        t.add_row(
+            r.name,
+            "unchanged" if r.skipped else "exported",
+            f"{r.rows:,}",
+            f"{size / 1e6:.2f}",
+            f"{r.seconds:.2f}",
+            str(r.path),
+        )
+    console.print(t)
@@ -1,9 +1,28 @@
 from __future__ import annotations
 
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import date
+from multiprocessing import get_context
 from pathlib import Path
+import duckdb
 import numpy as np
 import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends import profiling
+from fashion_trends.pipelines.convert_raw import (
+    PARTITION_COLUMNS,
+    typed_select,
+    write_parquet_table,
+)
+from fashion_trends.pipelines.ingest import RAW_FORMATS, RAW_SCHEMAS
+
+console = Console()
 
 
 BRANDS = [
@@ -25,14 +44,6 @@ COLORS = ["Black", "White", "Denim Blue", "Navy", "Beige", "Red", "Pink", "Green
 COLLECTIONS = ["Pre-Fall", "Fall/Winter", "Resort", "Spring/Summer", "Capsule", "Collab"]
 
 
-@dataclass(frozen=True)
-class GenConfig:
-    seed: int
-    days: int
-    n_users: int
-    out_dir: Path
-
-
 def _seasonality(t: np.ndarray) -> np.ndarray:
     return 1.0 + 0.15 * np.sin(2 * np.pi * t / 7.0) + 0.10 * np.sin(2 * np.pi * t / 365.0)
 
@@ -49,188 +60,429 @@ def _trend_signal(t: np.ndarray, start: int, slope: float, cap: float = 1.8) ->
     return 1.0 + np.clip(slope * x / 30.0, 0, cap - 1.0)
 
 
-def generate_synthetic_data(cfg: GenConfig) -> dict[str, Path]:
-    """Generate realistic synthetic retail data for demo + portfolio purposes."""
-    rng = np.random.default_rng(cfg.seed)
-    cfg.out_dir.mkdir(parents=True, exist_ok=True)
+N_PRODUCTS = 12000
+MAX_SESSIONS_PER_DAY = 120000
+# Inventory receipts are generated (and seeded) per block of products.
+RECEIPT_BLOCK = 2000
+EVENT_TYPES = ["page_view", "add_to_cart", "purchase"]
+
+# Known emerging style buckets (for backtest / demo)
+EMERGING_RULES = [
+    ("Jacquemus", "Bags", "U", "Micro", "Pink"),
+    ("Acne Studios", "Outerwear", "W", "Oversized", "Denim Blue"),
+    ("Off-White", "Tops", "M", "Utility", "Green"),
+]
+
+# Returns correlate with category + markdown (proxy for fit issues / final sale)
+CATEGORY_RETURN_BASE = {
+    "Outerwear": 0.10,
+    "Tops": 0.12,
+    "Bottoms": 0.14,
+    "Dresses": 0.16,
+    "Shoes": 0.18,
+    "Bags": 0.08,
+    "Accessories": 0.09,
+}
+
+
+@dataclass(frozen=True)
+class GenConfig:
+    seed: int
+    days: int
+    n_users: int
+    out_dir: Path
+    fmt: str = "csv"
+    # Days are generated and written in chunks of roughly this many sessions (bounds peak memory).
+    chunk_sessions: int = 200_000
+    # Days per events shard (one output file per table each) and processes to run shards on.
+    shard_days: int = 7
+    workers: int = 1
+    # Last generated day (default: today); pinned for reproducible datasets such as benchmark tiers.
+    end: date | None = None
+
+
+@dataclass(frozen=True)
+class _Catalog:
+    """Product arrays indexed by ``product_id - 1`` plus the (emerging-boosted) sampling weights."""
+
+    product_id: np.ndarray
+    weights: np.ndarray
+    list_price: np.ndarray
+    return_base: np.ndarray
+
+    @classmethod
+    def from_products(cls, products: pd.DataFrame) -> _Catalog:
+        emerging = np.zeros(len(products), dtype=bool)
+        for (b, c, g, s, col) in EMERGING_RULES:
+            emerging |= (
+                (products["brand"] == b)
+                & (products["category"] == c)
+                & (products["gender"] == g)
+                & (products["silhouette"] == s)
+                & (products["color"] == col)
+            ).to_numpy()
+        weights = np.where(emerging, 1.4, 1.0)
+        return cls(
+            product_id=products["product_id"].to_numpy(),
+            weights=weights / weights.sum(),
+            list_price=products["list_price"].to_numpy(),
+            return_base=products["category"].map(CATEGORY_RETURN_BASE).fillna(0.12).to_numpy(),
+        )
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.choice(self.product_id, size=size, replace=True, p=self.weights)
+
+
+class _RawWriter:
+    """Streams chunks of raw tables into ``out_dir``; both formats are written by DuckDB.
+
+    Without a ``shard`` a table goes to a single ``<table>.csv|.parquet``. A shard writes its own
+    files under ``<table>/``: ``part-<shard>.csv`` (chunks appended) or one Parquet part per chunk,
+    date-partitioned for ``PARTITION_COLUMNS`` tables.
+    """
+
+    def __init__(self, out_dir: Path, fmt: str, shard: int | None = None):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown raw format {fmt!r}; expected 'csv' or 'parquet'.")
+        self.out_dir, self.fmt, self.shard = out_dir, fmt, shard
+        self.rows: dict[str, int] = {}
+        self.chunks: dict[str, int] = {}
+        self._con = duckdb.connect()
+
+    def path(self, table: str, chunk: int = 0) -> Path:
+        if self.shard is None:
+            return self.out_dir / f"{table}.{self.fmt}"
+        name = f"part-{self.shard:05d}"
+        if self.fmt != "csv":
+            name += f"-{chunk:03d}"
+        return self.out_dir / table / f"{name}.{self.fmt}"
+
+    def write(self, df: pd.DataFrame, table: str) -> None:
+        chunk = self.chunks.get(table, 0)
+        path = self.path(table, chunk)
+        self._con.register("raw_df", df)
+        try:
+            select_sql = typed_select(table, "raw_df")
+            if self.fmt == "csv":
+                tmp = path.with_name(path.name + ".tmp")
+                header = str(chunk == 0).lower()
+                self._con.execute(
+                    f"COPY ({select_sql}) TO '{tmp.as_posix()}' (FORMAT CSV, HEADER {header});"
+                )
+                with path.open("ab") as dst, tmp.open("rb") as src:
+                    shutil.copyfileobj(src, dst)
+                tmp.unlink()
+            elif table in PARTITION_COLUMNS:
+                write_parquet_table(
+                    self._con, select_sql, self.out_dir, table, file_prefix=path.stem
+                )
+            else:
+                self._con.execute(
+                    f"COPY ({select_sql}) TO '{path.as_posix()}' "
+                    "(FORMAT PARQUET, COMPRESSION ZSTD);"
+                )
+        finally:
+            self._con.unregister("raw_df")
+        self.chunks[table] = chunk + 1
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+
+
+@dataclass(frozen=True)
+class _Shard:
+    """One independently seeded unit of output, written to its own files.
+
+    ``kind="receipts"``: inventory receipts for product rows ``[lo, hi)``, seeded by ``seeds[0]``.
+    ``kind="events"``: web events, orders and items for day indices ``[lo, hi)``, with one
+    (funnel, detail) seed pair per day and order ids starting at ``first_order_id``.
+    """
+
+    kind: str
+    index: int
+    cfg: GenConfig
+    start: pd.Timestamp
+    lo: int
+    hi: int
+    seeds: tuple
+    first_order_id: int = 1
 
-    end = pd.Timestamp.today().normalize()
+
+def generate_synthetic_data(cfg: GenConfig) -> dict[str, Path]:
+    """Generate realistic synthetic retail data for demo + portfolio purposes.
+
+    Everything is generated with array operations. Output is split into shards: blocks of
+    ``RECEIPT_BLOCK`` products for inventory receipts and ranges of ``cfg.shard_days`` days for
+    events, orders and items. Each shard draws from its own ``SeedSequence`` children of
+    ``cfg.seed``, writes its own ``<table>/part-*`` files, and streams them in chunks of about
+    ``cfg.chunk_sessions`` sessions, so peak memory does not grow with ``days`` or ``n_users``.
+    Shards run on ``cfg.workers`` processes (``0`` = one per core); the files do not depend on
+    ``workers`` or ``chunk_sessions``.
+    """
+    t0 = time.perf_counter()
+    _reset_raw_dir(cfg.out_dir)
+
+    end = pd.Timestamp(cfg.end) if cfg.end else pd.Timestamp.today().normalize()
     start = end - pd.Timedelta(days=cfg.days)
-    dates = pd.date_range(start, end, freq="D")
-    t = np.arange(len(dates))
+    n_days = cfg.days + 1
+
+    products = _product_catalog(cfg.seed)
+    writer = _RawWriter(cfg.out_dir, cfg.fmt)
+    writer.write(products, "products")
+
+    receipts_seq, events_seq = np.random.SeedSequence(cfg.seed).spawn(2)
+    blocks = range(0, N_PRODUCTS, RECEIPT_BLOCK)
+    shards = [
+        _Shard("receipts", k, cfg, start, lo, min(lo + RECEIPT_BLOCK, N_PRODUCTS), (seq,))
+        for k, (lo, seq) in enumerate(zip(blocks, receipts_seq.spawn(len(blocks)), strict=True))
+    ]
+
+    # Orders are numbered 1..N in day order. The per-day order count only depends on the funnel
+    # draws, which have their own seed, so it is known before any shard runs.
+    n_sessions, lift, promo = _daily_plan(cfg)
+    day_seeds = [tuple(seq.spawn(2)) for seq in events_seq.spawn(n_days)]
+    n_orders = [
+        int(_funnel(n_sessions[d], lift[d], promo[d], np.random.default_rng(seeds[0]))[1].sum())
+        for d, seeds in enumerate(day_seeds)
+    ]
+    first_order_id = 1 + np.concatenate([[0], np.cumsum(n_orders)])
+    for k, lo in enumerate(range(0, n_days, cfg.shard_days)):
+        hi = min(lo + cfg.shard_days, n_days)
+        seeds = tuple(day_seeds[lo:hi])
+        shards.append(_Shard("events", k, cfg, start, lo, hi, seeds, int(first_order_id[lo])))
+
+    workers = min(max(1, cfg.workers or os.cpu_count() or 1), len(shards))
+    with profiling.stage("generate shards", "generate") as st:
+        if workers == 1:
+            results = [_run_shard(shard) for shard in shards]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+                results = list(pool.map(_run_shard, shards))
+        st.rows_out = sum(n for shard_rows in results for n in shard_rows.values())
+
+    rows = {"products": len(products)}
+    files = {"products": 1}
+    for shard_rows in results:
+        for table, n in shard_rows.items():
+            rows[table] = rows.get(table, 0) + n
+            files[table] = files.get(table, 0) + 1
+    _print_report(cfg, rows, files, workers, time.perf_counter() - t0)
+    return {
+        table: writer.path("products") if table == "products" else cfg.out_dir / table
+        for table in RAW_SCHEMAS
+    }
+
 
-    # Product catalog
-    n_products = 12000
+def _reset_raw_dir(out_dir: Path) -> None:
+    """Removes any previous raw dataset so stale files (e.g. of another format) are not ingested."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for table in RAW_SCHEMAS:
+        shutil.rmtree(out_dir / table, ignore_errors=True)
+        for ext in RAW_FORMATS:
+            (out_dir / f"{table}{ext}").unlink(missing_ok=True)
+        if table != "products":
+            (out_dir / table).mkdir()
+
+
+def _daily_plan(cfg: GenConfig) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sessions per day (bounded for runtime), trend lift after ~midpoint, and promo intensity."""
+    t = np.arange(cfg.days + 1)
+    promo = _promo_pulses(t)
+    n_sessions = np.minimum(
+        int(cfg.n_users * 0.11) * _seasonality(t) * promo, MAX_SESSIONS_PER_DAY
+    ).astype(int)
+    lift = _trend_signal(t, start=int(cfg.days * 0.45), slope=0.9)
+    return n_sessions, lift, promo
+
+
+def _run_shard(shard: _Shard) -> dict[str, int]:
+    cfg = shard.cfg
+    writer = _RawWriter(cfg.out_dir, cfg.fmt, shard=shard.index)
+    catalog = _Catalog.from_products(_product_catalog(cfg.seed))
+    if shard.kind == "receipts":
+        weeks = pd.date_range(shard.start, shard.start + pd.Timedelta(days=cfg.days), freq="W-MON")
+        rng = np.random.default_rng(shard.seeds[0])
+        receipts = _inventory_receipts(catalog.product_id[shard.lo : shard.hi], weeks, rng)
+        writer.write(receipts, "inventory_receipts")
+        return writer.rows
+
+    n_sessions, lift, promo = _daily_plan(cfg)
+    chunk: list[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]] = []
+    next_order_id, chunk_sessions = shard.first_order_id, 0
+    for day_i, (funnel_seq, detail_seq) in zip(
+        range(shard.lo, shard.hi), shard.seeds, strict=True
+    ):
+        tables = _day_tables(
+            day_i,
+            shard.start + pd.Timedelta(days=day_i),
+            n_sessions[day_i],
+            lift[day_i],
+            promo[day_i],
+            catalog,
+            cfg.n_users,
+            next_order_id,
+            np.random.default_rng(funnel_seq),
+            np.random.default_rng(detail_seq),
+        )
+        chunk.append(tables)
+        next_order_id += len(tables[1])
+        chunk_sessions += n_sessions[day_i]
+        if chunk_sessions >= cfg.chunk_sessions or day_i == shard.hi - 1:
+            names = ["web_events", "orders", "order_items"]
+            for table, frames in zip(names, zip(*chunk, strict=True), strict=True):
+                writer.write(pd.concat(frames, ignore_index=True), table)
+            chunk, chunk_sessions = [], 0
+    return writer.rows
+
+
+def _product_catalog(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
     products = pd.DataFrame(
         {
-            "product_id": np.arange(1, n_products + 1),
-            "brand": rng.choice(BRANDS, size=n_products),
-            "category": rng.choice(CATEGORIES, size=n_products, p=[0.16, 0.18, 0.16, 0.10, 0.16, 0.12, 0.12]),
-            "gender": rng.choice(GENDERS, size=n_products, p=[0.46, 0.38, 0.16]),
-            "collection": rng.choice(COLLECTIONS, size=n_products, p=[0.16, 0.22, 0.12, 0.26, 0.14, 0.10]),
-            "silhouette": rng.choice(SILHOUETTES, size=n_products),
-            "color": rng.choice(COLORS, size=n_products, p=[0.18, 0.09, 0.10, 0.09, 0.10, 0.06, 0.06, 0.06, 0.09, 0.11, 0.06]),
-            "list_price": rng.normal(loc=420, scale=220, size=n_products).clip(35, 2600).round(2),
+            "product_id": np.arange(1, N_PRODUCTS + 1),
+            "brand": rng.choice(BRANDS, size=N_PRODUCTS),
+            "category": rng.choice(
+                CATEGORIES, size=N_PRODUCTS, p=[0.16, 0.18, 0.16, 0.10, 0.16, 0.12, 0.12]
+            ),
+            "gender": rng.choice(GENDERS, size=N_PRODUCTS, p=[0.46, 0.38, 0.16]),
+            "collection": rng.choice(
+                COLLECTIONS, size=N_PRODUCTS, p=[0.16, 0.22, 0.12, 0.26, 0.14, 0.10]
+            ),
+            "silhouette": rng.choice(SILHOUETTES, size=N_PRODUCTS),
+            "color": rng.choice(
+                COLORS,
+                size=N_PRODUCTS,
+                p=[0.18, 0.09, 0.10, 0.09, 0.10, 0.06, 0.06, 0.06, 0.09, 0.11, 0.06],
+            ),
+            "list_price": rng.normal(loc=420, scale=220, size=N_PRODUCTS).clip(35, 2600).round(2),
+        }
+    )
+    # Inject known emerging style buckets. The same random_state is used for every rule, so later
+    # rules overwrite the same products (kept as-is for continuity with published datasets).
+    for (b, c, g, s, col) in EMERGING_RULES:
+        idx = products.sample(frac=0.015, random_state=seed).index
+        products.loc[idx, ["brand", "category", "gender", "silhouette", "color"]] = [
+            b, c, g, s, col,
+        ]
+    return products
+
+
+def _inventory_receipts(
+    product_ids: np.ndarray, weeks: pd.DatetimeIndex, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Weekly receipts around a per-product base level."""
+    base = rng.integers(8, 80, size=len(product_ids))[:, None]
+    units = rng.normal(
+        loc=base, scale=base * 0.25, size=(len(product_ids), len(weeks))
+    ).astype(np.int64)
+    return pd.DataFrame(
+        {
+            "product_id": np.repeat(product_ids, len(weeks)),
+            "week_start": pd.Categorical.from_codes(
+                np.tile(np.arange(len(weeks)), len(product_ids)), weeks.strftime("%Y-%m-%d")
+            ),
+            "units_received": np.maximum(units, 0).ravel(),
         }
     )
 
-    # Inject known emerging style buckets (for backtest / demo)
-    emerging_rules = [
-        ("Jacquemus", "Bags", "U", "Micro", "Pink"),
-        ("Acne Studios", "Outerwear", "W", "Oversized", "Denim Blue"),
-        ("Off-White", "Tops", "M", "Utility", "Green"),
-    ]
-    for (b, c, g, s, col) in emerging_rules:
-        idx = products.sample(frac=0.015, random_state=cfg.seed).index
-        products.loc[idx, "brand"] = b
-        products.loc[idx, "category"] = c
-        products.loc[idx, "gender"] = g
-        products.loc[idx, "silhouette"] = s
-        products.loc[idx, "color"] = col
-
-    products_path = cfg.out_dir / "products.csv"
-    products.to_csv(products_path, index=False)
-
-    # Inventory receipts (weekly)
-    receipts_rows = []
-    for pid in products["product_id"].to_numpy():
-        base = rng.integers(8, 80)
-        for d in pd.date_range(start, end, freq="W-MON"):
-            units = max(0, int(rng.normal(loc=base, scale=base * 0.25)))
-            receipts_rows.append((int(pid), d.date().isoformat(), units))
-    inv = pd.DataFrame(receipts_rows, columns=["product_id", "week_start", "units_received"])
-    inv_path = cfg.out_dir / "inventory_receipts.csv"
-    inv.to_csv(inv_path, index=False)
-
-    # Sessions per day (bounded for runtime)
-    n_sessions_per_day = int(cfg.n_users * 0.11)
-    sessions = []
-    for day_i, day in enumerate(dates):
-        season = float(_seasonality(np.array([day_i]))[0] * _promo_pulses(np.array([day_i]))[0])
-        n_sessions = int(min(n_sessions_per_day * season, 120000))
-        user_ids = rng.integers(1, cfg.n_users + 1, size=n_sessions)
-        region = rng.choice(REGIONS, size=n_sessions, p=[0.46, 0.34, 0.20])
-        session_ids = [f"s{day_i:04d}_{j:06d}" for j in range(n_sessions)]
-        sessions.append(pd.DataFrame({"date": day.date().isoformat(), "user_id": user_ids, "region": region, "session_id": session_ids}))
-    sessions_df = pd.concat(sessions, ignore_index=True)
-
-    # Trend lift after ~midpoint
-    lift = pd.DataFrame({"date": dates.date.astype(str), "lift": _trend_signal(t, start=int(cfg.days * 0.45), slope=0.9)})
-    sessions_df = sessions_df.merge(lift, on="date", how="left")
+
+def _funnel(
+    n: int, lift: float, promo: float, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Add-to-cart (likelier with lift) and purchase (given ATC, likelier with promo) flags."""
+    atc = rng.random(n) < np.clip(0.075 + 0.030 * (lift - 1.0), 0.04, 0.16)
+    purchased = atc & (rng.random(n) < np.clip(0.18 + 0.10 * (promo - 1.0), 0.12, 0.35))
+    return atc, purchased
+
+
+def _day_tables(
+    day_i: int,
+    day: pd.Timestamp,
+    n: int,
+    lift: float,
+    promo: float,
+    catalog: _Catalog,
+    n_users: int,
+    first_order_id: int,
+    funnel_rng: np.random.Generator,
+    rng: np.random.Generator,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """One day of web events, orders and order items."""
+    atc, purchased = _funnel(n, lift, promo, funnel_rng)
+    user_id = rng.integers(1, n_users + 1, size=n)
+    region = rng.choice(len(REGIONS), size=n, p=[0.46, 0.34, 0.20])
+    session_id = np.char.add(
+        f"s{day_i:04d}_", np.char.zfill(np.arange(n).astype(str), 6)
+    ).astype(object)
 
     # Page views 1–6 per session
-    pv_counts = rng.integers(1, 7, size=len(sessions_df))
-    session_rep = sessions_df.loc[sessions_df.index.repeat(pv_counts)].reset_index(drop=True)
-
-    # Weighted product sampling: lift boosts emerging buckets
-    prod = products[["product_id", "brand", "category", "gender", "silhouette", "color"]].copy()
-    prod["is_emerging_bucket"] = 0
-    for (b, c, g, s, col) in emerging_rules:
-        mask = (
-            (prod["brand"] == b)
-            & (prod["category"] == c)
-            & (prod["gender"] == g)
-            & (prod["silhouette"] == s)
-            & (prod["color"] == col)
-        )
-        prod.loc[mask, "is_emerging_bucket"] = 1
-    weights = np.where(prod["is_emerging_bucket"].to_numpy() == 1, 1.4, 1.0).astype(float)
-    weights = weights / weights.sum()
-
-    page_view_products = rng.choice(prod["product_id"].to_numpy(), size=len(session_rep), replace=True, p=weights)
-    page_views = session_rep[["date", "user_id", "region", "session_id"]].copy()
-    page_views["event_type"] = "page_view"
-    page_views["product_id"] = page_view_products
-    page_views["ts"] = pd.to_datetime(page_views["date"]) + pd.to_timedelta(rng.integers(0, 24 * 3600, size=len(page_views)), unit="s")
-
-    # Add-to-cart probability increases with lift
-    atc_prob = (0.075 + 0.030 * (sessions_df["lift"].to_numpy() - 1.0)).clip(0.04, 0.16)
-    atc_flags = rng.random(len(sessions_df)) < atc_prob
-    atc_sessions = sessions_df.loc[atc_flags].copy()
-    atc_sessions["event_type"] = "add_to_cart"
-    atc_sessions["product_id"] = rng.choice(prod["product_id"].to_numpy(), size=len(atc_sessions), replace=True, p=weights)
-    atc_sessions["ts"] = pd.to_datetime(atc_sessions["date"]) + pd.to_timedelta(rng.integers(0, 24 * 3600, size=len(atc_sessions)), unit="s")
-
-    # Purchases conditional on ATC + promo intensity
-    day_index = (pd.to_datetime(sessions_df["date"]) - pd.to_datetime(start.date())).dt.days.to_numpy()
-    promo = _promo_pulses(day_index)
-    purchase_prob = (0.18 + 0.10 * (promo - 1.0)).clip(0.12, 0.35)
-    purchase_flags = atc_flags & (rng.random(len(sessions_df)) < purchase_prob)
-    purchase_sessions = sessions_df.loc[purchase_flags].copy()
-    purchase_sessions["event_type"] = "purchase"
-    purchase_sessions["product_id"] = rng.choice(prod["product_id"].to_numpy(), size=len(purchase_sessions), replace=True, p=weights)
-    purchase_sessions["ts"] = pd.to_datetime(purchase_sessions["date"]) + pd.to_timedelta(rng.integers(0, 24 * 3600, size=len(purchase_sessions)), unit="s")
-
-    web_events = pd.concat(
-        [
-            page_views[["ts", "date", "user_id", "session_id", "region", "event_type", "product_id"]],
-            atc_sessions[["ts", "date", "user_id", "session_id", "region", "event_type", "product_id"]],
-            purchase_sessions[["ts", "date", "user_id", "session_id", "region", "event_type", "product_id"]],
-        ],
-        ignore_index=True,
-    ).sort_values("ts")
-    web_path = cfg.out_dir / "web_events.csv"
-    web_events.to_csv(web_path, index=False)
-
-    # Orders + items
-    purchase_sessions = purchase_sessions.reset_index(drop=True)
-    n_orders = len(purchase_sessions)
-    order_ids = np.arange(1, n_orders + 1)
-    items_per_order = rng.integers(1, 4, size=n_orders)
-
-    day_index_orders = (pd.to_datetime(purchase_sessions["date"]) - pd.to_datetime(start.date())).dt.days.to_numpy()
-    promo_o = _promo_pulses(day_index_orders)
-    markdown = (0.05 + 0.28 * (promo_o - 1.0) + rng.normal(0, 0.03, size=n_orders)).clip(0.0, 0.55)
+    pv_counts = rng.integers(1, 7, size=n)
+    sess = np.concatenate(
+        [np.repeat(np.arange(n), pv_counts), np.flatnonzero(atc), np.flatnonzero(purchased)]
+    )
+    n_orders = int(purchased.sum())
+    event_type = np.repeat(
+        np.arange(len(EVENT_TYPES)), [len(sess) - atc.sum() - n_orders, atc.sum(), n_orders]
+    )
+    product_id = catalog.sample(rng, len(sess))
+    ts = day.to_datetime64() + rng.integers(0, 24 * 3600, size=len(sess)).astype("timedelta64[s]")
+
+    # Strings go in as categoricals / object arrays, which DuckDB reads without conversion.
+    by_ts = np.argsort(ts, kind="stable")
+    web_events = pd.DataFrame(
+        {
+            "ts": ts[by_ts],
+            "date": pd.Categorical.from_codes(
+                np.zeros(len(sess), dtype=np.int8), [day.date().isoformat()]
+            ),
+            "user_id": user_id[sess][by_ts],
+            "session_id": pd.Series(session_id[sess][by_ts], dtype=object),
+            "region": pd.Categorical.from_codes(region[sess][by_ts], REGIONS),
+            "event_type": pd.Categorical.from_codes(event_type[by_ts], EVENT_TYPES),
+            "product_id": product_id[by_ts],
+        }
+    )
 
+    # Orders + items: one order per purchase session, at the purchase event's timestamp
+    markdown = (0.05 + 0.28 * (promo - 1.0) + rng.normal(0, 0.03, size=n_orders)).clip(0.0, 0.55)
+    order_id = first_order_id + np.arange(n_orders)
     orders = pd.DataFrame(
         {
-            "order_id": order_ids,
-            "order_ts": pd.to_datetime(purchase_sessions["ts"]),
-            "user_id": purchase_sessions["user_id"].to_numpy(),
-            "region": purchase_sessions["region"].to_numpy(),
+            "order_id": order_id,
+            "order_ts": ts[len(sess) - n_orders :],
+            "user_id": user_id[purchased],
+            "region": pd.Categorical.from_codes(region[purchased], REGIONS),
             "discount_pct": markdown.round(3),
         }
     )
 
-    prod_price = products.set_index("product_id")["list_price"].to_dict()
-    prod_cat = products.set_index("product_id")["category"].to_dict()
-
-    item_rows = []
-    for oid, n_items, disc in zip(order_ids, items_per_order, markdown):
-        pids = rng.choice(products["product_id"].to_numpy(), size=n_items, replace=True, p=weights)
-        for pid in pids:
-            list_price = float(prod_price[int(pid)])
-            unit_price = float(list_price * (1.0 - disc))
-            qty = int(rng.integers(1, 3))
-            item_rows.append((int(oid), int(pid), qty, round(unit_price, 2), round(disc, 3)))
-    order_items = pd.DataFrame(item_rows, columns=["order_id", "product_id", "quantity", "unit_price", "markdown_pct"])
-
-    # Returns correlate with category + markdown (proxy for fit issues / final sale)
-    cat_return_base = {
-        "Outerwear": 0.10,
-        "Tops": 0.12,
-        "Bottoms": 0.14,
-        "Dresses": 0.16,
-        "Shoes": 0.18,
-        "Bags": 0.08,
-        "Accessories": 0.09,
-    }
-    probs = []
-    for _, row in order_items.iterrows():
-        base = cat_return_base.get(prod_cat[int(row["product_id"])], 0.12)
-        probs.append(base + 0.25 * float(row["markdown_pct"]))
-    probs = np.array(probs).clip(0, 0.6)
-    order_items["is_returned"] = (rng.random(len(order_items)) < probs).astype(int)
-
-    orders_path = cfg.out_dir / "orders.csv"
-    items_path = cfg.out_dir / "order_items.csv"
-    orders.to_csv(orders_path, index=False)
-    order_items.to_csv(items_path, index=False)
-
-    return {
-        "products": products_path,
-        "inventory_receipts": inv_path,
-        "web_events": web_path,
-        "orders": orders_path,
-        "order_items": items_path,
-    }
+    item_order = np.repeat(np.arange(n_orders), rng.integers(1, 4, size=n_orders))
+    item_product = catalog.sample(rng, len(item_order))
+    disc = markdown[item_order]
+    order_items = pd.DataFrame(
+        {
+            "order_id": order_id[item_order],
+            "product_id": item_product,
+            "quantity": rng.integers(1, 3, size=len(item_order)),
+            "unit_price": (catalog.list_price[item_product - 1] * (1.0 - disc)).round(2),
+            "markdown_pct": disc.round(3),
+        }
+    )
+    markdown = order_items["markdown_pct"].to_numpy()
+    return_prob = (catalog.return_base[item_product - 1] + 0.25 * markdown).clip(0, 0.6)
+    order_items["is_returned"] = (rng.random(len(order_items)) < return_prob).astype(int)
+    return web_events, orders, order_items
+
+
+def _print_report(
+    cfg: GenConfig, rows: dict[str, int], files: dict[str, int], workers: int, elapsed: float
+) -> None:
+    t = Table(title=f"Generated raw data ({cfg.fmt}) in {cfg.out_dir}")
+    for c in ["table", "rows", "files"]:
+        t.add_column(c)
+    for table in RAW_SCHEMAS:
+        t.add_row(table, f"{rows.get(table, 0):,}", str(files.get(table, 0)))
+    console.print(t)
+    total = sum(rows.values())
+    rate = total / max(elapsed, 1e-9)
+    console.print(
+        f"{total:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s, {workers} worker(s))"
+    )
@@ -1,33 +1,355 @@
 from __future__ import annotations
 
+import hashlib
 from pathlib import Path
 import duckdb
 from rich.console import Console
 
-from fashion_trends.db import bootstrap_schemas
+from fashion_trends import profiling
+from fashion_trends.db import bootstrap_schemas, stage_resources
 
 console = Console()
 
+MANIFEST_TABLE = "meta.ingest_manifest"
+RAW_FORMATS = (".csv", ".parquet")
 
-def ingest_raw_csvs(con: duckdb.DuckDBPyConnection, raw_dir: Path) -> None:
-    """Loads raw CSVs into DuckDB raw schema."""
+# Explicit column types for every raw table, so loads never depend on CSV type sniffing.
+RAW_SCHEMAS: dict[str, dict[str, str]] = {
+    "products": {
+        "product_id": "BIGINT",
+        "brand": "VARCHAR",
+        "category": "VARCHAR",
+        "gender": "VARCHAR",
+        "collection": "VARCHAR",
+        "silhouette": "VARCHAR",
+        "color": "VARCHAR",
+        "list_price": "DOUBLE",
+    },
+    "inventory_receipts": {
+        "product_id": "BIGINT",
+        "week_start": "DATE",
+        "units_received": "BIGINT",
+    },
+    "web_events": {
+        "ts": "TIMESTAMP",
+        "date": "DATE",
+        "user_id": "BIGINT",
+        "session_id": "VARCHAR",
+        "region": "VARCHAR",
+        "event_type": "VARCHAR",
+        "product_id": "BIGINT",
+    },
+    "orders": {
+        "order_id": "BIGINT",
+        "order_ts": "TIMESTAMP",
+        "user_id": "BIGINT",
+        "region": "VARCHAR",
+        "discount_pct": "DOUBLE",
+    },
+    "order_items": {
+        "order_id": "BIGINT",
+        "product_id": "BIGINT",
+        "quantity": "BIGINT",
+        "unit_price": "DOUBLE",
+        "markdown_pct": "DOUBLE",
+        "is_returned": "BIGINT",
+    },
+}
+
+
+# Event date of each row, used to record which days every appended file covers (order_items via
+# its order).
+EVENT_DATES = {
+    "web_events": "date",
+    "orders": "CAST(order_ts AS DATE)",
+    "inventory_receipts": "week_start",
+    "order_items": (
+        "(SELECT CAST(o.order_ts AS DATE) FROM raw.orders o WHERE o.order_id = src.order_id)"
+    ),
+}
+
+
+def ingest_raw_csvs(
+    con: duckdb.DuckDBPyConnection, raw_dir: Path, *, append: bool = False, external: bool = False
+) -> None:
+    """Loads raw CSV / Parquet files into DuckDB raw schema.
+
+    Each table is read from ``<table>.csv|.parquet`` and/or any such files under ``<table>/``
+    (e.g. Hive-style ``date=`` partitions). Every loaded file is recorded in
+    ``meta.ingest_manifest``. With ``append=True`` files already in the manifest are skipped and
+    only new ones are appended, together with the range of event dates they cover; a table is
+    reloaded from scratch if one of its loaded files has changed content. Reloaded files have no
+    date range, which tells incremental marts that every week may have changed. With
+    ``external=True`` Parquet tables become views over the files instead of being copied, so
+    queries only read the columns and partitions they touch.
+    """
     bootstrap_schemas(con)
+    ensure_manifest(con)
+    for table in RAW_SCHEMAS:
+        ingest_table(con, raw_dir, table, append=append, external=external)
+
+
+def ingest_table(
+    con: duckdb.DuckDBPyConnection,
+    raw_dir: Path,
+    table: str,
+    *,
+    append: bool = False,
+    external: bool = False,
+) -> None:
+    """Loads one raw table (see ``ingest_raw_csvs``); the manifest table must already exist."""
+    with stage_resources(con, "ingest"), profiling.stage(f"raw.{table}", "ingest") as st:
+        st.rows_out = _ingest_table(con, raw_dir, table, append=append, external=external)
+
+
+def _ingest_table(
+    con: duckdb.DuckDBPyConnection, raw_dir: Path, table: str, *, append: bool, external: bool
+) -> int | None:
+    """Returns the number of rows loaded (None for external views)."""
+    files = discover_raw_files(raw_dir, table)
+    if not files:
+        raise FileNotFoundError(f"Missing {raw_dir / table}.csv. Run generate-data first.")
+
+    if external:
+        _create_external_view(con, table, raw_dir, files)
+        return None
+    if not append or _relation_kind(con, table) != "BASE TABLE":
+        return _reload_table(con, table, files)
+
+    new_files, changed = _diff_against_manifest(con, table, files)
+    if changed:
+        console.print(f"[yellow]Changed source files for raw.{table}; reloading it.[/yellow]")
+        return _reload_table(con, table, files)
+    if not new_files:
+        console.print(f"[dim]Skipping raw.{table} (no new files)[/dim]")
+        return 0
+    console.print(f"[bold]Appending[/bold] raw.{table} ← {len(new_files)} new file(s)")
+    paths = [path for path, *_ in new_files]
+    # Rows and manifest entries commit together, so a failed append is retried in full.
+    con.begin()
+    try:
+        rows = _insert_files(con, table, paths)
+        dates = _date_ranges(con, table, paths)
+        for path, size, mtime, digest in new_files:
+            date_range = dates.get(path, (None, None))
+            _record(con, table, path, size, mtime, digest, rows[path], date_range)
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return sum(rows.values())
+
+
+def discover_raw_files(raw_dir: Path, table: str) -> list[Path]:
+    """A raw table's source files: ``<table>.csv|.parquet`` plus such files under ``<table>/``."""
+    files = [raw_dir / f"{table}{ext}" for ext in RAW_FORMATS]
+    files = [p for p in files if p.is_file()]
+    part_dir = raw_dir / table
+    if part_dir.is_dir():
+        files += sorted(p for p in part_dir.rglob("*") if p.is_file() and p.suffix in RAW_FORMATS)
+    return files
+
+
+def source_sql(table: str, paths: list[Path], *, filename: bool = False) -> str:
+    """A typed SELECT over raw files of one format; Parquet partition columns come from the path.
+
+    ``filename=True`` adds the source path of every row as a ``filename`` column.
+    """
+    formats = {p.suffix for p in paths}
+    if len(formats) != 1:
+        raise ValueError(f"raw.{table} sources must share one format; got {sorted(formats)}.")
+    files = ", ".join(f"'{p.as_posix()}'" for p in paths)
+    schema = RAW_SCHEMAS[table]
+    if formats == {".parquet"}:
+        casts = [f"CAST({c} AS {t}) AS {c}" for c, t in schema.items()]
+        columns = ", ".join(casts + ["filename"] * filename)
+        return (
+            f"SELECT {columns} FROM read_parquet([{files}], hive_partitioning=true, "
+            f"union_by_name=true, filename={str(filename).lower()})"
+        )
+    columns = ", ".join(f"'{c}': '{t}'" for c, t in schema.items())
+    return (
+        f"SELECT * FROM read_csv([{files}], header=true, hive_partitioning=false, "
+        f"filename={str(filename).lower()}, columns={{{columns}}})"
+    )
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ensure_manifest(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+          table_name VARCHAR,
+          path VARCHAR,
+          size_bytes BIGINT,
+          mtime DOUBLE,
+          content_hash VARCHAR,
+          row_count BIGINT,
+          loaded_at TIMESTAMP
+        );
+        """
+    )
+    # Added after the first release; older warehouses get the columns on their next ingest.
+    con.execute(f"ALTER TABLE {MANIFEST_TABLE} ADD COLUMN IF NOT EXISTS min_date DATE;")
+    con.execute(f"ALTER TABLE {MANIFEST_TABLE} ADD COLUMN IF NOT EXISTS max_date DATE;")
 
-    mapping = {
-        "products": raw_dir / "products.csv",
-        "inventory_receipts": raw_dir / "inventory_receipts.csv",
-        "web_events": raw_dir / "web_events.csv",
-        "orders": raw_dir / "orders.csv",
-        "order_items": raw_dir / "order_items.csv",
+
+def _relation_kind(con: duckdb.DuckDBPyConnection, table: str) -> str | None:
+    """``'BASE TABLE'``, ``'VIEW'`` (external Parquet) or None if raw.<table> does not exist."""
+    row = con.execute(
+        "SELECT table_type FROM information_schema.tables "
+        "WHERE table_schema = 'raw' AND table_name = ?",
+        [table],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _drop_relation(con: duckdb.DuckDBPyConnection, table: str) -> None:
+    kind = _relation_kind(con, table)
+    if kind is not None:
+        con.execute(f"DROP {'VIEW' if kind == 'VIEW' else 'TABLE'} raw.{table};")
+
+
+def _create_external_view(
+    con: duckdb.DuckDBPyConnection, table: str, raw_dir: Path, files: list[Path]
+) -> None:
+    if any(p.suffix != ".parquet" for p in files):
+        raise ValueError(
+            f"External views need Parquet files; raw.{table} has CSV sources (run convert-raw)."
+        )
+    part_dir = raw_dir / table
+    globs = [p for p in files if not p.is_relative_to(part_dir)]
+    if part_dir.is_dir():
+        globs.append(part_dir / "**" / "*.parquet")
+    console.print(f"[bold]Linking[/bold] raw.{table} → {', '.join(p.as_posix() for p in globs)}")
+    _drop_relation(con, table)
+    con.execute(f"CREATE VIEW raw.{table} AS {source_sql(table, globs)};")
+    con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ?", [table])
+
+
+def _reload_table(con: duckdb.DuckDBPyConnection, table: str, files: list[Path]) -> int:
+    """Replaces raw.<table> and its manifest entries in one transaction."""
+    columns = ", ".join(f"{c} {t}" for c, t in RAW_SCHEMAS[table].items())
+    stats = {path: (path.stat(), file_digest(path)) for path in files}
+    more = f" (+{len(files) - 1} more)" if len(files) > 1 else ""
+    console.print(f"[bold]Loading[/bold] raw.{table} ← {files[0]}{more}")
+    con.begin()
+    try:
+        _drop_relation(con, table)
+        con.execute(f"CREATE TABLE raw.{table} ({columns});")
+        con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ?", [table])
+        rows = _insert_files(con, table, files)
+        for path, (st, digest) in stats.items():
+            _record(con, table, path, st.st_size, st.st_mtime, digest, rows[path])
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return sum(rows.values())
+
+
+def _insert_files(con: duckdb.DuckDBPyConnection, table: str, files: list[Path]) -> dict[Path, int]:
+    """Appends files to raw.<table>, returning rows per file.
+
+    Parquet files go in with one multi-file scan; their row counts come from the file footers.
+    CSV files are inserted one by one.
+    """
+    parquet = [p for p in files if p.suffix == ".parquet"]
+    rows = {
+        path: con.execute(f"INSERT INTO raw.{table} {source_sql(table, [path])};").fetchone()[0]
+        for path in files
+        if path.suffix != ".parquet"
     }
+    if parquet:
+        con.execute(f"INSERT INTO raw.{table} {source_sql(table, parquet)};")
+        listed = ", ".join(f"'{p.as_posix()}'" for p in parquet)
+        counts = dict(
+            con.execute(
+                f"SELECT file_name, num_rows FROM parquet_file_metadata([{listed}])"
+            ).fetchall()
+        )
+        rows.update({p: counts[p.as_posix()] for p in parquet})
+    return rows
+
 
-    for table, path in mapping.items():
-        if not path.exists():
-            raise FileNotFoundError(f"Missing {path}. Run generate-data first.")
-        console.print(f"[bold]Loading[/bold] raw.{table} ← {path}")
-        con.execute(f"DROP TABLE IF EXISTS raw.{table};")
-        con.execute(
-            "CREATE TABLE raw.{t} AS SELECT * FROM read_csv_auto('{p}', HEADER=TRUE);".format(
-                t=table, p=path.as_posix()
+def _date_ranges(
+    con: duckdb.DuckDBPyConnection, table: str, files: list[Path]
+) -> dict[Path, tuple]:
+    """(min, max) event date per file, for tables that have one; one scan per file format."""
+    if table not in EVENT_DATES:
+        return {}
+    by_name = {}
+    for fmt in sorted({p.suffix for p in files}):
+        same_format = [p for p in files if p.suffix == fmt]
+        ranges = con.execute(
+            f"""
+            SELECT filename, MIN(d), MAX(d)
+            FROM (
+              SELECT filename, {EVENT_DATES[table]} AS d
+              FROM ({source_sql(table, same_format, filename=True)}) src
             )
-        )
+            GROUP BY filename
+            """
+        ).fetchall()
+        by_name.update({name: (lo, hi) for name, lo, hi in ranges})
+    return {p: by_name[p.as_posix()] for p in files if p.as_posix() in by_name}
+
+
+def _diff_against_manifest(
+    con: duckdb.DuckDBPyConnection, table: str, files: list[Path]
+) -> tuple[list[tuple[Path, int, float, str]], bool]:
+    """New files (with size, mtime, hash) and whether any already-loaded file changed."""
+    loaded = {
+        path: (size, mtime, digest)
+        for path, size, mtime, digest in con.execute(
+            f"SELECT path, size_bytes, mtime, content_hash FROM {MANIFEST_TABLE} "
+            "WHERE table_name = ?",
+            [table],
+        ).fetchall()
+    }
+    new_files, changed = [], False
+    for path in files:
+        st = path.stat()
+        prev = loaded.get(path.as_posix())
+        if prev is not None and prev[:2] == (st.st_size, st.st_mtime):
+            continue
+        digest = file_digest(path)
+        if prev is None:
+            new_files.append((path, st.st_size, st.st_mtime, digest))
+        elif prev[2] == digest:
+            con.execute(
+                f"UPDATE {MANIFEST_TABLE} SET size_bytes = ?, mtime = ? "
+                "WHERE table_name = ? AND path = ?",
+                [st.st_size, st.st_mtime, table, path.as_posix()],
+            )
+        else:
+            changed = True
+    return new_files, changed
+
+
+def _record(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    path: Path,
+    size: int,
+    mtime: float,
+    digest: str,
+    rows: int,
+    dates: tuple = (None, None),
+) -> None:
+    con.execute(
+        f"""
+        INSERT INTO {MANIFEST_TABLE}
+          (table_name, path, size_bytes, mtime, content_hash, row_count, loaded_at,
+           min_date, max_date)
+        VALUES (?, ?, ?, ?, ?, ?, now(), ?, ?)
+        """,
+        [table, path.as_posix(), size, mtime, digest, rows, *dates],
+    )
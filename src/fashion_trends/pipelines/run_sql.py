@@ -1,16 +1,116 @@
 from __future__ import annotations
 
+import hashlib
+import re
+from collections.abc import Collection
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
 from pathlib import Path
+
 import duckdb
 from rich.console import Console
 
-from fashion_trends.db import bootstrap_schemas
+from fashion_trends import profiling
+from fashion_trends.db import bootstrap_schemas, stage_resources, table_exists
+from fashion_trends.pipelines.export_tableau import table_fingerprint
+from fashion_trends.pipelines.ingest import MANIFEST_TABLE
+from fashion_trends.settings import DEFAULT_LOOKBACK_WEEKS, settings
 
 console = Console()
 
+BUILDS_TABLE = "meta.mart_builds"
+
+# A statement preceded by "-- partition_by: <column>" is materialized incrementally.
+PARTITION_ANNOTATION = re.compile(r"^--\s*partition_by:\s*(\w+)\s*$", re.MULTILINE)
+CREATES = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:TABLE|VIEW|MACRO|TYPE)\s+([\w.]+)", re.IGNORECASE
+)
+CREATE_TABLE = re.compile(
+    r"CREATE\s+OR\s+REPLACE\s+TABLE\s+([\w.]+)\s+AS\s+(.*)", re.IGNORECASE | re.DOTALL
+)
+# Staging relations a mart reads; the contents of those that are tables (staging.dim_style) are part
+# of its build hash, so renumbered styles rebuild it in full.
+STAGING_REF = re.compile(r"\bstaging\.\w+\b")
+# Marts whose session counts can come from HyperLogLog sketches call this macro (01_macros.sql).
+APPROX_SESSIONS_CALL = re.compile(r"\bapprox_sessions\s*\(\s*\)")
+# A model preceded by "-- on_demand" (the session sketches) is only filled when a mart counts
+# sessions approximately or sketches are requested; otherwise it is created empty.
+ON_DEMAND_ANNOTATION = re.compile(r"^--\s*on_demand\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class MartModel:
+    """A ``CREATE OR REPLACE TABLE <name> AS <select>`` statement with a declared partition key."""
+
+    name: str
+    partition_by: str
+    select_sql: str
+    statement: str
+    approx_sessions: bool = False
+    on_demand: bool = False
+    empty: bool = False
+
+    @property
+    def definition(self) -> str:
+        """The statement and its build modes; switching a mode changes every row."""
+        modes = [m for m in ("approx_sessions", "empty") if getattr(self, m)]
+        return "\n".join([self.statement, *(f"-- {m}" for m in modes)])
+
+    @property
+    def sql_hash(self) -> str:
+        return hashlib.sha256(self.definition.encode("utf-8")).hexdigest()
+
+    @property
+    def build_statement(self) -> str:
+        """The statement of a full build: an empty table with the mart's columns if ``empty``."""
+        if self.empty:
+            empty = f"SELECT * FROM ({self.select_sql}) LIMIT 0"
+            return f"CREATE OR REPLACE TABLE {self.name} AS {empty}"
+        return self.statement
+
 
-def run_sql_folder(con: duckdb.DuckDBPyConnection, sql_dir: Path) -> None:
-    """Executes all .sql files in a folder (sorted by filename)."""
+def with_session_mode(
+    stmt: str | MartModel, approx_sessions: Collection[str], *, sketches: bool = False
+) -> str | MartModel:
+    """``stmt`` with approximate session counts on if its name (with or without schema) is listed.
+
+    An ``-- on_demand`` model is built empty unless ``sketches`` is set or ``approx_sessions``
+    lists any mart.
+    """
+    if not isinstance(stmt, MartModel):
+        return stmt
+    if stmt.on_demand:
+        return replace(stmt, empty=not (sketches or approx_sessions))
+    if not (stmt.name in approx_sessions or stmt.name.split(".")[-1] in approx_sessions):
+        return stmt
+    if not APPROX_SESSIONS_CALL.search(stmt.statement):
+        raise ValueError(
+            f"{stmt.name} has no approximate session counts (it does not call approx_sessions())."
+        )
+    return replace(stmt, approx_sessions=True)
+
+
+def run_sql_folder(
+    con: duckdb.DuckDBPyConnection,
+    sql_dir: Path,
+    *,
+    full_refresh: bool = False,
+    lookback_weeks: int = DEFAULT_LOOKBACK_WEEKS,
+    approx_sessions: Collection[str] | None = None,
+    sketches: bool | None = None,
+) -> None:
+    """Executes all .sql files in a folder (sorted by filename).
+
+    Statements annotated with ``-- partition_by: <column>`` are materialized incrementally: only
+    the weeks touched by files ingested since the previous build (see ``meta.ingest_manifest``),
+    plus the latest ``lookback_weeks`` weeks for late arrivals, are deleted and re-inserted in one
+    transaction. ``full_refresh=True`` rebuilds every mart from all history.
+
+    Marts named in ``approx_sessions`` (default: ``settings.approx_session_marts``) count sessions
+    from the mergeable sketches in ``mart.sketch_style_sessions_weekly`` instead of exactly. The
+    sketches are only built when such a mart is listed or ``sketches`` (default:
+    ``settings.session_sketches``) is set; otherwise the sketch mart is left empty.
+    """
     bootstrap_schemas(con)
     if not sql_dir.exists():
         raise FileNotFoundError(sql_dir)
@@ -21,4 +121,205 @@ def run_sql_folder(con: duckdb.DuckDBPyConnection, sql_dir: Path) -> None:
 
     for p in sql_files:
         console.print(f"[bold]Running SQL[/bold] {p}")
-        con.execute(p.read_text(encoding="utf-8"))
+        sql = p.read_text(encoding="utf-8")
+        if PARTITION_ANNOTATION.search(sql):
+            run_incremental(
+                con,
+                split_statements(sql),
+                full_refresh=full_refresh,
+                lookback_weeks=lookback_weeks,
+                approx_sessions=approx_sessions,
+                sketches=sketches,
+            )
+        else:
+            with stage_resources(con, "sql"), profiling.stage(p.name, "sql"):
+                con.execute(sql)
+
+
+def split_statements(sql: str) -> list[str | MartModel]:
+    """Splits a SQL script into plain statements and annotated ``MartModel``s."""
+    out: list[str | MartModel] = []
+    for stmt in re.split(r";\s*$", sql, flags=re.MULTILINE):
+        lines = (line for line in stmt.splitlines() if not line.lstrip().startswith("--"))
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+        key = PARTITION_ANNOTATION.search(stmt)
+        create = CREATE_TABLE.match(body)
+        if key and not create:
+            raise ValueError(
+                f"partition_by needs a CREATE OR REPLACE TABLE ... AS statement:\n{body[:200]}"
+            )
+        if key:
+            name, select_sql = create.groups()
+            on_demand = bool(ON_DEMAND_ANNOTATION.search(stmt))
+            out.append(MartModel(name, key.group(1), select_sql, body, on_demand=on_demand))
+        else:
+            out.append(body)
+    return out
+
+
+def statement_target(sql: str) -> str | None:
+    """Name of the table, view, macro or type a ``CREATE [OR REPLACE]`` statement defines."""
+    created = CREATES.match(sql)
+    return created.group(1) if created else None
+
+
+def run_incremental(
+    con: duckdb.DuckDBPyConnection,
+    statements: list[str | MartModel],
+    *,
+    full_refresh: bool = False,
+    lookback_weeks: int = DEFAULT_LOOKBACK_WEEKS,
+    approx_sessions: Collection[str] | None = None,
+    sketches: bool | None = None,
+) -> None:
+    """Runs the statements in one transaction, rebuilding each model fully or by touched weeks.
+
+    Models named in ``approx_sessions`` (default: ``settings.approx_session_marts``) run with the
+    ``approx_sessions`` variable set; ``-- on_demand`` models are created empty unless one is named
+    or ``sketches`` (default: ``settings.session_sketches``) is set.
+    """
+    approx = settings.approx_session_marts if approx_sessions is None else approx_sessions
+    sketches = settings.session_sketches if sketches is None else sketches
+    statements = [with_session_mode(stmt, approx, sketches=sketches) for stmt in statements]
+    ensure_builds(con)
+    watermark = None
+    if table_exists(con, MANIFEST_TABLE):
+        watermark = con.execute(f"SELECT MAX(loaded_at) FROM {MANIFEST_TABLE}").fetchone()[0]
+
+    with stage_resources(con, "sql"):
+        con.begin()
+        try:
+            for stmt in statements:
+                if isinstance(stmt, str):
+                    with profiling.stage(statement_target(stmt) or "statement", "sql"):
+                        con.execute(stmt)
+                    continue
+                con.execute(f"SET VARIABLE approx_sessions = {str(stmt.approx_sessions).lower()};")
+                with profiling.stage(stmt.name, "sql") as st:
+                    build_hash = _build_hash(con, stmt)
+                    predicate = (
+                        None
+                        if full_refresh or stmt.empty
+                        else _touched_predicate(con, stmt, build_hash, lookback_weeks)
+                    )
+                    if predicate is None:
+                        console.print(
+                            f"  [bold]{'Empty' if stmt.empty else 'Full'} build[/bold] {stmt.name}"
+                        )
+                        with profiling.query_profile(con, st):
+                            st.rows_out = con.execute(stmt.build_statement).fetchone()[0]
+                    else:
+                        deleted = con.execute(
+                            f"DELETE FROM {stmt.name} WHERE {predicate};"
+                        ).fetchone()[0]
+                        with profiling.query_profile(con, st):
+                            st.rows_out = con.execute(
+                                f"INSERT INTO {stmt.name} BY NAME "
+                                f"SELECT * FROM ({stmt.select_sql}) WHERE {predicate};"
+                            ).fetchone()[0]
+                        console.print(
+                            f"  [bold]Incremental[/bold] {stmt.name}: {predicate} "
+                            f"([dim]-{deleted:,} / +{st.rows_out:,} rows[/dim])"
+                        )
+                con.execute(f"DELETE FROM {BUILDS_TABLE} WHERE table_name = ?", [stmt.name])
+                con.execute(
+                    f"INSERT INTO {BUILDS_TABLE} VALUES (?, ?, ?, ?, now())",
+                    [stmt.name, stmt.partition_by, build_hash, watermark],
+                )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+
+def ensure_builds(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {BUILDS_TABLE} (
+          table_name VARCHAR,
+          partition_by VARCHAR,
+          sql_hash VARCHAR,
+          watermark TIMESTAMP,
+          built_at TIMESTAMP
+        );
+        """
+    )
+
+
+def _build_hash(con: duckdb.DuckDBPyConnection, model: MartModel) -> str:
+    """``model.sql_hash`` combined with the checksums of the staging tables (not views) it reads."""
+    parts = [model.sql_hash]
+    for ref in sorted(set(STAGING_REF.findall(model.statement))):
+        schema, name = ref.split(".")
+        kind = con.execute(
+            "SELECT table_type FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_name = ?",
+            [schema, name],
+        ).fetchone()
+        if kind and kind[0] == "BASE TABLE":
+            parts.append(table_fingerprint(con, f"SELECT * FROM {ref}")[1])
+    if len(parts) == 1:
+        return model.sql_hash
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _touched_predicate(
+    con: duckdb.DuckDBPyConnection, model: MartModel, build_hash: str, lookback_weeks: int
+) -> str | None:
+    """WHERE clause over the partition key for the weeks to rebuild, or None for a full build.
+
+    A full build is needed when the mart does not exist yet, its SQL, a staging table it reads
+    (``_build_hash``) or its column types changed (an ENUM domain in staging grew), or a raw table
+    was reloaded (manifest rows without a date range) since the last build.
+    """
+    prev = con.execute(
+        f"SELECT sql_hash, watermark FROM {BUILDS_TABLE} WHERE table_name = ?", [model.name]
+    ).fetchone()
+    if prev is None or prev[0] != build_hash or not table_exists(con, model.name):
+        return None
+    if _column_types(con, model.name) != _column_types(con, f"({model.select_sql})"):
+        return None
+
+    ranges = []
+    if table_exists(con, MANIFEST_TABLE):
+        ranges = con.execute(
+            f"SELECT min_date, max_date FROM {MANIFEST_TABLE} "
+            "WHERE loaded_at > COALESCE(?, '-infinity'::TIMESTAMP)",
+            [prev[1]],
+        ).fetchall()
+    if any(lo is None for lo, _ in ranges):
+        return None
+
+    key = model.partition_by
+    latest = con.execute(f"SELECT MAX({key}) FROM {model.name}").fetchone()[0]
+    if latest is None:
+        return None
+    # Files can only add rows to the weeks they cover; the trailing window catches late arrivals
+    # (and any source that is not tracked by the manifest, like external Parquet views).
+    week = timedelta(weeks=1)
+    spans = sorted(
+        ((_week_start(lo), _week_start(hi)) for lo, hi in ranges), key=lambda s: s[1], reverse=True
+    )
+    tail = latest - lookback_weeks * week
+    while spans and spans[0][1] >= tail - week:
+        tail = min(tail, spans.pop(0)[0])
+
+    merged: list[list[date]] = []
+    for lo, hi in sorted(spans):
+        if merged and lo <= merged[-1][1] + week:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    clauses = [f"{key} BETWEEN DATE '{lo}' AND DATE '{hi}'" for lo, hi in merged]
+    return " OR ".join(clauses + [f"{key} >= DATE '{tail}'"])
+
+
+def _column_types(con: duckdb.DuckDBPyConnection, relation: str) -> list[tuple[str, str]]:
+    rows = con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()
+    return [(name, dtype) for name, dtype, *_ in rows]
+
+
+def _week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
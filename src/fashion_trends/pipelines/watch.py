@@ -0,0 +1,333 @@
+"""Micro-batch mode behind the ``watch`` command.
+
+New ``web_events`` / ``orders`` / ``order_items`` files that land in the raw directory are picked
+up batch by batch: they are appended to the raw tables, only the weeks they touch are rebuilt in
+the session, funnel, order and style marts, and the trend index is recomputed only for the style
+groups whose ``mart_style_weekly`` rows changed. Styles that newly cross ``is_emerging`` /
+``is_fatiguing`` are written to ``mart.mart_trend_alerts`` (and optionally a JSON Lines file), and
+every batch's stage timings and end-to-end latency go to ``meta.watch_batches``.
+
+Files must appear atomically (written elsewhere, or under a non-.csv/.parquet name, then renamed),
+so a half-written file is never read.
+"""
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import duckdb
+from rich.console import Console
+from rich.table import Table
+
+from fashion_trends import profiling
+from fashion_trends.analytics.trend_index import TrendIndexConfig
+from fashion_trends.db import bootstrap_schemas, stage_resources, table_exists
+from fashion_trends.pipelines.compute_indices import (
+    GROUP_COLS,
+    INDEX_TABLE,
+    KEY_COLS,
+    compute_and_store_indices,
+    update_index_groups,
+)
+from fashion_trends.pipelines.ingest import (
+    MANIFEST_TABLE,
+    discover_raw_files,
+    ensure_manifest,
+    ingest_table,
+)
+from fashion_trends.pipelines.run_sql import MartModel, run_incremental, split_statements
+
+console = Console()
+
+# Raw tables fed by micro-batches; orders come before order_items, whose event dates come from
+# raw.orders.
+WATCH_TABLES = ("web_events", "orders", "order_items")
+# Marts brought up to date per batch. The cube, level indices and exports wait for the next `run`.
+WATCH_MARTS = (
+    "mart.fct_session_product_weekly",
+    "mart.sketch_style_sessions_weekly",
+    "mart.mart_brand_weekly_funnel",
+    "mart.mart_collection_health",
+    "mart.mart_brand_weekly_performance",
+    "mart.mart_style_weekly",
+)
+ALERTS_TABLE = "mart.mart_trend_alerts"
+BATCHES_TABLE = "meta.watch_batches"
+ALERT_FLAGS = {"emerging": "is_emerging", "fatiguing": "is_fatiguing"}
+STAGES = ("ingest", "marts", "index", "alerts")
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    batch_id: str
+    files: int
+    rows_in: int
+    groups: int
+    alerts: list[dict]
+    landed_at: float
+    latency_seconds: float
+    seconds: dict[str, float] = field(default_factory=dict)
+
+
+def watch(
+    con: duckdb.DuckDBPyConnection,
+    raw_dir: Path,
+    sql_dir: Path,
+    *,
+    cfg: TrendIndexConfig = TrendIndexConfig(),
+    interval: float = 2.0,
+    once: bool = False,
+    max_batches: int | None = None,
+    alerts_jsonl: Path | None = None,
+    on_batch: Callable[[BatchResult], object] | None = None,
+) -> list[BatchResult]:
+    """Polls ``raw_dir`` every ``interval`` seconds and processes new files as micro-batches.
+
+    Needs a warehouse built by a regular run (marts and trend index). With ``once`` only the files
+    waiting now are processed; ``max_batches`` stops after that many batches. ``on_batch`` is
+    called with each ``BatchResult`` (e.g. to publish a serving snapshot).
+    """
+    models = watch_models(sql_dir)
+    prepare(con, cfg)
+    results: list[BatchResult] = []
+    tables = ", ".join(WATCH_TABLES)
+    console.print(f"[green]Watching {raw_dir} for new {tables} files (Ctrl+C to stop).[/green]")
+    while max_batches is None or len(results) < max_batches:
+        result = run_batch(con, raw_dir, models, cfg, alerts_jsonl=alerts_jsonl)
+        if result is not None:
+            results.append(result)
+            if on_batch is not None:
+                on_batch(result)
+        elif once:
+            break
+        else:
+            time.sleep(interval)
+    return results
+
+
+def watch_models(sql_dir: Path) -> list[MartModel]:
+    """The ``WATCH_MARTS`` models of ``sql_dir``, in file order."""
+    models = [
+        stmt
+        for path in sorted(sql_dir.glob("*.sql"))
+        for stmt in split_statements(path.read_text(encoding="utf-8"))
+        if isinstance(stmt, MartModel) and stmt.name in WATCH_MARTS
+    ]
+    missing = sorted(set(WATCH_MARTS) - {m.name for m in models})
+    if missing:
+        raise RuntimeError(f"No partitioned model for {missing} in {sql_dir}.")
+    return models
+
+
+def prepare(con: duckdb.DuckDBPyConnection, cfg: TrendIndexConfig) -> None:
+    """Creates the alert / batch tables and makes sure the trend index state can be resumed."""
+    bootstrap_schemas(con)
+    ensure_manifest(con)
+    missing = [t for t in (*WATCH_MARTS, INDEX_TABLE) if not table_exists(con, t)]
+    if missing:
+        raise RuntimeError(f"{', '.join(missing)} missing. Build the warehouse first (run).")
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ALERTS_TABLE} (
+          alerted_at TIMESTAMP,
+          batch_id VARCHAR,
+          kind VARCHAR,
+          {", ".join(f"{c} VARCHAR" for c in GROUP_COLS)},
+          metric VARCHAR,
+          week_start TIMESTAMP,
+          trend_index DOUBLE,
+          traffic_sessions DOUBLE
+        );
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {BATCHES_TABLE} (
+          batch_id VARCHAR,
+          started_at TIMESTAMP,
+          landed_at TIMESTAMP,
+          files INTEGER,
+          rows_in BIGINT,
+          groups INTEGER,
+          alerts INTEGER,
+          {", ".join(f"{s}_seconds DOUBLE" for s in STAGES)},
+          latency_seconds DOUBLE
+        );
+        """
+    )
+    # Catch up first, so batches only ever have to recompute their own groups.
+    compute_and_store_indices(con, cfg, incremental=True)
+
+
+def pending_files(con: duckdb.DuckDBPyConnection, raw_dir: Path) -> dict[str, list[Path]]:
+    """Files of the ``WATCH_TABLES`` that are not in the ingest manifest yet."""
+    loaded = {p for (p,) in con.execute(f"SELECT path FROM {MANIFEST_TABLE}").fetchall()}
+    out = {}
+    for table in WATCH_TABLES:
+        files = [p for p in discover_raw_files(raw_dir, table) if p.as_posix() not in loaded]
+        if files:
+            out[table] = files
+    return out
+
+
+def run_batch(
+    con: duckdb.DuckDBPyConnection,
+    raw_dir: Path,
+    models: list[MartModel],
+    cfg: TrendIndexConfig,
+    *,
+    alerts_jsonl: Path | None = None,
+) -> BatchResult | None:
+    """Processes the files waiting in ``raw_dir`` as one batch; None when there are none."""
+    pending = pending_files(con, raw_dir)
+    if not pending:
+        return None
+    batch_id = uuid.uuid4().hex[:12]
+    started_at = datetime.now()
+    landed_at = min(p.stat().st_mtime for files in pending.values() for p in files)
+    seconds: dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    for table in WATCH_TABLES:
+        if table in pending:
+            ingest_table(con, raw_dir, table, append=True)
+    paths = [p.as_posix() for files in pending.values() for p in files]
+    rows_in, first_day, dated = con.execute(
+        f"""
+        SELECT SUM(row_count), MIN(min_date), bool_and(min_date IS NOT NULL)
+        FROM {MANIFEST_TABLE} WHERE list_contains(?, path)
+        """,
+        [paths],
+    ).fetchone()
+    seconds["ingest"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    # The style rows a batch can change; with undated files (a reloaded table) that is all of them.
+    since = first_day - timedelta(days=first_day.weekday()) if dated and first_day else date.min
+    con.execute(f"CREATE OR REPLACE TEMP TABLE watch_before AS {_style_rows_sql()}", [since])
+    run_incremental(con, models, lookback_weeks=0)
+    changed = con.execute(
+        f"""
+        WITH after AS ({_style_rows_sql()}),
+        diff AS (
+          (SELECT * FROM after EXCEPT SELECT * FROM watch_before)
+          UNION ALL
+          (SELECT * FROM watch_before EXCEPT SELECT * FROM after)
+        )
+        SELECT {", ".join(KEY_COLS)}, MIN(week_start) AS first_week
+        FROM diff
+        WHERE {" AND ".join(f"{c} IS NOT NULL" for c in GROUP_COLS)}
+        GROUP BY ALL
+        """,
+        [since],
+    ).df()
+    con.execute("DROP TABLE watch_before;")
+    seconds["marts"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    alerts: list[dict] = []
+    if not changed.empty:
+        start = changed["first_week"].min().date()
+        with stage_resources(con, "indices"), profiling.stage(INDEX_TABLE, "indices") as st:
+            st.rows_in = len(changed)
+            updated = update_index_groups(con, cfg, changed, start)
+        if not updated:
+            # Opens its own "indices" stage and resource overrides.
+            compute_and_store_indices(con, cfg, since=start)
+        seconds["index"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        alerts = _record_alerts(con, batch_id, changed, start)
+        if alerts and alerts_jsonl is not None:
+            alerts_jsonl.parent.mkdir(parents=True, exist_ok=True)
+            with alerts_jsonl.open("a", encoding="utf-8") as f:
+                for a in alerts:
+                    f.write(json.dumps(a, default=str) + "\n")
+        seconds["alerts"] = time.perf_counter() - t0
+
+    latency = time.time() - landed_at
+    con.execute(
+        f"INSERT INTO {BATCHES_TABLE} VALUES ({', '.join('?' for _ in range(len(STAGES) + 8))})",
+        [
+            batch_id, started_at, datetime.fromtimestamp(landed_at), len(paths), rows_in or 0,
+            len(changed), len(alerts), *(seconds.get(s, 0.0) for s in STAGES), latency,
+        ],
+    )
+    result = BatchResult(
+        batch_id, len(paths), rows_in or 0, len(changed), alerts, landed_at, latency, seconds
+    )
+    _print_batch(result)
+    return result
+
+
+def _style_rows_sql() -> str:
+    return f"""
+        SELECT {", ".join(GROUP_COLS)}, style_id, week_start,
+               traffic_sessions, atc_sessions, purchase_sessions
+        FROM mart.mart_style_weekly WHERE week_start >= ?
+        """
+
+
+def _record_alerts(
+    con: duckdb.DuckDBPyConnection, batch_id: str, groups, start: date
+) -> list[dict]:
+    """Inserts the (group, metric, week) rows from ``start`` whose flag turned on since the group's
+    previous index week, unless already alerted, and returns them."""
+    keys, labels = ", ".join(KEY_COLS), ", ".join(GROUP_COLS)
+    con.register("alert_groups_df", groups[KEY_COLS])
+    try:
+        crossings = " UNION ALL ".join(
+            f"""
+            SELECT '{kind}' AS kind, {labels}, metric, week_start, trend_index, traffic_sessions
+            FROM flagged WHERE {flag} AND NOT COALESCE(prev_{flag}, false)
+            """
+            for kind, flag in ALERT_FLAGS.items()
+        )
+        rows = con.execute(
+            f"""
+            INSERT INTO {ALERTS_TABLE}
+            WITH flagged AS (
+              SELECT *, {", ".join(f"lag({f}) OVER w AS prev_{f}" for f in ALERT_FLAGS.values())}
+              FROM {INDEX_TABLE} SEMI JOIN alert_groups_df USING ({keys})
+              WINDOW w AS (PARTITION BY {keys}, metric ORDER BY week_start)
+            ),
+            crossed AS ({crossings})
+            SELECT now() AS alerted_at, ? AS batch_id, c.*
+            FROM crossed c ANTI JOIN {ALERTS_TABLE} a USING (kind, {labels}, metric, week_start)
+            WHERE c.week_start >= ?
+            RETURNING *
+            """,
+            [batch_id, start],
+        ).fetchall()
+    finally:
+        con.unregister("alert_groups_df")
+    cols = [
+        "alerted_at", "batch_id", "kind", *GROUP_COLS,
+        "metric", "week_start", "trend_index", "traffic_sessions",
+    ]
+    return [dict(zip(cols, r, strict=True)) for r in rows]
+
+
+def _print_batch(r: BatchResult) -> None:
+    timings = ", ".join(f"{s} {r.seconds[s]:.2f}s" for s in STAGES if s in r.seconds)
+    console.print(
+        f"[bold]Batch {r.batch_id}[/bold]: {r.files} file(s), {r.rows_in:,} rows → "
+        f"{r.groups:,} style groups, {len(r.alerts)} alert(s) "
+        f"[dim]({timings}; latency {r.latency_seconds:.2f}s since landing)[/dim]"
+    )
+    if not r.alerts:
+        return
+    t = Table(title="New trend alerts")
+    shown = ["kind", "brand", "region", "category", "silhouette", "color", "metric"]
+    for c in [*shown, "week_start", "trend_index"]:
+        t.add_column(c)
+    for a in r.alerts[:20]:
+        t.add_row(
+            *(a[c] for c in shown), str(a["week_start"].date()), f'{a["trend_index"]:.2f}',
+        )
+    console.print(t)
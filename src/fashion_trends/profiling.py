@@ -0,0 +1,311 @@
+"""Opt-in pipeline profiler behind the CLI's ``--profile`` option.
+
+Pipeline code wraps its steps in ``stage(...)``; while no profiler is active that is a no-op.
+An active ``Profiler`` records wall time, rows in/out and peak RSS per stage (plus DuckDB's JSON
+query profile for mart builds) and writes them to ``meta.pipeline_runs`` / ``meta.stage_metrics``.
+
+rich is only imported to print, so the CLI's ``--profile`` and ``status`` do not load it up front.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+
+RUNS_TABLE = "meta.pipeline_runs"
+STAGES_TABLE = "meta.stage_metrics"
+RSS_SAMPLE_SECONDS = 0.01
+# A stage this much slower than its median over previous runs is flagged by profile-report.
+REGRESSION_RATIO = 1.2
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    kind: str
+    started_at: datetime = field(default_factory=datetime.now)
+    seconds: float | None = None
+    rows_in: int | None = None
+    rows_out: int | None = None
+    peak_rss_mb: float | None = None
+    query_profile: str | None = None
+    status: str = "ok"
+
+
+class Profiler:
+    """Collects the stages of one CLI command and stores them when the command ends."""
+
+    def __init__(self, command: str, db_path: Path) -> None:
+        self.run_id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.db_path = db_path
+        self.started_at = datetime.now()
+        self.stages: list[StageMetrics] = []
+        self.peak_rss = _rss_bytes() or 0
+        self._t0 = time.perf_counter()
+        self._open: list[StageMetrics] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._tmp = tempfile.TemporaryDirectory(prefix="fashion-trends-profile-")
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+
+    def finish(self) -> None:
+        """Stops sampling and writes the run and its stages to the warehouse."""
+        global _ACTIVE
+        self._done.set()
+        self._sampler.join()
+        _ACTIVE = None
+        seconds = time.perf_counter() - self._t0
+        status = "failed" if any(s.status == "failed" for s in self.stages) else "ok"
+
+        from fashion_trends.db import bootstrap_schemas, connect
+
+        con = connect(self.db_path)
+        bootstrap_schemas(con)
+        ensure_tables(con)
+        con.execute(
+            f"INSERT INTO {RUNS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                self.run_id, self.command, self.started_at, seconds, _mb(self.peak_rss),
+                len(self.stages), status,
+            ],
+        )
+        if self.stages:
+            con.executemany(
+                f"INSERT INTO {STAGES_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    [self.run_id, i, s.stage, s.kind, s.started_at, s.seconds, s.rows_in,
+                     s.rows_out, s.peak_rss_mb, s.query_profile, s.status]
+                    for i, s in enumerate(self.stages)
+                ],
+            )
+        con.close()
+        self._tmp.cleanup()
+        from rich.console import Console
+
+        Console().print(
+            f"[dim]Profiled run {self.run_id}: {len(self.stages)} stage(s), {seconds:.2f}s, "
+            f"peak RSS {_mb(self.peak_rss):.0f} MB (profile-report --run-id {self.run_id})[/dim]"
+        )
+
+    def _sample_rss(self) -> None:
+        while not self._done.wait(RSS_SAMPLE_SECONDS):
+            self._observe_rss()
+
+    def _observe_rss(self) -> None:
+        rss = _rss_bytes()
+        if rss is None:
+            return
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for s in self._open:
+                s.peak_rss_mb = max(s.peak_rss_mb or 0.0, _mb(rss))
+
+
+_ACTIVE: Profiler | None = None
+
+
+def start(command: str, db_path: Path) -> Profiler:
+    """Activates profiling for the rest of the process (until ``Profiler.finish``)."""
+    global _ACTIVE
+    _ACTIVE = Profiler(command, db_path)
+    return _ACTIVE
+
+
+def active() -> bool:
+    return _ACTIVE is not None
+
+
+@contextmanager
+def stage(name: str, kind: str) -> Iterator[StageMetrics]:
+    """Times a pipeline step; callers may set ``rows_in`` / ``rows_out`` on the yielded record."""
+    metrics = StageMetrics(name, kind)
+    profiler = _ACTIVE
+    if profiler is None:
+        yield metrics
+        return
+    with profiler._lock:
+        profiler._open.append(metrics)
+    t0 = time.perf_counter()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.status = "failed"
+        raise
+    finally:
+        metrics.seconds = time.perf_counter() - t0
+        profiler._observe_rss()
+        with profiler._lock:
+            profiler._open.remove(metrics)
+            profiler.stages.append(metrics)
+
+
+@contextmanager
+def query_profile(con: duckdb.DuckDBPyConnection, metrics: StageMetrics) -> Iterator[None]:
+    """Captures DuckDB's JSON profile of the queries run inside the block (the last one is kept).
+
+    ``rows_in`` defaults to the rows the query scanned. Profiling settings are per cursor, so
+    concurrent stages on separate cursors do not interfere.
+    """
+    if _ACTIVE is None:
+        yield
+        return
+    fd, path = tempfile.mkstemp(suffix=".json", dir=_ACTIVE._tmp.name)
+    os.close(fd)
+    con.execute("PRAGMA enable_profiling='json';")
+    con.execute(f"PRAGMA profiling_output='{Path(path).as_posix()}';")
+    try:
+        yield
+    finally:
+        con.execute("PRAGMA disable_profiling;")
+        text = Path(path).read_text(encoding="utf-8")
+        if text.strip():
+            metrics.query_profile = text
+            if metrics.rows_in is None:
+                metrics.rows_in = json.loads(text).get("cumulative_rows_scanned")
+
+
+def ensure_tables(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+          run_id VARCHAR,
+          command VARCHAR,
+          started_at TIMESTAMP,
+          seconds DOUBLE,
+          peak_rss_mb DOUBLE,
+          stages BIGINT,
+          status VARCHAR
+        );
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {STAGES_TABLE} (
+          run_id VARCHAR,
+          seq BIGINT,
+          stage VARCHAR,
+          kind VARCHAR,
+          started_at TIMESTAMP,
+          seconds DOUBLE,
+          rows_in BIGINT,
+          rows_out BIGINT,
+          peak_rss_mb DOUBLE,
+          query_profile VARCHAR,
+          status VARCHAR
+        );
+        """
+    )
+
+
+def latest_runs(con: duckdb.DuckDBPyConnection, limit: int) -> list[tuple]:
+    """The ``limit`` latest rows of ``RUNS_TABLE``, newest first (none before any profiled run)."""
+    # No bound parameters: binding one makes duckdb import pandas and NumPy, which `status` avoids.
+    try:
+        return con.execute(
+            "SELECT run_id, command, started_at, seconds, peak_rss_mb, stages, status "
+            f"FROM {RUNS_TABLE} ORDER BY started_at DESC LIMIT {int(limit)}"
+        ).fetchall()
+    except duckdb.CatalogException:
+        return []
+
+
+def profile_report(
+    con: duckdb.DuckDBPyConnection, *, run_id: str | None = None, history: int = 7
+) -> None:
+    """Prints the latest runs and the stages of one run against the median of its predecessors.
+
+    Each stage is compared with the same stage in up to ``history`` earlier runs of the same
+    command; stages slower than ``REGRESSION_RATIO`` x that median are flagged. Only reads the
+    warehouse: before the first profiled run there is nothing to report.
+    """
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    runs = latest_runs(con, history + 1)
+    if not runs:
+        console.print("[yellow]No profiled runs yet; re-run a command with --profile.[/yellow]")
+        return
+    t = Table(title="Profiled runs")
+    for c in ["run_id", "command", "started_at", "seconds", "peak_rss_mb", "stages", "status"]:
+        t.add_column(c)
+    for r in runs:
+        started = f"{r[2]:%Y-%m-%d %H:%M:%S}"
+        t.add_row(r[0], r[1], started, f"{r[3]:.2f}", _fmt(r[4], ".0f"), str(r[5]), r[6])
+    console.print(t)
+
+    run = con.execute(
+        f"SELECT run_id, command, started_at FROM {RUNS_TABLE} WHERE run_id = COALESCE(?, run_id) "
+        f"ORDER BY started_at DESC LIMIT 1",
+        [run_id],
+    ).fetchone()
+    if run is None:
+        raise ValueError(f"Unknown run id {run_id!r}.")
+    stages = con.execute(
+        f"""
+        WITH previous AS (
+          SELECT s.stage, median(s.seconds) AS median_seconds
+          FROM {STAGES_TABLE} s
+          JOIN (
+            SELECT run_id FROM {RUNS_TABLE}
+            WHERE command = ? AND started_at < ? AND status = 'ok'
+            ORDER BY started_at DESC LIMIT ?
+          ) r USING (run_id)
+          GROUP BY 1
+        )
+        SELECT s.stage, s.kind, s.seconds, p.median_seconds, s.rows_in, s.rows_out, s.peak_rss_mb,
+          s.status
+        FROM {STAGES_TABLE} s
+        LEFT JOIN previous p USING (stage)
+        WHERE s.run_id = ?
+        ORDER BY s.seconds DESC
+        """,
+        [run[1], run[2], history, run[0]],
+    ).fetchall()
+    t = Table(title=f"Stages of run {run[0]} ({run[1]}) vs median of up to {history} previous runs")
+    cols = [
+        "stage", "kind", "seconds", "median_prev", "change", "rows_in", "rows_out", "peak_rss_mb",
+        "status",
+    ]
+    for c in cols:
+        t.add_column(c)
+    for stage_name, kind, secs, median, rows_in, rows_out, rss, status in stages:
+        change = ""
+        if median:
+            change = f"{secs / median - 1:+.0%}"
+            if secs > REGRESSION_RATIO * median:
+                change = f"[red]{change}[/red]"
+        t.add_row(
+            stage_name, kind, f"{secs:.3f}", _fmt(median, ".3f"), change,
+            _fmt(rows_in, ","), _fmt(rows_out, ","), _fmt(rss, ".0f"), status,
+        )
+    console.print(t)
+
+
+def _rss_bytes() -> int | None:
+    """Resident set size of this process (Linux ``/proc``); None where unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _fmt(value: float | None, spec: str) -> str:
+    return "" if value is None else format(value, spec)
+
+
+def _mb(n: int | None) -> float | None:
+    return None if n is None else n / 1e6
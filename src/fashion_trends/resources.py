@@ -0,0 +1,126 @@
+"""DuckDB resource settings of the warehouse: detected defaults, env overrides, per-stage profiles.
+
+``Settings.resources()`` resolves the configured values (``DUCKDB_THREADS``,
+``DUCKDB_MEMORY_LIMIT``, ``DUCKDB_TEMP_DIR``, ``DUCKDB_MAX_TEMP_SIZE``,
+``DUCKDB_PRESERVE_INSERTION_ORDER``) against what the host (or its cgroup) actually provides.
+``db.connect`` applies them and ``db.stage_resources`` switches to the overrides of one pipeline
+stage kind.
+"""
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+# DuckDB's share of the detected memory when DUCKDB_MEMORY_LIMIT is not set; the rest is left to
+# Python (pandas / Arrow / NumPy) and the OS.
+DEFAULT_MEMORY_FRACTION = 0.6
+# While trend indices are computed DuckDB only gets this share of its limit; the remainder bounds
+# the Arrow/NumPy working set of one streamed panel chunk.
+INDEX_DUCKDB_SHARE = 0.5
+# Peak Python working set per mart_style_weekly row while scoring (measured ~600-1,100 bytes).
+BYTES_PER_PANEL_ROW = 1000
+
+# Settings that differ from the connection's base resources, per pipeline stage kind (the
+# ``indices`` memory limit is derived from the current one). Bulk loads and mart builds have no
+# meaningful row order, so DuckDB may write them in parallel without buffering to keep it;
+# exports keep insertion order so an unchanged table produces a byte-identical file.
+STAGE_OVERRIDES: dict[str, dict[str, object]] = {
+    "ingest": {"preserve_insertion_order": False},
+    "sql": {"preserve_insertion_order": False},
+    "indices": {"preserve_insertion_order": False},
+    "export": {"preserve_insertion_order": True},
+}
+
+_UNITS = {"": 1, "b": 1, "kb": 10**3, "mb": 10**6, "gb": 10**9, "tb": 10**12,
+          "kib": 2**10, "mib": 2**20, "gib": 2**30, "tib": 2**40}
+
+
+@dataclass(frozen=True)
+class Resources:
+    threads: int
+    memory_limit_bytes: int
+    temp_directory: Path
+    max_temp_directory_size: str | None = None
+    preserve_insertion_order: bool = True
+
+    def index_chunk_rows(self) -> int:
+        """Panel rows per streamed trend-index chunk that fit next to DuckDB's ``indices`` share."""
+        budget = int(self.memory_limit_bytes * (1 - INDEX_DUCKDB_SHARE))
+        return max(1, budget // BYTES_PER_PANEL_ROW)
+
+    def settings(self) -> dict[str, object]:
+        """DuckDB setting name -> value."""
+        out: dict[str, object] = {
+            "threads": self.threads,
+            "memory_limit": format_mib(self.memory_limit_bytes),
+            "temp_directory": self.temp_directory.as_posix(),
+            "preserve_insertion_order": self.preserve_insertion_order,
+        }
+        if self.max_temp_directory_size:
+            out["max_temp_directory_size"] = self.max_temp_directory_size
+        return out
+
+
+def resolve_resources(
+    *,
+    threads: int,
+    memory_limit: str,
+    temp_directory: Path,
+    max_temp_directory_size: str = "",
+    preserve_insertion_order: bool = True,
+) -> Resources:
+    """Fills in detected defaults: ``threads`` 0 = usable CPUs, no ``memory_limit`` = RAM share."""
+    if threads < 0:
+        raise ValueError(f"threads must be >= 0, got {threads}.")
+    return Resources(
+        threads=threads or detect_cpus(),
+        memory_limit_bytes=(
+            parse_size(memory_limit)
+            if memory_limit
+            else int(detect_memory() * DEFAULT_MEMORY_FRACTION)
+        ),
+        temp_directory=temp_directory,
+        max_temp_directory_size=max_temp_directory_size or None,
+        preserve_insertion_order=preserve_insertion_order,
+    )
+
+
+def format_mib(n_bytes: int) -> str:
+    return f"{n_bytes // 2**20}MiB"
+
+
+def parse_size(text: str) -> int:
+    """Bytes in a size such as ``512MB``, ``4GiB`` or ``1000000``."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", text)
+    if m is None or m.group(2).lower() not in _UNITS:
+        raise ValueError(f"Invalid size {text!r}; expected e.g. 512MB or 4GiB.")
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def detect_cpus() -> int:
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = _read("/sys/fs/cgroup/cpu.max")
+    if quota and not quota.startswith("max"):
+        limit, period = quota.split()[:2]
+        cpus = min(cpus, max(1, int(int(limit) / int(period))))
+    return cpus
+
+
+def detect_memory() -> int:
+    """Physical memory in bytes, capped by a cgroup (v2 or v1) memory limit."""
+    total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read(path)
+        if limit and limit.isdigit():
+            total = min(total, int(limit))
+    return total
+
+
+def _read(path: str) -> str | None:
+    try:
+        return Path(path).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
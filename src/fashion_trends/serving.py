@@ -0,0 +1,419 @@
+"""Read-only HTTP/JSON serving of the marts behind the ``serve`` command.
+
+Readers never open the warehouse itself, so they cannot block (or be blocked by) the pipeline's
+write lock. Instead the pipeline *publishes* a snapshot: after a command that rebuilt marts, the
+served tables are copied into ``<serving dir>/<version>.duckdb`` and ``CURRENT.json`` is switched
+to it. The version is a hash of the tables' fingerprints, so an unchanged warehouse is not
+republished. The server answers from a pool of read-only cursors on the current snapshot and
+caches encoded responses in an LRU keyed by (version, normalized SQL, parameters); a new version
+makes every older entry unreachable and clears the cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import duckdb
+from rich.console import Console
+
+from fashion_trends.cube import CUBE_DIMS, CUBE_TABLE, slice_query
+from fashion_trends.db import table_exists
+from fashion_trends.pipelines.export_tableau import table_fingerprint
+
+console = Console()
+
+SERVED_TABLES = (
+    "mart.mart_brand_weekly_performance",
+    "mart.mart_collection_health",
+    "mart.mart_style_weekly",
+    "mart.mart_brand_trend_index",
+    "mart.mart_trend_index_levels",
+    CUBE_TABLE,
+)
+CURRENT_FILE = "CURRENT.json"
+# Snapshots kept besides the current one, for requests still reading an older version.
+KEEP_SNAPSHOTS = 2
+# Snapshot tables are clustered on these columns (where present), so slice queries skip row groups.
+CLUSTER_COLS = ("grouping_id", "week_start", "brand")
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10_000
+STYLE_FLAGS = {"emerging": ("is_emerging", "DESC"), "fatiguing": ("is_fatiguing", "ASC")}
+
+
+def publish_snapshot(con: duckdb.DuckDBPyConnection, serving_dir: Path) -> str | None:
+    """Publishes the served mart tables as a new snapshot unless they are unchanged.
+
+    Returns the snapshot version, or None when none of ``SERVED_TABLES`` exists yet.
+    """
+    present = [t for t in SERVED_TABLES if table_exists(con, t)]
+    if not present:
+        return None
+    fingerprints = {t: table_fingerprint(con, f"SELECT * FROM {t}") for t in present}
+    version = hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode()).hexdigest()[:12]
+    current = read_current(serving_dir)
+    if current is not None and current["version"] == version:
+        if (serving_dir / current["file"]).exists():
+            return version
+
+    serving_dir.mkdir(parents=True, exist_ok=True)
+    path = serving_dir / f"{version}.duckdb"
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    con.execute(f"ATTACH '{tmp.as_posix()}' AS serving_snapshot;")
+    try:
+        con.execute("CREATE SCHEMA serving_snapshot.mart;")
+        for t in present:
+            types = dict(r[:2] for r in con.execute(f"DESCRIBE {t}").fetchall())
+            # SUMs of integers are HUGEINT, which is several times slower to fetch into Python.
+            select = ", ".join(
+                f"{c}::BIGINT AS {c}" if ty == "HUGEINT" else c for c, ty in types.items()
+            )
+            order = ", ".join(c for c in CLUSTER_COLS if c in types)
+            con.execute(
+                f"CREATE TABLE serving_snapshot.{t} AS SELECT {select} FROM {t}"
+                + (f" ORDER BY {order};" if order else ";")
+            )
+    finally:
+        con.execute("DETACH serving_snapshot;")
+    os.replace(tmp, path)
+
+    info = {
+        "version": version,
+        "file": path.name,
+        "published_at": datetime.now().isoformat(timespec="seconds"),
+        "tables": {t: fingerprints[t][0] for t in present},
+    }
+    tmp_current = serving_dir / f"{CURRENT_FILE}.tmp"
+    tmp_current.write_text(json.dumps(info, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_current, serving_dir / CURRENT_FILE)
+    _prune(serving_dir, keep=path)
+    console.print(f"[dim]Published serving snapshot {version} ({len(present)} tables).[/dim]")
+    return version
+
+
+def read_current(serving_dir: Path) -> dict | None:
+    try:
+        return json.loads((serving_dir / CURRENT_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def _prune(serving_dir: Path, keep: Path) -> None:
+    old = sorted(
+        (p for p in serving_dir.glob("*.duckdb") if p != keep), key=lambda p: p.stat().st_mtime
+    )
+    for p in old[: max(0, len(old) - KEEP_SNAPSHOTS)]:
+        p.unlink(missing_ok=True)
+
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace-insensitive form of a query, for cache keys."""
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+class ResultCache:
+    """Thread-safe LRU of encoded responses."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class ConnectionPool:
+    """Cursors on one read-only connection to a snapshot; ``connection()`` waits for a free one."""
+
+    def __init__(self, path: Path, size: int) -> None:
+        self._con = duckdb.connect(str(path), read_only=True)
+        self._free: queue.Queue[duckdb.DuckDBPyConnection] = queue.Queue()
+        for _ in range(max(1, size)):
+            self._free.put(self._con.cursor())
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        cur = self._free.get()
+        try:
+            yield cur
+        finally:
+            self._free.put(cur)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One published snapshot: its version, served tables (with row counts), columns and pool.
+
+    ``ServingWarehouse`` swaps whole snapshots, so a request that holds one sees a consistent
+    version, table list and pool even while a newer snapshot is being published.
+    """
+
+    version: str
+    tables: dict[str, int]
+    columns: dict[str, list[str]]
+    pool: ConnectionPool
+
+    def mart_query(self, name: str, args: dict[str, str]) -> tuple[str, list]:
+        """SQL for ``/marts/<name>``: equality filters on any column, order_by, limit and offset."""
+        table = f"mart.{name}"
+        if table not in self.tables:
+            served = sorted(t.split(".")[1] for t in self.tables)
+            raise KeyError(f"Unknown mart {name!r}; served: {served}.")
+        cols = self.columns[table]
+        args = dict(args)
+        limit, offset = _limit(args.pop("limit", None)), _int(args.pop("offset", "0"), "offset")
+        order_by = args.pop("order_by", None)
+        unknown = sorted(set(args) - set(cols))
+        unknown += [order_by] if order_by and order_by not in cols else []
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown} for {name}.")
+        where = " AND ".join(f"{c} = ?" for c in sorted(args))
+        sql = f"SELECT * FROM {table}" + (f" WHERE {where}" if where else "")
+        sql += f" ORDER BY {order_by}" if order_by else ""
+        return sql + f" LIMIT {limit} OFFSET {offset}", [args[c] for c in sorted(args)]
+
+    def styles_query(self, flag: str, args: dict[str, str]) -> tuple[str, list]:
+        """SQL for ``/styles/<emerging|fatiguing>`` over the latest week of the trend index."""
+        if flag not in STYLE_FLAGS:
+            raise KeyError(f"Unknown style list {flag!r}; expected one of {sorted(STYLE_FLAGS)}.")
+        if "mart.mart_brand_trend_index" not in self.tables:
+            raise KeyError("mart_brand_trend_index is not in the serving snapshot.")
+        column, direction = STYLE_FLAGS[flag]
+        args = dict(args)
+        limit = _limit(args.pop("limit", "20"))
+        filters = {c: args.pop(c) for c in ("brand", "metric", "region", "category") if c in args}
+        if args:
+            raise ValueError(f"Unknown parameter(s) {sorted(args)}.")
+        where = "".join(f" AND {c} = ?" for c in sorted(filters))
+        sql = f"""
+            SELECT * FROM mart.mart_brand_trend_index
+            WHERE week_start = (SELECT MAX(week_start) FROM mart.mart_brand_trend_index)
+              AND {column}{where}
+            ORDER BY trend_index {direction} LIMIT {limit}
+        """
+        return sql, [filters[c] for c in sorted(filters)]
+
+    def cube_query(self, args: dict[str, str]) -> tuple[str, list]:
+        """SQL for ``/cube``: the slice fixing the given dimensions, optionally for one week."""
+        if CUBE_TABLE not in self.tables:
+            raise KeyError(f"{CUBE_TABLE} is not in the serving snapshot.")
+        args = dict(args)
+        week_start = args.pop("week_start", None)
+        unknown = sorted(set(args) - set(CUBE_DIMS))
+        if unknown:
+            raise ValueError(
+                f"Unknown parameter(s) {unknown}; expected week_start or some of {list(CUBE_DIMS)}."
+            )
+        return slice_query(week_start=week_start, **args)
+
+
+class ServingWarehouse:
+    """The current ``Snapshot`` of a serving directory, and the result cache.
+
+    Requests take the snapshot once (``current``) and answer entirely from it; ``refresh`` publishes
+    a new one with a single assignment, so readers need no lock.
+    """
+
+    def __init__(self, serving_dir: Path, *, pool_size: int = 4, cache_size: int = 256) -> None:
+        self.serving_dir = serving_dir
+        self.pool_size = pool_size
+        self.cache = ResultCache(cache_size)
+        self.snapshot: Snapshot | None = None
+        self._current_mtime: int | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Switches to a newly published snapshot (only a stat of ``CURRENT.json`` if unchanged)."""
+        try:
+            mtime = (self.serving_dir / CURRENT_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._current_mtime:
+            return
+        with self._lock:
+            if mtime == self._current_mtime:
+                return
+            info = read_current(self.serving_dir)
+            old = self.snapshot
+            if info is not None and (old is None or info["version"] != old.version):
+                # Requests still running on the old pool keep it alive until they finish.
+                pool = ConnectionPool(self.serving_dir / info["file"], self.pool_size)
+                with pool.connection() as cur:
+                    rows = cur.execute(
+                        "SELECT table_schema || '.' || table_name, "
+                        "list(column_name ORDER BY ordinal_position) "
+                        "FROM information_schema.columns GROUP BY ALL"
+                    ).fetchall()
+                self.snapshot = Snapshot(info["version"], info["tables"], dict(rows), pool)
+                self.cache.clear()
+            self._current_mtime = mtime
+
+    def current(self) -> Snapshot | None:
+        """The snapshot to answer a request from, after picking up a newly published one."""
+        self.refresh()
+        return self.snapshot
+
+    def query(self, snapshot: Snapshot, sql: str, params: list | None = None) -> tuple[bytes, bool]:
+        """JSON ``{"version", "count", "rows"}`` of a query on ``snapshot``, and whether cached."""
+        key = (snapshot.version, normalize_sql(sql), tuple(params or ()))
+        body = self.cache.get(key)
+        if body is not None:
+            return body, True
+        with snapshot.pool.connection() as cur:
+            cur.execute(sql, params or [])
+            cols = [d[0] for d in cur.description]
+            rows = [dict(zip(cols, map(_json_value, r), strict=True)) for r in cur.fetchall()]
+        body = json.dumps(
+            {"version": snapshot.version, "count": len(rows), "rows": rows}, default=str
+        ).encode()
+        self.cache.put(key, body)
+        return body, False
+
+    def health(self, snapshot: Snapshot | None) -> bytes:
+        return json.dumps(
+            {
+                "version": snapshot and snapshot.version,
+                "tables": snapshot.tables if snapshot else {},
+                "pool_size": self.pool_size,
+                "cache": self.cache.stats(),
+            }
+        ).encode()
+
+
+def _require(snapshot: Snapshot | None) -> Snapshot:
+    if snapshot is None:
+        raise LookupError(
+            "No serving snapshot published yet; run the pipeline (run / compute-indices) first."
+        )
+    return snapshot
+
+
+def make_server(
+    serving_dir: Path,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    pool_size: int = 4,
+    cache_size: int = 256,
+) -> ThreadingHTTPServer:
+    """An HTTP server for ``serving_dir`` (``port=0`` picks a free port); call serve_forever()."""
+    warehouse = ServingWarehouse(serving_dir, pool_size=pool_size, cache_size=cache_size)
+    warehouse.refresh()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            url = urlsplit(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            args = dict(parse_qsl(url.query))
+            snap = warehouse.current()
+            try:
+                if parts == ["health"]:
+                    return self._send(200, warehouse.health(snap), None, snap)
+                if parts == ["marts"]:
+                    tables = {
+                        t: {"rows": n, "columns": snap.columns.get(t, [])}
+                        for t, n in (snap.tables.items() if snap else ())
+                    }
+                    body = json.dumps({"version": snap and snap.version, "tables": tables})
+                    return self._send(200, body.encode(), None, snap)
+                if len(parts) == 2 and parts[0] == "marts":
+                    sql, params = _require(snap).mart_query(parts[1], args)
+                elif parts == ["cube"]:
+                    sql, params = _require(snap).cube_query(args)
+                elif len(parts) == 2 and parts[0] == "styles":
+                    sql, params = _require(snap).styles_query(parts[1], args)
+                else:
+                    return self._error(404, f"Unknown endpoint {url.path}.", snap)
+                body, hit = warehouse.query(_require(snap), sql, params)
+                self._send(200, body, hit, snap)
+            except LookupError as e:
+                code = 404 if isinstance(e, KeyError) else 503
+                self._error(code, e.args[0] if e.args else str(e), snap)
+            except (ValueError, duckdb.Error) as e:
+                self._error(400, str(e), snap)
+
+        def _send(self, code: int, body: bytes, hit: bool | None, snap: Snapshot | None) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if snap is not None:
+                self.send_header("X-Build-Version", snap.version)
+            if hit is not None:
+                self.send_header("X-Cache", "hit" if hit else "miss")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, code: int, message: str, snap: Snapshot | None) -> None:
+            self._send(code, json.dumps({"error": message}).encode(), None, snap)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - http.server signature
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def _limit(value: str | None) -> int:
+    limit = _int(value, "limit") if value is not None else DEFAULT_LIMIT
+    if not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}, got {limit}.")
+    return limit
+
+
+def _int(value: str, name: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}.") from None
+
+
+def _json_value(v: object) -> object:
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
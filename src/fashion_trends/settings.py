@@ -3,18 +3,55 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
+from fashion_trends.resources import Resources, resolve_resources
+
+# Trailing weeks run-sql always rebuilds to pick up late-arriving events. Defined here, not in
+# pipelines.run_sql, so the CLI can show it as a default without importing the pipeline.
+DEFAULT_LOOKBACK_WEEKS = 2
+
 @dataclass(frozen=True)
 class Settings:
     db_path: Path = Path(os.getenv("DB_PATH", "warehouse/warehouse.duckdb"))
     raw_dir: Path = Path(os.getenv("RAW_DIR", "data/raw"))
     export_dir: Path = Path(os.getenv("EXPORT_DIR", "exports/tableau"))
+    # Read-only mart snapshots published for `serve`.
+    serving_dir: Path = Path(os.getenv("SERVING_DIR", "warehouse/serving"))
     seed: int = int(os.getenv("SEED", "7"))
     days: int = int(os.getenv("DAYS", "210"))
     n_users: int = int(os.getenv("N_USERS", "80000"))
+    # DuckDB resources; 0 / empty = detected from the host (see fashion_trends.resources).
+    threads: int = int(os.getenv("DUCKDB_THREADS", "0"))
+    memory_limit: str = os.getenv("DUCKDB_MEMORY_LIMIT", "")
+    temp_directory: Path | None = (
+        Path(os.environ["DUCKDB_TEMP_DIR"]) if os.getenv("DUCKDB_TEMP_DIR") else None
+    )
+    max_temp_directory_size: str = os.getenv("DUCKDB_MAX_TEMP_SIZE", "")
+    preserve_insertion_order: bool = os.getenv("DUCKDB_PRESERVE_INSERTION_ORDER", "1") != "0"
+    # Rows of mart_style_weekly per streamed compute-indices chunk; 0 = sized from the memory limit.
+    index_chunk_rows: int = int(os.getenv("INDEX_CHUNK_ROWS", "0"))
+    # Marts (comma-separated) whose session counts are merged from HyperLogLog sketches.
+    approx_session_marts: tuple[str, ...] = tuple(
+        m.strip() for m in os.getenv("APPROX_SESSION_MARTS", "").split(",") if m.strip()
+    )
+    # Build the session sketches even when no mart counts approximately (for sketch-report).
+    session_sketches: bool = os.getenv("SESSION_SKETCHES", "0") == "1"
 
     def ensure_dirs(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.export_dir.mkdir(parents=True, exist_ok=True)
 
+    def resources(self, db_path: Path | None = None) -> Resources:
+        """Resolved DuckDB resources; spill files default to ``<warehouse dir>/duckdb_tmp``."""
+        return resolve_resources(
+            threads=self.threads,
+            memory_limit=self.memory_limit,
+            temp_directory=self.temp_directory or (db_path or self.db_path).parent / "duckdb_tmp",
+            max_temp_directory_size=self.max_temp_directory_size,
+            preserve_insertion_order=self.preserve_insertion_order,
+        )
+
+    def resolved_index_chunk_rows(self) -> int:
+        return self.index_chunk_rows or self.resources().index_chunk_rows()
+
 settings = Settings()
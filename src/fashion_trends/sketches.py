@@ -0,0 +1,133 @@
+"""Distinct-session funnels at any grain from ``mart.sketch_style_sessions_weekly``.
+
+The sketch mart (``sql/03_marts.sql``) keeps HyperLogLog registers (``sql/01_macros.sql``) of the
+page_view, add_to_cart and purchase sessions per week, region and style. Registers merge by max,
+so the funnel of any coarser grain (brand, category x color, all regions, ...) is one aggregation
+over the sketches instead of a distinct count over the session facts. ``validation_report``
+measures how far those estimates are from the exact counts.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import duckdb
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+SKETCH_TABLE = "mart.sketch_style_sessions_weekly"
+FACT_TABLE = "mart.fct_session_product_weekly"
+SKETCH_DIMS = ("region", "brand", "gender", "category", "silhouette", "color")
+# Grains compared by validation_report: the funnel mart grain, then ever coarser rollups.
+VALIDATION_GRAINS: tuple[tuple[str, ...], ...] = (
+    ("region", "brand", "category", "gender"),
+    ("brand", "category", "color"),
+    ("brand",),
+    ("region",),
+    (),
+)
+RATES = ("atc_rate", "conversion_rate")
+
+
+def _check_dims(dims: Sequence[str]) -> None:
+    unknown = sorted(set(dims) - set(SKETCH_DIMS))
+    if unknown:
+        raise ValueError(
+            f"Unknown sketch dimension(s) {unknown}; expected some of {list(SKETCH_DIMS)}."
+        )
+
+
+def _rates(counts_sql: str) -> str:
+    return (
+        "SELECT *, safe_divide(atc_sessions, traffic_sessions) AS atc_rate, "
+        f"safe_divide(purchase_sessions, traffic_sessions) AS conversion_rate FROM ({counts_sql})"
+    )
+
+
+def rollup_query(dims: Sequence[str]) -> str:
+    """SQL of the weekly funnel at ``(week_start, *dims)``, sessions merged from the sketches."""
+    _check_dims(dims)
+    keys = ", ".join(["week_start", *dims])
+    return _rates(
+        f"""
+        SELECT {keys},
+          hll_count(view_rank) AS traffic_sessions,
+          hll_count(atc_rank) AS atc_sessions,
+          hll_count(purchase_rank) AS purchase_sessions
+        FROM (
+          SELECT {keys}, register,
+            max(view_rank) AS view_rank,
+            max(atc_rank) AS atc_rank,
+            max(purchase_rank) AS purchase_rank
+          FROM {SKETCH_TABLE}
+          GROUP BY {keys}, register
+        )
+        GROUP BY {keys}
+        """
+    )
+
+
+def exact_query(dims: Sequence[str]) -> str:
+    """SQL of the same funnel with exact distinct sessions from the session x product facts."""
+    _check_dims(dims)
+    keys = ", ".join(["f.week_start", *(f"f.{d}" if d == "region" else f"p.{d}" for d in dims)])
+    return _rates(
+        f"""
+        SELECT {keys},
+          count(DISTINCT f.session_key) FILTER (WHERE f.viewed) AS traffic_sessions,
+          count(DISTINCT f.session_key) FILTER (WHERE f.added_to_cart) AS atc_sessions,
+          count(DISTINCT f.session_key) FILTER (WHERE f.purchased) AS purchase_sessions
+        FROM {FACT_TABLE} f
+        JOIN staging.stg_products p USING (product_id)
+        GROUP BY {keys}
+        """
+    )
+
+
+def funnel_rollup(
+    con: duckdb.DuckDBPyConnection, dims: Sequence[str], *, exact: bool = False
+) -> pd.DataFrame:
+    """Weekly funnel at ``(week_start, *dims)``, e.g. ``funnel_rollup(con, ["brand"])``."""
+    sql = exact_query(dims) if exact else rollup_query(dims)
+    return con.execute(f"{sql} ORDER BY ALL").df()
+
+
+def validation_report(
+    con: duckdb.DuckDBPyConnection, grains: Sequence[Sequence[str]] = VALIDATION_GRAINS
+) -> pd.DataFrame:
+    """Approximate vs exact funnels per grain: relative session error and absolute rate error."""
+    rate_errors = ", ".join(
+        f"AVG(abs(a.{r} - e.{r})) AS {r}_mean_abs_error, "
+        f"MAX(abs(a.{r} - e.{r})) AS {r}_max_abs_error"
+        for r in RATES
+    )
+    rel_error = "abs(a.traffic_sessions - e.traffic_sessions) / e.traffic_sessions"
+    rows = []
+    for dims in grains:
+        keys = ", ".join(["week_start", *dims])
+        row = con.execute(
+            f"""
+            SELECT
+              COUNT(*) AS cells,
+              AVG({rel_error}) AS sessions_mean_rel_error,
+              MAX({rel_error}) AS sessions_max_rel_error,
+              {rate_errors}
+            FROM ({exact_query(dims)}) e
+            JOIN ({rollup_query(dims)}) a USING ({keys})
+            WHERE e.traffic_sessions > 0
+            """
+        ).df()
+        row.insert(0, "grain", " x ".join(dims) or "total")
+        rows.append(row)
+    return pd.concat(rows, ignore_index=True)
+
+
+def print_report(report: pd.DataFrame) -> None:
+    t = Table(title="Sketch sessions vs exact (per week)")
+    for c in report.columns:
+        t.add_column(c)
+    for r in report.itertuples(index=False):
+        t.add_row(r.grain, f"{r.cells:,}", *(f"{v:.4f}" for v in r[2:]))
+    console.print(t)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from fashion_trends.analytics.backtest import compute_lead_time_weeks
+
+
+def test_vectorized_lead_times_match_loop_reference():
+    rng = np.random.default_rng(9)
+    rows = []
+    for g in range(60):
+        n = int(rng.integers(3, 26))
+        ramp = np.clip(np.arange(n) - rng.integers(4, 20), 0, None)
+        recent = 0.02 + 0.001 * ramp + rng.normal(0, 0.0005, size=n)
+        recent[rng.random(n) < 0.05] = np.nan
+        for i in range(n):
+            rows.append(
+                {
+                    "brand": f"B{g % 4}", "color": f"C{g}", "metric": "conversion_rate",
+                    "week_start": pd.Timestamp("2025-01-06") + pd.Timedelta(weeks=i),
+                    "baseline_mean": 0.02 + rng.normal(0, 0.0005),
+                    "recent_mean": recent[i],
+                    "trend_index": 0.4 * ramp[i] + rng.normal(0, 0.5),
+                }
+            )
+    idx = pd.DataFrame(rows).sample(frac=1.0, random_state=9)
+    idx = pd.concat([idx, idx.assign(metric="atc_rate", trend_index=5.0)], ignore_index=True)
+
+    fast = compute_lead_time_weeks(idx, group_cols=["brand", "color"])
+    ref = compute_lead_time_weeks(idx, group_cols=["brand", "color"], engine="loop")
+    assert len(ref) > 0
+    pd.testing.assert_frame_equal(fast, ref)
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from fashion_trends.bench import (
+    BenchTier,
+    compare_results,
+    read_results,
+    run_benchmark,
+    write_results,
+)
+from fashion_trends.pipelines.compute_indices import METRICS
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+
+
+def test_benchmark_times_every_stage(tmp_path):
+    results = run_benchmark(BenchTier(days=21, n_users=300), sql_dir=SQL_DIR, work_dir=tmp_path)
+    stages = list(results["stages"])
+    assert stages[:2] == ["generate", "ingest"]
+    assert "sql mart.mart_style_weekly" in stages
+    assert stages[-7:] == [
+        "load_index_panel", "compute_trend_index", "mark_fatigue", "compute_lead_time_weeks",
+        "store_index", "level_indices", "export",
+    ]
+    assert results["rows"]["web_events"] > 0
+    # Volume is scored in place; only the rates (null in weeks without sessions) are copied.
+    assert set(results["panel"]["copied_columns"]) <= set(METRICS)
+
+    write_results(results, tmp_path / "r.json")
+    assert read_results(tmp_path / "r.json")["stages"] == results["stages"]
+
+
+def test_compare_flags_regressions_beyond_tolerance_and_noise():
+    baseline = {"stages": {"ingest": 1.0, "export": 1.0, "tiny": 0.001, "gone": 1.0}}
+    current = {"stages": {"ingest": 1.2, "export": 1.4, "tiny": 0.01, "new": 5.0}}
+    assert compare_results(current, baseline, tolerance=0.25) == ["export"]
+    assert compare_results(current, baseline, tolerance=0.5) == []
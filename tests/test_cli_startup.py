@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+import fashion_trends
+from fashion_trends import profiling
+
+SRC_DIR = Path(fashion_trends.__file__).resolve().parents[1]
+# Import-time budget of a light invocation as a multiple of ``import duckdb`` timed in the same
+# process, so it holds on fast and slow machines alike. These measure ~0.5-1.8x; the CLI that
+# imported every pipeline up front took ~5x (pandas, NumPy and pyarrow alone are ~3.6x).
+IMPORT_BUDGET_RATIO = 3.0
+# Optional absolute budget (ms) on top, to tighten it on a known machine: CLI_IMPORT_BUDGET_MS=250.
+IMPORT_BUDGET_MS = float(os.environ.get("CLI_IMPORT_BUDGET_MS", "0"))
+HEAVY = {"pandas", "numpy", "pyarrow", "fashion_trends.pipelines"}
+# ``python -m fashion_trends`` with duckdb imported first as the reference.
+RUN_CLI = (
+    "import duckdb, runpy; runpy.run_module('fashion_trends', run_name='__main__', alter_sys=True)"
+)
+
+
+def _env(tmp_path: Path) -> dict[str, str]:
+    pythonpath = os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")])
+    return {**os.environ, "PYTHONPATH": pythonpath, "DB_PATH": str(tmp_path / "w.duckdb")}
+
+
+def _imports(tmp_path: Path, *args: str) -> tuple[float, float, set[str]]:
+    """Import time in ms of ``python -m fashion_trends *args`` and of ``import duckdb`` before it,
+    and every module imported."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_CLI, *args],
+        capture_output=True, text=True, env=_env(tmp_path), cwd=tmp_path,
+    )
+    cli_us, duckdb_us, modules = 0, None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.add(name.strip())
+        if duckdb_us is not None:
+            cli_us += int(self_us)
+        elif name == " duckdb":
+            duckdb_us = int(cumulative_us)
+    assert duckdb_us, proc.stderr[-2000:]
+    return cli_us / 1000, duckdb_us / 1000, modules
+
+
+@pytest.mark.parametrize("args", [("--help",), ("status",), ("compute-indices", "--help")])
+def test_light_invocations_skip_heavy_imports(tmp_path, args):
+    ms, duckdb_ms, modules = _imports(tmp_path, *args)
+    command = " ".join(args)
+    assert not modules & HEAVY, f"{command} imported {sorted(modules & HEAVY)}"
+    if ms > IMPORT_BUDGET_RATIO * duckdb_ms:
+        # The first run may have compiled the package's bytecode; time a warm one.
+        ms, duckdb_ms, _ = _imports(tmp_path, *args)
+    ratio = ms / duckdb_ms
+    assert ratio < IMPORT_BUDGET_RATIO, f"{command} spent {ms:.0f} ms ({ratio:.1f}x duckdb)"
+    if IMPORT_BUDGET_MS:
+        assert ms < IMPORT_BUDGET_MS, f"{command} spent {ms:.0f} ms importing modules"
+
+
+def test_status_lists_profiled_runs(tmp_path):
+    env = _env(tmp_path)
+    cmd = [sys.executable, "-m", "fashion_trends", "status"]
+    missing = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=tmp_path)
+    assert missing.returncode == 1 and "No warehouse" in missing.stdout
+
+    con = duckdb.connect(env["DB_PATH"])
+    con.execute("CREATE SCHEMA meta;")
+    profiling.ensure_tables(con)
+    con.execute(
+        f"INSERT INTO {profiling.RUNS_TABLE} "
+        "VALUES ('r1', 'run-sql', '2025-06-02 10:00', 1.5, 300, 9, 'ok')"
+    )
+    con.close()
+    out = subprocess.run(
+        cmd, capture_output=True, text=True, env=env, cwd=tmp_path, check=True
+    ).stdout
+    assert "r1" in out and "run-sql" in out and "9 stage(s)" in out
@@ -0,0 +1,215 @@
+from datetime import date
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from fashion_trends.analytics.backtest import compute_lead_time_weeks
+from fashion_trends.analytics.parallel import compute_trend_indices
+from fashion_trends.analytics.trend_index import TrendIndexConfig, mark_fatigue
+from fashion_trends.db import bootstrap_schemas
+from fashion_trends.pipelines.compute_indices import (
+    GROUP_COLS,
+    INDEX_TABLE,
+    METRICS,
+    STYLE_DIM,
+    compute_and_store_indices,
+    iter_index_panel,
+)
+from fashion_trends.pipelines.compute_level_indices import (
+    INDEX_LEVELS,
+    LEVEL_TABLE,
+    compute_and_store_level_indices,
+)
+
+SQL_ENGINE = Path(__file__).resolve().parents[1] / "sql" / "engines" / "trend_index.sql"
+
+
+def _style_weekly(n_groups: int = 30, n_weeks: int = 26, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range("2025-01-06", periods=n_weeks, freq="W-MON")
+    rows = []
+    for g in range(n_groups):
+        present = rng.random(n_weeks) > 0.15
+        for w in np.flatnonzero(present):
+            traffic = int(rng.poisson(400))
+            trend = 0.002 * max(0, w - 14) if g % 4 == 0 else 0.0
+            rows.append(
+                {
+                    "week_start": weeks[w].date(), "region": ["NA", "EU", "APAC"][g % 3],
+                    "brand": f"B{g % 6}", "gender": "W", "category": "Tops",
+                    "silhouette": f"S{g}", "color": "Black",
+                    "traffic_sessions": traffic,
+                    "atc_rate": float(rng.normal(0.08, 0.01)) + trend,
+                    "conversion_rate": float(rng.normal(0.02, 0.004)) + trend,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _load_mart(con: duckdb.DuckDBPyConnection, df: pd.DataFrame) -> None:
+    bootstrap_schemas(con)
+    con.register("style_df", df)
+    # Like the staging models: every style (a missing label included) gets a style_id in dim_style.
+    styles = [c for c in GROUP_COLS if c != "region"]
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE {STYLE_DIM} AS
+        SELECT CAST(row_number() OVER (ORDER BY {", ".join(styles)}) AS INTEGER) AS style_id, *
+        FROM (SELECT DISTINCT {", ".join(styles)} FROM style_df)
+        """
+    )
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE mart.mart_style_weekly AS
+        SELECT s.*, d.style_id FROM style_df s
+        JOIN {STYLE_DIM} d ON {" AND ".join(f"s.{c} IS NOT DISTINCT FROM d.{c}" for c in styles)}
+        """
+    )
+    con.unregister("style_df")
+
+
+def _index(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    keys = GROUP_COLS + ["metric", "week_start"]
+    df = con.execute("SELECT * FROM mart.mart_brand_trend_index").df()
+    return df.sort_values(keys).reset_index(drop=True)[sorted(df.columns)]
+
+
+def test_incremental_matches_full_rebuild():
+    panel = _style_weekly()
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+
+    full = duckdb.connect()
+    _load_mart(full, panel)
+    compute_and_store_indices(full, cfg)
+
+    inc = duckdb.connect()
+    cutoff = date(2025, 5, 5)
+    _load_mart(inc, panel[panel["week_start"] < cutoff])
+    compute_and_store_indices(inc, cfg)
+    _load_mart(inc, panel)
+    compute_and_store_indices(inc, cfg, since=cutoff)
+    # Re-running the latest (possibly partial) week is an idempotent upsert.
+    compute_and_store_indices(inc, cfg, incremental=True)
+
+    pd.testing.assert_frame_equal(_index(inc), _index(full), check_dtype=False, rtol=1e-12)
+
+
+def test_config_change_forces_full_rebuild():
+    panel = _style_weekly(n_groups=8)
+    con = duckdb.connect()
+    _load_mart(con, panel)
+    compute_and_store_indices(con, TrendIndexConfig())
+
+    changed = TrendIndexConfig(baseline_weeks=8)
+    compute_and_store_indices(con, changed, incremental=True)
+
+    ref = duckdb.connect()
+    _load_mart(ref, panel)
+    compute_and_store_indices(ref, changed)
+    pd.testing.assert_frame_equal(_index(con), _index(ref), check_dtype=False)
+
+
+def test_sql_engine_matches_python_reference():
+    panel = _style_weekly()
+    panel.loc[panel.index[::17], "conversion_rate"] = None
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+
+    py = duckdb.connect()
+    _load_mart(py, panel)
+    compute_and_store_indices(py, cfg)
+
+    db = duckdb.connect()
+    _load_mart(db, panel)
+    compute_and_store_indices(db, cfg, engine="sql", sql_path=SQL_ENGINE)
+
+    ref, out = _index(py), _index(db)
+    assert ref["lead_time_weeks"].notna().any() and ref["is_fatiguing"].any()
+    pd.testing.assert_frame_equal(out, ref, check_dtype=False, rtol=1e-9, atol=1e-12)
+
+
+def test_arrow_rebuild_matches_pandas_reference():
+    panel = _style_weekly()
+    panel.loc[panel.index[::17], "conversion_rate"] = None
+    panel.loc[panel.index[5], "color"] = None
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+
+    con = duckdb.connect()
+    _load_mart(con, panel)
+    compute_and_store_indices(con, cfg)
+
+    # The pandas path this replaced: the whole mart as a DataFrame, then copy/sort/merge steps
+    # (with style_id as one more label, where the index table keeps it).
+    df = con.execute("SELECT * FROM mart.mart_style_weekly").df()
+    keys = GROUP_COLS + ["style_id"]
+    idx = compute_trend_indices(df, metric_cols=METRICS, group_cols=keys, cfg=cfg)
+    idx = mark_fatigue(idx, group_cols=keys + ["metric"], cfg=cfg)
+    lead = compute_lead_time_weeks(idx, group_cols=keys)
+    ref = duckdb.connect()
+    ref.register("idx_df", idx.merge(lead, on=keys, how="left"))
+    ref.execute("CREATE TABLE t AS SELECT * FROM idx_df")
+
+    out = con.execute(f"DESCRIBE {INDEX_TABLE}").fetchall()
+    expected = ref.execute("DESCRIBE t").fetchall()
+    assert [c[:2] for c in out] == [c[:2] for c in expected]
+    ordered = f"ORDER BY {', '.join(GROUP_COLS)}, metric, week_start"
+    assert ref.execute(f"SELECT * FROM t {ordered}").fetchall() == con.execute(
+        f"SELECT * FROM {INDEX_TABLE} {ordered}"
+    ).fetchall()
+
+
+def test_streamed_rebuild_matches_whole_panel():
+    panel = _style_weekly()
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+
+    whole = duckdb.connect()
+    _load_mart(whole, panel)
+    compute_and_store_indices(whole, cfg)
+
+    streamed = duckdb.connect()
+    _load_mart(streamed, panel)
+    chunks = list(iter_index_panel(streamed, 60))
+    assert len(chunks) > 1
+    first, second = (set(c.column("style_id").to_pylist()) for c in chunks[:2])
+    assert not first & second
+    compute_and_store_indices(streamed, cfg, chunk_rows=60)
+
+    pd.testing.assert_frame_equal(_index(streamed), _index(whole))
+
+
+def test_level_indices_match_one_run_per_level():
+    panel = _style_weekly()
+    panel["category"] = np.where(panel.index % 3 == 0, "Tops", "Shoes")
+    panel["color"] = np.where(panel.index % 2 == 0, "Black", "Ivory")
+    for rate, count in {"atc_rate": "atc_sessions", "conversion_rate": "purchase_sessions"}.items():
+        panel[count] = (panel[rate] * panel["traffic_sessions"]).round().astype(int)
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+
+    con = duckdb.connect()
+    _load_mart(con, panel)
+    con.execute((SQL_ENGINE.parents[1] / "01_macros.sql").read_text())
+    compute_and_store_level_indices(con, cfg)
+    out = con.execute(f"SELECT * FROM {LEVEL_TABLE}").df()
+    assert set(out["level"]) == set(INDEX_LEVELS)
+
+    for level, keep in INDEX_LEVELS.items():
+        keys = list(keep)
+        sums = panel.groupby(keys + ["week_start"], as_index=False)[
+            ["traffic_sessions", "atc_sessions", "purchase_sessions"]
+        ].sum()
+        sums["atc_rate"] = sums["atc_sessions"] / sums["traffic_sessions"]
+        sums["conversion_rate"] = sums["purchase_sessions"] / sums["traffic_sessions"]
+        sums["week_start"] = pd.to_datetime(sums["week_start"])
+        ref = compute_trend_indices(sums, metric_cols=METRICS, group_cols=keys, cfg=cfg)
+        ref = mark_fatigue(ref, group_cols=keys + ["metric"], cfg=cfg)
+
+        got = out[out["level"] == level]
+        assert got[[c for c in ["brand", "category", "color"] if c not in keep]].isna().all().all()
+        order = keys + ["metric", "week_start"]
+        got = got.sort_values(order).reset_index(drop=True)
+        ref = ref.sort_values(order).reset_index(drop=True)
+        for c in ["trend_index", "traffic_sessions", "is_emerging", "is_fatiguing"]:
+            np.testing.assert_allclose(
+                got[c].astype(float), ref[c].astype(float), rtol=1e-9, err_msg=f"{level} {c}"
+            )
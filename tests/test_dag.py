@@ -0,0 +1,54 @@
+import shutil
+from pathlib import Path
+
+import duckdb
+
+from fashion_trends.pipelines.dag import build_dag, run_pipeline
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+
+
+def _edit(path: Path, model: str, old: str, new: str) -> None:
+    sql = path.read_text()
+    i = sql.index(f"CREATE OR REPLACE TABLE {model}")
+    path.write_text(sql[:i] + sql[i:].replace(old, new, 1))
+
+
+def test_changed_only_reruns_affected_stages(tmp_path):
+    raw, held, sql_dir = tmp_path / "raw", tmp_path / "held", tmp_path / "sql"
+    generate_synthetic_data(GenConfig(seed=7, days=42, n_users=200, out_dir=raw, fmt="parquet"))
+    shutil.copytree(SQL_DIR, sql_dir)
+    late = sorted((raw / "web_events").iterdir())[-1]
+    held.mkdir()
+    shutil.move(late, held / late.name)
+
+    con = duckdb.connect()
+
+    def run() -> set[str]:
+        nodes = build_dag(raw, sql_dir, tmp_path / "exports")
+        status = run_pipeline(con, nodes, changed_only=True, workers=3)
+        return {n for n, s in status.items() if s == "ran"}
+
+    first = run()
+    assert "export" in first and "mart.mart_brand_trend_index" in first
+    assert run() == set()
+
+    marts = sql_dir / "03_marts.sql"
+    _edit(marts, "mart.mart_collection_health", "markdown_pct > 0.05", "markdown_pct > 0.10")
+    assert run() == {
+        "mart.mart_collection_health",
+        "mart.mart_brand_weekly_performance",
+        "mart.mart_performance_cube",
+        "export",
+    }
+
+    # A rebuild that reproduces the same table stops there.
+    _edit(marts, "mart.mart_style_weekly", "FROM counts c", "FROM counts c -- same rows")
+    assert run() == {"mart.mart_style_weekly"}
+
+    shutil.move(held / late.name, raw / "web_events" / late.name)
+    ran = run()
+    downstream = {"mart.fct_session_product_weekly", "mart.mart_brand_trend_index"}
+    assert {"raw.web_events"} | downstream <= ran
+    assert not ran & {"raw.products", "raw.orders", "mart.mart_collection_health"}
@@ -0,0 +1,50 @@
+import duckdb
+
+from fashion_trends.db import bootstrap_schemas
+from fashion_trends.pipelines.export_tableau import EXPORTS, export_csvs
+
+
+def _marts() -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    bootstrap_schemas(con)
+    for sql in EXPORTS.values():
+        con.execute(
+            f"""
+            CREATE TABLE {sql.split()[-1]} AS
+            SELECT DATE '2025-01-06' + (7 * (i % 10))::INTEGER AS week_start,
+                   'B' || (i % 3) AS brand,
+                   i * 0.5 AS value
+            FROM range(200) t(i);
+            """
+        )
+    return con
+
+
+def test_unchanged_extracts_are_skipped(tmp_path):
+    con = _marts()
+    first = export_csvs(con, tmp_path, fmt="csv.gz")
+    assert not any(r.skipped for r in first.values())
+    assert all(r.path.name.endswith(".csv.gz") and r.rows == 200 for r in first.values())
+
+    con.execute("UPDATE mart.mart_style_weekly SET value = value + 1 WHERE brand = 'B1';")
+    second = export_csvs(con, tmp_path, fmt="csv.gz")
+    assert {n for n, r in second.items() if not r.skipped} == {"style_weekly"}
+
+    # Changing the format re-exports everything and removes the old files.
+    third = export_csvs(con, tmp_path, fmt="csv")
+    assert not any(r.skipped for r in third.values())
+    assert not list(tmp_path.glob("*.csv.gz"))
+    assert export_csvs(con, tmp_path, fmt="csv", force=True)["collection_health"].skipped is False
+
+
+def test_partitioned_parquet_roundtrip(tmp_path):
+    con = _marts()
+    res = export_csvs(con, tmp_path, fmt="parquet", partition_by="brand", workers=2)
+    out = res["brand_trend_index"].path
+    assert sorted(p.name for p in out.iterdir()) == ["brand=B0", "brand=B1", "brand=B2"]
+    back = con.execute(
+        "SELECT COUNT(*), SUM(value) "
+        f"FROM read_parquet('{out.as_posix()}/**/*.parquet', hive_partitioning=true)"
+    ).fetchone()
+    source = con.execute("SELECT COUNT(*), SUM(value) FROM mart.mart_brand_trend_index")
+    assert back == source.fetchone()
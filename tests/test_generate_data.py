@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+
+
+def _files(root: Path) -> dict[str, bytes]:
+    files = (p for p in sorted(root.rglob("*")) if p.is_file())
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in files}
+
+
+def test_output_does_not_depend_on_chunking_or_workers(tmp_path):
+    base = dict(seed=11, days=20, n_users=2000, shard_days=6)
+    generate_synthetic_data(GenConfig(**base, out_dir=tmp_path / "a", chunk_sessions=1))
+    generate_synthetic_data(GenConfig(**base, out_dir=tmp_path / "b", workers=3))
+    a, b = _files(tmp_path / "a"), _files(tmp_path / "b")
+    assert a == b
+    assert "web_events/part-00003.csv" in a and "products.csv" in a
+
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path / "a")
+    # Orders are numbered 1..N in day order across shards.
+    order_ids = con.execute(
+        "SELECT order_id FROM raw.orders ORDER BY CAST(order_ts AS DATE), order_id"
+    ).fetchnumpy()["order_id"]
+    assert (order_ids == np.arange(1, len(order_ids) + 1)).all()
+
+
+def test_generated_tables_are_consistent(tmp_path):
+    generate_synthetic_data(
+        GenConfig(seed=3, days=28, n_users=3000, out_dir=tmp_path, fmt="parquet")
+    )
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+
+    def q(sql: str) -> tuple:
+        return con.execute(sql).fetchone()
+
+    # Every purchase session also added to cart, and each purchase became one order of 1-3 items.
+    assert q(
+        """
+        SELECT COUNT(*) FROM raw.web_events p
+        WHERE event_type = 'purchase'
+          AND NOT EXISTS (
+            SELECT 1 FROM raw.web_events a
+            WHERE a.session_id = p.session_id AND a.event_type = 'add_to_cart'
+          )
+        """
+    )[0] == 0
+    purchases = q("SELECT COUNT(*) FROM raw.web_events WHERE event_type = 'purchase'")
+    assert purchases == q("SELECT COUNT(*) FROM raw.orders")
+    assert q(
+        "SELECT MIN(n), MAX(n) FROM (SELECT COUNT(*) AS n FROM raw.order_items GROUP BY order_id)"
+    ) == (1, 3)
+    assert q(
+        "SELECT COUNT(DISTINCT order_id) = COUNT(*) AND MIN(order_id) = 1 "
+        "AND MAX(order_id) = COUNT(*) FROM raw.orders"
+    )[0]
+
+    pv_per_session, atc_rate = q(
+        """
+        SELECT COUNT(*) FILTER (event_type = 'page_view') / COUNT(DISTINCT session_id),
+               COUNT(*) FILTER (event_type = 'add_to_cart') / COUNT(DISTINCT session_id)
+        FROM raw.web_events
+        """
+    )
+    assert 3.3 < pv_per_session < 3.7
+    assert 0.04 < atc_rate < 0.16
+    assert q("SELECT COUNT(*) FROM raw.inventory_receipts")[0] == 12000 * q(
+        "SELECT COUNT(DISTINCT week_start) FROM raw.inventory_receipts"
+    )[0]
@@ -0,0 +1,166 @@
+import duckdb
+import pytest
+
+from fashion_trends.pipelines import ingest
+from fashion_trends.pipelines.convert_raw import convert_raw, write_parquet_table
+from fashion_trends.pipelines.ingest import ingest_raw_csvs, source_sql
+
+RAW = {
+    "products.csv": "product_id,brand,category,gender,collection,silhouette,color,list_price\n"
+    "1,AMI,Tops,M,Capsule,Boxy,Black,120.0\n2,Loewe,Bags,W,Resort,Micro,Pink,900.5\n",
+    "inventory_receipts.csv": "product_id,week_start,units_received\n"
+    "1,2025-01-06,10\n2,2025-01-06,4\n",
+    "web_events.csv": "ts,date,user_id,session_id,region,event_type,product_id\n"
+    "2025-01-06 10:00:00,2025-01-06,7,s0000_000001,NA,page_view,1\n",
+    "orders.csv": "order_id,order_ts,user_id,region,discount_pct\n"
+    "1,2025-01-06 11:00:00,7,NA,0.1\n",
+    "order_items.csv": "order_id,product_id,quantity,unit_price,markdown_pct,is_returned\n"
+    "1,1,1,108.0,0.1,0\n",
+}
+
+
+def _count(con: duckdb.DuckDBPyConnection, table: str) -> int:
+    return con.execute(f"SELECT COUNT(*) FROM raw.{table}").fetchone()[0]
+
+
+def test_append_mode_loads_only_new_and_changed_files(tmp_path):
+    for name, text in RAW.items():
+        (tmp_path / name).write_text(text)
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    assert _count(con, "web_events") == 1
+    types = {r[0]: r[1] for r in con.execute("DESCRIBE raw.inventory_receipts").fetchall()}
+    assert types["week_start"] == "DATE"
+
+    # Nothing new: every table is skipped.
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 1 and _count(con, "products") == 2
+
+    # A new day partition is appended, without touching the existing rows.
+    part = tmp_path / "web_events" / "date=2025-01-07"
+    part.mkdir(parents=True)
+    (part / "events.csv").write_text(
+        "ts,date,user_id,session_id,region,event_type,product_id\n"
+        "2025-01-07 09:00:00,2025-01-07,8,s0001_000001,EU,page_view,2\n"
+        "2025-01-07 09:05:00,2025-01-07,8,s0001_000001,EU,add_to_cart,2\n"
+    )
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 3
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 3
+
+    # A rewritten file reloads its table instead of appending duplicates.
+    rewritten = RAW["products.csv"] + "3,AMI,Shoes,U,Collab,Sport,White,300.0\n"
+    (tmp_path / "products.csv").write_text(rewritten)
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "products") == 3
+
+    manifest = con.execute(
+        "SELECT table_name, SUM(row_count) FROM meta.ingest_manifest GROUP BY 1"
+    ).fetchall()
+    assert dict(manifest) == {
+        "products": 3, "inventory_receipts": 2, "web_events": 3, "orders": 1, "order_items": 1,
+    }
+
+
+def test_failed_ingest_leaves_rows_and_manifest_unchanged(tmp_path, monkeypatch):
+    for name, text in RAW.items():
+        (tmp_path / name).write_text(text)
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    part = tmp_path / "web_events" / "date=2025-01-07"
+    part.mkdir(parents=True)
+    (part / "events.csv").write_text(
+        "ts,date,user_id,session_id,region,event_type,product_id\n"
+        "2025-01-07 09:00:00,2025-01-07,8,s0001_000001,EU,page_view,2\n"
+        "2025-01-07 09:05:00,2025-01-07,8,s0001_000001,EU,add_to_cart,2\n"
+    )
+    manifest = "SELECT COUNT(*) FROM meta.ingest_manifest WHERE table_name = ?"
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("injected")
+
+    # The append fails after its rows are inserted but before the manifest records the file.
+    with monkeypatch.context() as m:
+        m.setattr(ingest, "_record", fail)
+        with pytest.raises(RuntimeError, match="injected"):
+            ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 1
+    assert con.execute(manifest, ["web_events"]).fetchone()[0] == 1
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 3
+    assert con.execute(manifest, ["web_events"]).fetchone()[0] == 2
+
+    # A reload that fails partway keeps the previous table and its manifest entries.
+    with monkeypatch.context() as m:
+        m.setattr(ingest, "_record", fail)
+        with pytest.raises(RuntimeError, match="injected"):
+            ingest_raw_csvs(con, tmp_path)
+    assert _count(con, "web_events") == 3
+    assert con.execute(manifest, ["web_events"]).fetchone()[0] == 2
+
+
+def test_append_mixes_csv_and_parquet_files(tmp_path):
+    for name, text in RAW.items():
+        (tmp_path / name).write_text(text)
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    header = "ts,date,user_id,session_id,region,event_type,product_id\n"
+    for day in ("2025-01-07", "2025-01-08"):
+        part = tmp_path / "web_events" / f"date={day}"
+        part.mkdir(parents=True)
+        (part / "events.csv").write_text(
+            header + f"{day} 09:00:00,{day},8,s0001_000001,EU,page_view,2\n"
+        )
+    # The second day lands as Parquet next to the first day's CSV.
+    csv_day = tmp_path / "web_events" / "date=2025-01-08" / "events.csv"
+    parquet_day = csv_day.with_suffix(".parquet")
+    con.execute(f"COPY ({source_sql('web_events', [csv_day])}) TO '{parquet_day.as_posix()}'")
+    csv_day.unlink()
+
+    ingest_raw_csvs(con, tmp_path, append=True)
+    assert _count(con, "web_events") == 3
+    ranges = con.execute(
+        "SELECT min_date::VARCHAR, max_date::VARCHAR FROM meta.ingest_manifest "
+        "WHERE table_name = 'web_events' AND min_date > '2025-01-06' ORDER BY 1"
+    ).fetchall()
+    assert ranges == [("2025-01-07", "2025-01-07"), ("2025-01-08", "2025-01-08")]
+    with pytest.raises(ValueError, match="one format"):
+        source_sql("web_events", [tmp_path / "web_events.csv", parquet_day])
+
+
+def test_parquet_raw_layer_matches_csv(tmp_path):
+    src, dst = tmp_path / "csv", tmp_path / "parquet"
+    src.mkdir()
+    for name, text in RAW.items():
+        (src / name).write_text(text)
+    convert_raw(src, dst)
+    assert (dst / "web_events" / "date=2025-01-06").is_dir()
+    assert (dst / "products.parquet").is_file()
+
+    csv_con, pq_con, ext_con = duckdb.connect(), duckdb.connect(), duckdb.connect()
+    ingest_raw_csvs(csv_con, src)
+    ingest_raw_csvs(pq_con, dst)
+    ingest_raw_csvs(ext_con, dst, external=True)
+    for table in ["products", "web_events", "orders", "order_items"]:
+        expected = csv_con.execute(f"SELECT * FROM raw.{table} ORDER BY ALL").fetchall()
+        assert pq_con.execute(f"SELECT * FROM raw.{table} ORDER BY ALL").fetchall() == expected
+        assert ext_con.execute(f"SELECT * FROM raw.{table} ORDER BY ALL").fetchall() == expected
+    kind = (
+        "SELECT table_type FROM information_schema.tables "
+        "WHERE table_schema = 'raw' AND table_name = 'web_events'"
+    )
+    assert ext_con.execute(kind).fetchone()[0] == "VIEW"
+
+    # A new Parquet day partition is appended through the manifest; the external view sees it
+    # directly.
+    extra = src / "extra"
+    extra.mkdir()
+    (extra / "day.csv").write_text(
+        "ts,date,user_id,session_id,region,event_type,product_id\n"
+        "2025-01-07 09:00:00,2025-01-07,8,s0001_000001,EU,page_view,2\n"
+    )
+    day = source_sql("web_events", [extra / "day.csv"])
+    write_parquet_table(pq_con, day, dst, "web_events", file_prefix="extra")
+    ingest_raw_csvs(pq_con, dst, append=True)
+    assert _count(pq_con, "web_events") == 2 and _count(ext_con, "web_events") == 2
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from fashion_trends import profiling
+from fashion_trends.db import connect
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import run_sql_folder
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+
+
+def test_profiled_run_records_stage_metrics(tmp_path):
+    generate_synthetic_data(GenConfig(seed=2, days=21, n_users=200, out_dir=tmp_path / "raw"))
+    db = tmp_path / "w.duckdb"
+    con = connect(db)
+
+    # Without an active profiler stages are not recorded anywhere.
+    ingest_raw_csvs(con, tmp_path / "raw")
+
+    profiler = profiling.start("run-sql", db)
+    run_sql_folder(con, SQL_DIR)
+    profiler.finish()
+    assert not profiling.active()
+
+    runs = con.execute(
+        "SELECT run_id, command, stages, status, peak_rss_mb FROM meta.pipeline_runs"
+    ).fetchall()
+    assert len(runs) == 1 and runs[0][1:4] == ("run-sql", 9, "ok") and runs[0][4] > 0
+    stages = {
+        row[0]: row[1:]
+        for row in con.execute(
+            "SELECT stage, seconds, rows_in, rows_out, peak_rss_mb, query_profile "
+            "FROM meta.stage_metrics"
+        ).fetchall()
+    }
+    assert set(stages) >= {"01_macros.sql", "02_staging.sql", "mart.mart_style_weekly"}
+    seconds, rows_in, rows_out, rss, query_profile = stages["mart.mart_style_weekly"]
+    assert rows_out == con.execute("SELECT COUNT(*) FROM mart.mart_style_weekly").fetchone()[0]
+    assert rows_in > rows_out and seconds > 0 and rss > 0
+    assert "latency" in json.loads(query_profile)
+
+    profiling.profile_report(con)
+
+
+def test_profile_report_only_reads(tmp_path):
+    con = connect(tmp_path / "w.duckdb")
+    profiling.profile_report(con)
+    tables = con.execute("SELECT table_name FROM duckdb_tables() WHERE schema_name = 'meta'")
+    assert tables.fetchall() == []
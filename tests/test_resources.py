@@ -0,0 +1,77 @@
+import duckdb
+import pytest
+
+from fashion_trends.db import connect, cursor, stage_resources
+from fashion_trends.resources import STAGE_OVERRIDES, parse_size, resolve_resources
+
+SETTINGS = ["threads", "memory_limit", "temp_directory", "preserve_insertion_order"]
+
+
+def _current(con) -> dict:
+    columns = ", ".join(f"current_setting({name!r})" for name in SETTINGS)
+    return dict(zip(SETTINGS, con.execute(f"SELECT {columns}").fetchone(), strict=True))
+
+
+def test_resolve_detects_defaults_and_parses_sizes(tmp_path):
+    assert parse_size("512MB") == 512 * 10**6 and parse_size("1.5 GiB") == 3 * 2**29
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+    auto = resolve_resources(threads=0, memory_limit="", temp_directory=tmp_path)
+    assert auto.threads >= 1 and auto.memory_limit_bytes > 0
+    fixed = resolve_resources(threads=2, memory_limit="1GiB", temp_directory=tmp_path)
+    assert (fixed.threads, fixed.memory_limit_bytes) == (2, 2**30)
+    assert fixed.index_chunk_rows() == 2**29 // 1000
+
+
+def test_connect_applies_resources_and_stages_restore_them(tmp_path):
+    resources = resolve_resources(
+        threads=2,
+        memory_limit="1GiB",
+        temp_directory=tmp_path / "spill",
+        preserve_insertion_order=True,
+    )
+    con = connect(tmp_path / "w.duckdb", resources)
+    base = _current(con)
+    assert base["threads"] == 2 and base["memory_limit"] == "1.0 GiB"
+    assert base["temp_directory"] == (tmp_path / "spill").as_posix()
+    assert base["preserve_insertion_order"] is True
+
+    with stage_resources(con, "indices"):
+        assert _current(con)["memory_limit"] == "512.0 MiB"
+        # An overlapping stage keeps the first stage's settings; the last one out restores.
+        with stage_resources(con, "export"):
+            assert _current(con)["preserve_insertion_order"] is False
+        assert _current(con)["preserve_insertion_order"] is False
+    assert _current(con) == base
+
+
+def test_stage_state_is_per_database_and_undone_on_failure(tmp_path, monkeypatch):
+    a, b = connect(tmp_path / "a.duckdb"), connect(tmp_path / "b.duckdb")
+    base_a, base_b = _current(a), _current(b)
+    with stage_resources(a, "indices"), stage_resources(b, "export"):
+        # Each database gets its own stage's overrides, and each is restored on its own.
+        assert _current(a)["preserve_insertion_order"] is False
+        assert _current(b)["preserve_insertion_order"] is True
+    assert (_current(a), _current(b)) == (base_a, base_b)
+
+    cur = cursor(a)
+    with stage_resources(a, "indices"), stage_resources(cur, "export"):
+        assert _current(cur)["preserve_insertion_order"] is False
+    assert _current(a) == base_a
+
+    # A value that DuckDB rejects half way through entering a stage leaves nothing behind.
+    spill = tmp_path / "it's spill"
+    bad = {"temp_directory": spill, "threads": "many"}
+    monkeypatch.setitem(STAGE_OVERRIDES, "sql", bad)
+    with pytest.raises(duckdb.Error):
+        with stage_resources(a, "sql"):
+            pass
+    assert _current(a) == base_a
+    with stage_resources(a, "export"):
+        assert _current(a)["preserve_insertion_order"] is True
+
+    monkeypatch.setitem(STAGE_OVERRIDES, "sql", {"temp_directory": spill})
+    with stage_resources(a, "sql"):
+        assert _current(a)["temp_directory"] == spill.as_posix()
+    assert _current(a) == base_a
@@ -0,0 +1,112 @@
+import shutil
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import MartModel, run_sql_folder, split_statements
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+MARTS = [
+    "sketch_style_sessions_weekly",
+    "mart_brand_weekly_funnel",
+    "mart_collection_health",
+    "mart_brand_weekly_performance",
+    "mart_style_weekly",
+    "mart_performance_cube",
+]
+
+
+def _marts(con: duckdb.DuckDBPyConnection) -> dict[str, pd.DataFrame]:
+    return {m: con.execute(f"SELECT * FROM mart.{m} ORDER BY ALL").df() for m in MARTS}
+
+
+def test_marts_are_annotated_with_week_partitions():
+    statements = split_statements((SQL_DIR / "03_marts.sql").read_text())
+    models = [s for s in statements if isinstance(s, MartModel)]
+    marts = [f"mart.{m}" for m in MARTS]
+    assert [m.name for m in models] == ["mart.fct_session_product_weekly"] + marts
+    assert {m.partition_by for m in models} == {"week_start"}
+
+
+def test_incremental_marts_match_full_refresh(tmp_path):
+    raw, held = tmp_path / "raw", tmp_path / "held"
+    generate_synthetic_data(GenConfig(seed=3, days=70, n_users=300, out_dir=raw, fmt="parquet"))
+    # Hold back the latest days plus one old day that arrives late.
+    days = sorted((raw / "web_events").iterdir())
+    late = [days[5]] + days[-9:]
+    for d in late:
+        (held / d.name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(d, held / d.name)
+
+    con = duckdb.connect()
+    ingest_raw_csvs(con, raw)
+    run_sql_folder(con, SQL_DIR)
+    for d in late:
+        shutil.move(held / d.name, raw / "web_events" / d.name)
+    ingest_raw_csvs(con, raw, append=True)
+    run_sql_folder(con, SQL_DIR, lookback_weeks=0)
+    incremental = _marts(con)
+
+    builds = con.execute("SELECT COUNT(*) FROM meta.mart_builds").fetchone()[0]
+    assert builds == len(MARTS) + 1  # marts + the session fact
+    run_sql_folder(con, SQL_DIR, full_refresh=True)
+    for name, df in _marts(con).items():
+        pd.testing.assert_frame_equal(incremental[name], df, check_dtype=False, rtol=1e-9)
+
+
+def test_fact_based_counts_equal_distinct_sessions(tmp_path):
+    generate_synthetic_data(GenConfig(seed=5, days=30, n_users=300, out_dir=tmp_path))
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    run_sql_folder(con, SQL_DIR)
+    expected = con.execute(
+        """
+        SELECT e.week_start, e.region, p.brand, p.gender, p.category, p.silhouette, p.color,
+          COUNT(DISTINCT CASE WHEN event_type='page_view' THEN session_id END) AS traffic_sessions,
+          COUNT(DISTINCT CASE WHEN event_type='add_to_cart' THEN session_id END) AS atc_sessions,
+          COUNT(DISTINCT CASE WHEN event_type='purchase' THEN session_id END) AS purchase_sessions
+        FROM staging.stg_web_events e
+        JOIN staging.stg_products p USING (product_id)
+        GROUP BY ALL
+        ORDER BY ALL
+        """
+    ).df()
+    cols = ", ".join(expected.columns)
+    actual = con.execute(f"SELECT {cols} FROM mart.mart_style_weekly ORDER BY ALL").df()
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_renumbered_styles_rebuild_marts_in_full(tmp_path):
+    generate_synthetic_data(
+        GenConfig(seed=3, days=35, n_users=300, out_dir=tmp_path, fmt="parquet")
+    )
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    run_sql_folder(con, SQL_DIR)
+    before = con.execute("SELECT * FROM staging.dim_style ORDER BY style_id").df()
+
+    # A new product in a new style that sorts first shifts every style_id; no ENUM domain grows.
+    con.execute(
+        """
+        INSERT INTO raw.products
+        SELECT * REPLACE (
+          (SELECT MAX(product_id) + 1 FROM raw.products) AS product_id,
+          (SELECT MIN(brand) FROM raw.products) AS brand,
+          (SELECT MAX(gender) FROM raw.products) AS gender,
+          (SELECT MIN(category) FROM raw.products) AS category,
+          (SELECT MAX(silhouette) FROM raw.products) AS silhouette,
+          (SELECT MIN(color) FROM raw.products) AS color
+        )
+        FROM raw.products LIMIT 1
+        """
+    )
+    run_sql_folder(con, SQL_DIR, lookback_weeks=0)
+    after = con.execute("SELECT * FROM staging.dim_style ORDER BY style_id").df()
+    assert len(after) == len(before) + 1 and not after.head(len(before)).equals(before)
+    incremental = _marts(con)["mart_style_weekly"]
+
+    run_sql_folder(con, SQL_DIR, full_refresh=True)
+    pd.testing.assert_frame_equal(incremental, _marts(con)["mart_style_weekly"], check_dtype=False)
@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import quote
+
+import duckdb
+
+from fashion_trends.pipelines.dag import build_dag, run_pipeline
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.serving import make_server, publish_snapshot, read_current
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+
+
+def _get(base: str, path: str) -> tuple[int, dict, dict]:
+    try:
+        with urllib.request.urlopen(base + path) as r:
+            return r.status, dict(r.headers), json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_serve_snapshot_cache_and_republish(tmp_path):
+    raw, serving = tmp_path / "raw", tmp_path / "serving"
+    generate_synthetic_data(GenConfig(seed=7, days=42, n_users=200, out_dir=raw, fmt="parquet"))
+    con = duckdb.connect(str(tmp_path / "w.duckdb"))
+    run_pipeline(con, build_dag(raw, SQL_DIR, tmp_path / "exports"), workers=2)
+
+    server = make_server(serving, port=0, pool_size=2, cache_size=16)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert _get(base, "/marts/mart_style_weekly")[0] == 503
+
+        version = publish_snapshot(con, serving)
+        assert publish_snapshot(con, serving) == version  # unchanged marts: not republished
+        status, _, body = _get(base, "/marts")
+        assert status == 200 and body["version"] == version
+        assert body["tables"]["mart.mart_style_weekly"]["rows"] > 0
+        assert "trend_index" in body["tables"]["mart.mart_brand_trend_index"]["columns"]
+
+        brand = con.execute(
+            "SELECT MIN(brand) FROM mart.mart_brand_weekly_performance"
+        ).fetchone()[0]
+        path = f"/marts/mart_brand_weekly_performance?brand={quote(brand)}&limit=5"
+        status, headers, body = _get(base, path)
+        assert status == 200 and headers["X-Cache"] == "miss"
+        assert headers["X-Build-Version"] == version
+        assert 0 < body["count"] <= 5 and {r["brand"] for r in body["rows"]} == {brand}
+        assert _get(base, path)[1]["X-Cache"] == "hit"
+
+        status, _, body = _get(base, "/styles/emerging?metric=conversion_rate&limit=3")
+        latest = con.execute(
+            "SELECT MAX(week_start) FROM mart.mart_brand_trend_index"
+        ).fetchone()[0]
+        assert status == 200
+        assert all(r["is_emerging"] and r["week_start"] == str(latest) for r in body["rows"])
+        week = con.execute("SELECT MAX(week_start) FROM mart.mart_performance_cube").fetchone()[0]
+        status, _, body = _get(base, f"/cube?brand={quote(brand)}&week_start={week}")
+        assert status == 200 and body["count"] == 1 and body["rows"][0]["grouping_id"] == 15
+        assert _get(base, "/cube?season=SS25")[0] == 400
+        assert _get(base, "/marts/mart_style_weekly?no_such_column=1")[0] == 400
+        assert _get(base, "/marts/raw_web_events")[0] == 404
+
+        # A pipeline change publishes a new version, which invalidates the cached responses.
+        con.execute("DELETE FROM mart.mart_brand_weekly_performance WHERE brand = ?", [brand])
+        new_version = publish_snapshot(con, serving)
+        assert new_version != version and read_current(serving)["version"] == new_version
+        status, headers, body = _get(base, path)
+        assert headers["X-Cache"] == "miss" and headers["X-Build-Version"] == new_version
+        assert body["count"] == 0
+
+        # Requests racing republishes answer from one snapshot: header and body versions agree.
+        brands = [r[0] for r in con.execute(
+            "SELECT DISTINCT brand FROM mart.mart_brand_weekly_performance ORDER BY 1 LIMIT 3"
+        ).fetchall()]
+
+        def republish() -> None:
+            for b in brands:
+                con.execute("DELETE FROM mart.mart_brand_weekly_performance WHERE brand = ?", [b])
+                publish_snapshot(con, serving)
+
+        publisher = threading.Thread(target=republish)
+        publisher.start()
+        while publisher.is_alive():
+            status, headers, body = _get(base, "/marts/mart_brand_weekly_performance?limit=1")
+            assert status == 200 and headers["X-Build-Version"] == body["version"]
+        publisher.join()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import run_sql_folder
+from fashion_trends.sketches import SKETCH_TABLE, funnel_rollup, validation_report
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+APPROX = ["mart_brand_weekly_funnel", "mart_style_weekly", "mart_performance_cube"]
+
+
+@pytest.mark.parametrize("n", [1, 50, 3_000, 40_000, 500_000])
+def test_hll_count_estimates_distinct_hashes(n):
+    con = duckdb.connect()
+    con.execute((SQL_DIR / "01_macros.sql").read_text())
+    est = con.execute(
+        f"""
+        SELECT hll_count(rank) FROM (
+          SELECT hll_register(hash(i)) AS register, max(hll_rank(hash(i))) AS rank
+          FROM range({n}) t(i) GROUP BY 1
+        )
+        """
+    ).fetchone()[0]
+    assert est == pytest.approx(n, rel=0.05)
+
+
+def test_approx_marts_merge_sketches_close_to_exact(tmp_path):
+    generate_synthetic_data(
+        GenConfig(seed=13, days=35, n_users=600, out_dir=tmp_path, fmt="parquet")
+    )
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    # Without approximate marts the sketches are only built on request.
+    run_sql_folder(con, SQL_DIR, approx_sessions=[], sketches=False)
+    assert con.execute(f"SELECT COUNT(*) FROM {SKETCH_TABLE}").fetchone()[0] == 0
+    run_sql_folder(con, SQL_DIR, approx_sessions=[], sketches=True)
+    assert con.execute(f"SELECT COUNT(*) FROM {SKETCH_TABLE}").fetchone()[0] > 0
+    exact = con.execute("SELECT * FROM mart.mart_brand_weekly_funnel ORDER BY ALL").df()
+    hashes = dict(con.execute("SELECT table_name, sql_hash FROM meta.mart_builds").fetchall())
+
+    report = validation_report(con)
+    assert report["cells"].gt(0).all()
+    # Tiny cells can lose a session to a shared register; the totals stay within the sketch error.
+    assert report["sessions_mean_rel_error"].max() < 0.02
+    assert report["conversion_rate_mean_abs_error"].max() < 0.01
+    assert report.set_index("grain").loc["total", "sessions_max_rel_error"] < 0.05
+
+    run_sql_folder(con, SQL_DIR, approx_sessions=APPROX)
+    changed = dict(con.execute("SELECT table_name, sql_hash FROM meta.mart_builds").fetchall())
+    assert {t for t in hashes if hashes[t] != changed[t]} == {f"mart.{m}" for m in APPROX}
+    approx = con.execute("SELECT * FROM mart.mart_brand_weekly_funnel ORDER BY ALL").df()
+    assert len(approx) == len(exact)
+    sessions = exact["traffic_sessions"].sum()
+    assert approx["traffic_sessions"].sum() == pytest.approx(sessions, rel=0.01)
+
+    # The cube's funnel cells now hold distinct sessions, which the merged sketches reproduce.
+    week = approx["week_start"].max()
+    brands = funnel_rollup(con, ["brand"]).query("week_start == @week").set_index("brand")
+    cube = con.execute(
+        "SELECT brand, traffic_sessions FROM mart.mart_performance_cube "
+        "WHERE grouping_id = 15 AND week_start = ?",
+        [week],
+    ).df().set_index("brand")["traffic_sessions"]
+    assert (cube == brands.loc[cube.index, "traffic_sessions"]).all()
+    exact_brands = funnel_rollup(con, ["brand"], exact=True).query("week_start == @week")
+    exact_sessions = exact_brands.set_index("brand")["traffic_sessions"]
+    assert (cube - exact_sessions.loc[cube.index]).abs().max() <= 0.05 * exact_sessions.max()
+
+    with pytest.raises(ValueError, match="approx_sessions"):
+        run_sql_folder(con, SQL_DIR, approx_sessions=["mart_collection_health"])
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pytest
+
+from fashion_trends.analytics.sweep import SweepPanel, parameter_grid, run_sweep
+from fashion_trends.analytics.trend_index import TrendIndexConfig, run_positions, trend_stats
+from fashion_trends.pipelines.backtest_sweep import backtest_sweep
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import run_sql_folder
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+
+
+def _panel(seed=3, n_groups=300):
+    rng = np.random.default_rng(seed)
+    lens = rng.integers(1, 40, size=n_groups)
+    starts = np.zeros(lens.sum(), dtype=bool)
+    starts[np.r_[0, np.cumsum(lens)[:-1]]] = True
+    pos = run_positions(starts)
+    y = 0.02 + rng.normal(0, 0.003, size=len(pos))
+    y[rng.random(len(pos)) < 0.05] = np.nan
+    volume = rng.integers(0, 600, size=len(pos)).astype(float)
+    positive = np.repeat(rng.random(n_groups) < 0.1, lens)
+    return y, volume, pos, positive
+
+
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        TrendIndexConfig(),
+        TrendIndexConfig(
+            baseline_weeks=6,
+            exclude_recent_weeks=2,
+            recent_weeks=1,
+            slope_weeks=6,
+            momentum_weight=0.5,
+        ),
+    ],
+)
+def test_prefix_sum_stats_match_trend_stats(cfg):
+    y, volume, pos, positive = _panel()
+    got = SweepPanel.prepare(y, volume, pos, positive).stats(cfg)
+    ref = trend_stats(y, volume, pos.astype(float), cfg)
+    for col, values in got.items():
+        if values.dtype == bool:
+            assert (values == ref[col]).all(), col
+        else:
+            np.testing.assert_allclose(values, ref[col], rtol=1e-9, atol=1e-12, err_msg=col)
+
+
+def test_sweep_is_the_same_for_any_worker_count():
+    panel = SweepPanel.prepare(*_panel())
+    grid = parameter_grid(
+        baseline_weeks=[8, 12], recent_weeks=[2, 3], emerging_threshold=[1.0, 1.5]
+    )
+    serial = run_sweep(panel, grid, workers=1)
+    assert len(serial) == 8 and serial["flagged_groups"].gt(0).any()
+    assert serial["baseline_weeks"].tolist() == [p.cfg.baseline_weeks for p in grid]
+    assert serial.equals(run_sweep(panel, grid, workers=2))
+
+    with pytest.raises(ValueError, match="baseline_week"):
+        parameter_grid(baseline_week=[8])
+
+
+def test_backtest_sweep_on_warehouse(tmp_path):
+    generate_synthetic_data(
+        GenConfig(seed=5, days=60, n_users=600, out_dir=tmp_path, fmt="parquet")
+    )
+    con = duckdb.connect()
+    ingest_raw_csvs(con, tmp_path)
+    run_sql_folder(con, SQL_DIR)
+    grid = parameter_grid(min_sessions=[0, 5], emerging_threshold=[1.0, 2.0])
+    results = backtest_sweep(con, grid, workers=1)
+    assert len(results) == 4
+    assert results["score"].is_monotonic_decreasing
+    assert results["hit_rate"].between(0, 1).all()
+    assert results["false_positive_rate"].between(0, 1).all()
@@ -1,5 +1,9 @@
+import warnings
+
+import numpy as np
 import pandas as pd
-from fashion_trends.analytics.trend_index import compute_trend_index, TrendIndexConfig
+from fashion_trends.analytics.parallel import compute_trend_indices
+from fashion_trends.analytics.trend_index import compute_trend_index, mark_fatigue, TrendIndexConfig
 
 
 def test_trend_index_runs_and_flags_emerging():
@@ -26,3 +30,74 @@ def test_trend_index_runs_and_flags_emerging():
     )
     assert len(out) > 0
     assert out["is_emerging"].any()
+
+
+def _panel(n_groups: int = 40, n_weeks: int = 30, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for g in range(n_groups):
+        n = int(rng.integers(1, n_weeks + 1))
+        weeks = np.sort(rng.choice(n_weeks, size=n, replace=False))
+        traffic = rng.poisson(300, size=n).astype(float)
+        conv = rng.normal(0.02, 0.004, size=n)
+        conv[rng.random(n) < 0.1] = np.nan
+        if g % 7 == 0:
+            conv[:] = 0.015
+        for w, t, c in zip(weeks, traffic, conv, strict=True):
+            rows.append(
+                {
+                    "week_start": pd.Timestamp("2025-01-06") + pd.Timedelta(weeks=int(w)),
+                    "brand": f"B{g % 5}", "region": ["NA", "EU"][g % 2], "gender": "W",
+                    "category": "Tops", "silhouette": f"S{g}", "color": "Black",
+                    "traffic_sessions": t, "conversion_rate": c,
+                }
+            )
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed)
+
+
+def test_vectorized_engine_matches_loop_reference():
+    df = _panel()
+    group_cols = ["brand", "region", "gender", "category", "silhouette", "color"]
+    cfg = TrendIndexConfig(min_sessions=100, emerging_threshold=1.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        ref = compute_trend_index(
+            df, metric_col="conversion_rate", group_cols=group_cols, cfg=cfg, engine="loop"
+        )
+    fast = compute_trend_index(df, metric_col="conversion_rate", group_cols=group_cols, cfg=cfg)
+    assert len(ref) > 0
+    pd.testing.assert_frame_equal(fast, ref, check_dtype=False, rtol=1e-9, atol=1e-12)
+
+
+def test_partitioned_engine_matches_serial_for_any_worker_count():
+    df = _panel(n_groups=60)
+    df["atc_rate"] = df["conversion_rate"] * 4
+    group_cols = ["brand", "region", "gender", "category", "silhouette", "color"]
+    metrics = ["conversion_rate", "atc_rate"]
+    serial = pd.concat(
+        [compute_trend_index(df, metric_col=m, group_cols=group_cols) for m in metrics],
+        ignore_index=True,
+    )
+    for workers in (1, 3):
+        out = compute_trend_indices(df, metric_cols=metrics, group_cols=group_cols, workers=workers)
+        pd.testing.assert_frame_equal(out, serial)
+
+
+def test_vectorized_fatigue_matches_loop_reference():
+    rng = np.random.default_rng(5)
+    n = 400
+    idx = pd.DataFrame(
+        {
+            "brand": rng.choice(["A", "B", "C"], size=n),
+            "silhouette": rng.choice(["Slim", "Boxy", None], size=n, p=[0.45, 0.45, 0.1]),
+            "metric": rng.choice(["atc_rate", "conversion_rate"], size=n),
+            "week_start": pd.Timestamp("2025-01-06")
+            + pd.to_timedelta(rng.integers(0, 10**6, size=n), unit="min"),
+            "trend_index": np.where(rng.random(n) < 0.1, np.nan, rng.normal(0, 1.6, size=n)),
+        }
+    )
+    group_cols = ["brand", "silhouette", "metric"]
+    fast = mark_fatigue(idx, group_cols=group_cols)
+    ref = mark_fatigue(idx, group_cols=group_cols, engine="loop")
+    assert ref["is_fatiguing"].any()
+    pd.testing.assert_frame_equal(fast, ref)
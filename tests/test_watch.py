@@ -0,0 +1,99 @@
+import json
+import shutil
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from fashion_trends.analytics.trend_index import TrendIndexConfig
+from fashion_trends.pipelines.compute_indices import INDEX_TABLE, compute_and_store_indices
+from fashion_trends.pipelines.generate_data import GenConfig, generate_synthetic_data
+from fashion_trends.pipelines.ingest import ingest_raw_csvs
+from fashion_trends.pipelines.run_sql import run_sql_folder
+from fashion_trends.pipelines.watch import ALERTS_TABLE, BATCHES_TABLE, watch
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+CFG = TrendIndexConfig(
+    baseline_weeks=4, exclude_recent_weeks=1, recent_weeks=1, slope_weeks=2, min_sessions=1,
+    emerging_threshold=0.5, fatiguing_threshold=-0.5,
+)
+
+
+def _index(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    return con.execute(f"SELECT * FROM {INDEX_TABLE} ORDER BY ALL").df()
+
+
+def test_watch_batches_match_full_rebuild(tmp_path):
+    raw, held = tmp_path / "raw", tmp_path / "held"
+    generate_synthetic_data(GenConfig(seed=3, days=70, n_users=300, out_dir=raw, fmt="parquet"))
+    days = sorted((raw / "web_events").iterdir())[-4:]
+    held.mkdir()
+    for d in days:
+        shutil.move(d, held / d.name)
+
+    con = duckdb.connect()
+    ingest_raw_csvs(con, raw)
+    run_sql_folder(con, SQL_DIR)
+    compute_and_store_indices(con, CFG)
+    assert watch(con, raw, SQL_DIR, cfg=CFG, once=True) == []
+
+    alerts_jsonl = tmp_path / "alerts.jsonl"
+    for i, d in enumerate(days):
+        shutil.move(held / d.name, raw / "web_events" / d.name)
+        if i % 2:  # two days per batch
+            [batch] = watch(con, raw, SQL_DIR, cfg=CFG, once=True, alerts_jsonl=alerts_jsonl)
+            assert batch.files == 2 and batch.groups > 0
+    incremental = _index(con)
+
+    batches = con.execute(
+        f"SELECT files, index_seconds, latency_seconds FROM {BATCHES_TABLE}"
+    ).fetchall()
+    assert len(batches) == 2
+    assert all(files == 2 and idx > 0 and lat > 0 for files, idx, lat in batches)
+    alerts = con.execute(f"SELECT * FROM {ALERTS_TABLE}").df()
+    alert_key = ["kind", "brand", "region", "gender", "category", "silhouette", "color", "metric"]
+    assert len(alerts) > 0 and not alerts.duplicated([*alert_key, "week_start"]).any()
+    assert len(alerts_jsonl.read_text().splitlines()) == len(alerts)
+    kinds = {json.loads(line)["kind"] for line in alerts_jsonl.read_text().splitlines()}
+    assert kinds <= {"emerging", "fatiguing"}
+
+    run_sql_folder(con, SQL_DIR, full_refresh=True)
+    compute_and_store_indices(con, CFG)
+    pd.testing.assert_frame_equal(incremental, _index(con), check_dtype=False, rtol=1e-9)
+
+
+def test_watch_batch_with_a_new_region(tmp_path):
+    raw, held = tmp_path / "raw", tmp_path / "held"
+    generate_synthetic_data(GenConfig(seed=4, days=42, n_users=300, out_dir=raw, fmt="parquet"))
+    [day] = sorted((raw / "web_events").iterdir())[-1:]
+    held.mkdir()
+    shutil.move(day, held / day.name)
+
+    con = duckdb.connect()
+    ingest_raw_csvs(con, raw)
+    run_sql_folder(con, SQL_DIR)
+    compute_and_store_indices(con, CFG)
+
+    # The late day's traffic all comes from a region (and an event type) no earlier file had.
+    for f in sorted((held / day.name).rglob("*.parquet")) or [held / day.name]:
+        con.execute(
+            f"""
+            COPY (
+              SELECT * REPLACE (
+                'LATAM' AS region,
+                CASE WHEN event_type = 'view' THEN 'quick_view' ELSE event_type END AS event_type
+              )
+              FROM read_parquet('{f.as_posix()}')
+            ) TO '{f.as_posix()}' (FORMAT parquet)
+            """
+        )
+    shutil.move(held / day.name, raw / "web_events" / day.name)
+    [batch] = watch(con, raw, SQL_DIR, cfg=CFG, once=True)
+    assert batch.files == 1
+    new_rows = "SELECT COUNT(*) FROM mart.mart_style_weekly WHERE region = 'LATAM'"
+    assert con.execute(new_rows).fetchone()[0] > 0
+    incremental = _index(con)
+
+    run_sql_folder(con, SQL_DIR, full_refresh=True)
+    compute_and_store_indices(con, CFG)
+    pd.testing.assert_frame_equal(incremental, _index(con), check_dtype=False, rtol=1e-9)